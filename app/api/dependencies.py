@@ -0,0 +1,46 @@
+from typing import Optional
+
+from fastapi import HTTPException
+
+from app.core.container import container
+from app.domain.services.chat_request_processor import ChatRequestProcessor
+from app.domain.services.embedding_service import EmbeddingService
+from app.domain.services.ingestion_jobs import IngestionJobManager
+from app.domain.services.ingestion_service import IngestionService
+from app.domain.services.session_manager import SessionManager
+from app.domain.services.vector_store import VectorStore
+from app.infrastructure.cache.answer_cache import SemanticAnswerCache
+
+
+def _get_initialized_container():
+    if not container.is_initialized:
+        raise HTTPException(status_code=503, detail="Services are still starting up.")
+    return container
+
+
+def get_chat_processor() -> ChatRequestProcessor:
+    return _get_initialized_container().chat_processor
+
+
+def get_embedding_service() -> EmbeddingService:
+    return _get_initialized_container().embedding_service
+
+
+def get_vector_store() -> VectorStore:
+    return _get_initialized_container().vector_store
+
+
+def get_session_manager() -> SessionManager:
+    return _get_initialized_container().session_manager
+
+
+def get_ingestion_service() -> IngestionService:
+    return _get_initialized_container().ingestion_service
+
+
+def get_ingestion_jobs() -> IngestionJobManager:
+    return _get_initialized_container().ingestion_jobs
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    return _get_initialized_container().answer_cache
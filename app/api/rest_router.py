@@ -1,7 +1,8 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import chatbot, extract
+from app.api.v1.endpoints import chatbot, extract, metrics
 
 router = APIRouter()
 
 router.include_router(chatbot.chat)
-router.include_router(extract.app)
\ No newline at end of file
+router.include_router(extract.app)
+router.include_router(metrics.metrics)
@@ -1,7 +1,9 @@
 from .endpoints.extract import app
 from .endpoints.chatbot import chat
+from .endpoints.metrics import metrics
 
 __all__ = [
     "app",
-    "chat"
+    "chat",
+    "metrics"
 ]
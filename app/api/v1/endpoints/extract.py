@@ -1,18 +1,23 @@
-import os
-
-from fastapi import HTTPException, Header, APIRouter
+from fastapi import HTTPException, APIRouter, Depends
 
+from app.api.dependencies import get_ingestion_jobs
+from app.domain.schema.ingestion_job import IngestionJob
 from app.domain.schema.query import RepoRequest
-from app.infrastructure.github.github_repo_processor import GitHubRepoProcessor
+from app.domain.services.ingestion_jobs import IngestionJobManager
 
 app = APIRouter()
 
-@app.post("/extract")
-async def extract_repo(repo_request: RepoRequest):
-    processor = GitHubRepoProcessor(github_token=repo_request.github_token, local_path="/home/logan/TEES/repo-insight-bot/data")
-
+@app.post("/extract", status_code=202)
+async def extract_repo(repo_request: RepoRequest, ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs)):
     try:
-        response = await processor.clone_repo(repo_request.url)
-        return {"response": response}
+        job = ingestion_jobs.submit(repo_request.repo_url, repo_request.github_token, repo_request.reindex)
+        return {"job_id": job.job_id, "job": job}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/extract/jobs/{job_id}", response_model=IngestionJob)
+async def get_extract_job(job_id: str, ingestion_jobs: IngestionJobManager = Depends(get_ingestion_jobs)):
+    job = ingestion_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
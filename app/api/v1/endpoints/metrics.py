@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from app.core.container import container
+
+metrics = APIRouter()
+
+@metrics.get("/api/repo-insight-bot/metrics")
+async def get_metrics():
+    return container.metrics()
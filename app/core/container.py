@@ -0,0 +1,176 @@
+import logging
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.domain.services.chat_request_processor import ChatRequestProcessor
+from app.domain.services.document_processor import DocumentProcessor
+from app.domain.services.embedding_service import EmbeddingService
+from app.domain.services.ingestion_jobs import IngestionJobManager
+from app.domain.services.ingestion_service import IngestionService
+from app.domain.services.response_generator import ResponseGenerator
+from app.domain.services.retriever import DocumentRetriever
+from app.domain.services.session_manager import SessionManager
+from app.domain.services.intent_router import AnalyticsIntentRouter
+from app.domain.services.vector_store import VectorStore
+from app.infrastructure.analytics.analytics_store import AnalyticsStore
+from app.infrastructure.cache.answer_cache import SemanticAnswerCache
+from app.infrastructure.cache.embedding_cache import EmbeddingCache
+from app.infrastructure.lexical.bm25_index import BM25Index
+from app.infrastructure.locks.ingestion_guard import IngestionGuard
+from app.infrastructure.local.vector_index import LocalVectorStore
+from app.infrastructure.qdrant.store import QdrantVectorStore
+from app.infrastructure.registry.repo_registry import RepoRegistry
+from app.infrastructure.sentence_transformers.embedding_client import SentenceTransformersEmbeddingClient
+
+
+def create_vector_store() -> VectorStore:
+    """
+    Builds the vector store selected by settings.VECTOR_STORE_BACKEND ("qdrant" or "local").
+    """
+    if settings.VECTOR_STORE_BACKEND == "local":
+        return LocalVectorStore()
+    if settings.VECTOR_STORE_BACKEND == "qdrant":
+        return QdrantVectorStore()
+    raise ValueError(f"Unknown vector store backend: {settings.VECTOR_STORE_BACKEND}")
+
+
+class ServiceContainer:
+    """
+    Process-wide holder for the heavy services used by the chat pipeline.
+
+    The embedding model, the Qdrant client and the Redis connection pool are
+    created once at startup and shared by the REST endpoints, the
+    ChatRequestProcessor and the chat worker.
+    """
+
+    def __init__(self):
+        self.embedding_client = None
+        self.embedding_cache = None
+        self.embedding_service = None
+        self.vector_store = None
+        self.lexical_index = None
+        self.analytics_store = None
+        self.repo_registry = None
+        self.intent_router = None
+        self.retriever = None
+        self.session_manager = None
+        self.answer_cache = None
+        self.response_generator = None
+        self.document_processor = None
+        self.ingestion_service = None
+        self.ingestion_guard = None
+        self.ingestion_jobs = None
+        self.chat_processor = None
+
+    @property
+    def is_initialized(self) -> bool:
+        return self.chat_processor is not None
+
+    def initialize(self) -> "ServiceContainer":
+        """
+        Build every service exactly once. Calling it again is a no-op.
+
+        Returns:
+            ServiceContainer: The initialized container.
+        """
+        if self.is_initialized:
+            return self
+
+        self.embedding_client = SentenceTransformersEmbeddingClient()
+        if settings.EMBEDDING_CACHE_ENABLED:
+            self.embedding_cache = EmbeddingCache(settings.MODEL_NAME_EMBEDDING)
+        self.embedding_service = EmbeddingService(self.embedding_client, self.embedding_cache)
+        self.vector_store = create_vector_store()
+        if settings.HYBRID_RETRIEVAL_ENABLED:
+            self.lexical_index = BM25Index()
+        if settings.ANALYTICS_ENABLED:
+            self.analytics_store = AnalyticsStore()
+            self.intent_router = AnalyticsIntentRouter(self.analytics_store)
+        self.retriever = DocumentRetriever(self.vector_store, self.lexical_index)
+        self.session_manager = SessionManager()
+        if settings.SEMANTIC_CACHE_ENABLED:
+            self.answer_cache = SemanticAnswerCache()
+        self.response_generator = ResponseGenerator(self.session_manager)
+        self.document_processor = DocumentProcessor()
+        self.repo_registry = RepoRegistry()
+        self.repo_registry.migrate(self.vector_store)
+        self.ingestion_service = IngestionService(
+            self.document_processor,
+            self.embedding_service,
+            self.vector_store,
+            lexical_index=self.lexical_index,
+            analytics_store=self.analytics_store,
+            repo_registry=self.repo_registry,
+        )
+        self.ingestion_guard = IngestionGuard()
+        self.ingestion_jobs = IngestionJobManager(
+            self.ingestion_service, self.answer_cache, self.ingestion_guard, self.repo_registry
+        )
+        self.chat_processor = ChatRequestProcessor(
+            ingestion_service=self.ingestion_service,
+            embedding_service=self.embedding_service,
+            vector_store=self.vector_store,
+            retriever=self.retriever,
+            response_generator=self.response_generator,
+            session_manager=self.session_manager,
+            answer_cache=self.answer_cache,
+            intent_router=self.intent_router,
+            ingestion_guard=self.ingestion_guard,
+            ingestion_jobs=self.ingestion_jobs,
+            repo_registry=self.repo_registry,
+        )
+
+        self.warm_up()
+        logging.info("Service container initialized.")
+        return self
+
+    def warm_up(self) -> None:
+        """
+        Run a throwaway encode so the first real request does not pay for lazy
+        model initialization (CUDA context, tokenizer caches, etc.).
+        """
+        try:
+            self.embedding_client.embed("warm-up")
+        except Exception as e:
+            logging.warning(f"Embedding model warm-up failed: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Collects the runtime counters exposed by the shared services.
+        """
+        metrics = {}
+        if self.embedding_cache is not None:
+            metrics["embedding_cache"] = self.embedding_cache.get_stats()
+        if self.intent_router is not None:
+            metrics["analytics_router"] = self.intent_router.get_stats()
+        if self.answer_cache is not None:
+            metrics["answer_cache"] = self.answer_cache.get_stats()
+        return metrics
+
+    async def shutdown(self) -> None:
+        if self.ingestion_jobs is not None:
+            await self.ingestion_jobs.shutdown()
+        if self.embedding_client is not None:
+            self.embedding_client.close()
+        if self.embedding_cache is not None:
+            self.embedding_cache.close()
+        if self.session_manager is not None:
+            await self.session_manager.close()
+        if self.answer_cache is not None:
+            await self.answer_cache.close()
+        if self.ingestion_guard is not None:
+            await self.ingestion_guard.close()
+        if self.vector_store is not None:
+            self.vector_store.close()
+        if self.lexical_index is not None:
+            self.lexical_index.close()
+        if self.analytics_store is not None:
+            self.analytics_store.close()
+        if self.repo_registry is not None:
+            self.repo_registry.close()
+
+        self.__init__()
+        logging.info("Service container shut down.")
+
+
+container = ServiceContainer()
@@ -0,0 +1,8 @@
+from typing import Any, Dict
+
+from pydantic import BaseModel, Field
+
+
+class Chunk(BaseModel):
+    text: str
+    metadata: Dict[str, Any] = Field(default_factory=dict)
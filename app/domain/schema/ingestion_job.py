@@ -0,0 +1,66 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from pydantic import BaseModel, Field
+
+INGESTION_STAGES = ("clone", "mine", "fetch_issues", "convert", "chunk", "embed", "upsert")
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class StageProgress(BaseModel):
+    status: str = "pending"
+    processed: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    throughput: Optional[float] = None
+
+    def _update_throughput(self) -> None:
+        elapsed = ((self.finished_at or _now()) - self.started_at).total_seconds()
+        self.throughput = round(self.processed / elapsed, 2) if elapsed > 0 else None
+
+
+class IngestionJob(BaseModel):
+    """
+    State of one background clone/sync + indexing run, as reported by the job status endpoint.
+    Every stage reports how many items it has processed and its items-per-second throughput;
+    chunk, embed and upsert run pipelined, so they are in progress at the same time.
+    """
+
+    job_id: str
+    repo_url: str
+    status: str = "queued"
+    reindex: bool = False
+    stages: Dict[str, StageProgress] = Field(default_factory=lambda: {stage: StageProgress() for stage in INGESTION_STAGES})
+    created_at: datetime = Field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    result: Dict[str, Any] = Field(default_factory=dict)
+    error: Optional[str] = None
+
+    def start(self, stage: str) -> None:
+        progress = self.stages[stage]
+        if progress.status == "pending":
+            progress.status = "running"
+            progress.started_at = _now()
+
+    def advance(self, stage: str, count: int = 1) -> None:
+        self.start(stage)
+        progress = self.stages[stage]
+        progress.processed += count
+        progress._update_throughput()
+
+    def finish(self, stage: str, processed: Optional[int] = None) -> None:
+        self.start(stage)
+        progress = self.stages[stage]
+        if processed is not None:
+            progress.processed = processed
+        progress.status = "completed"
+        progress.finished_at = _now()
+        progress._update_throughput()
+
+    def skip(self, stage: str) -> None:
+        if self.stages[stage].status == "pending":
+            self.stages[stage].status = "skipped"
@@ -1,12 +1,14 @@
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class QueryRequest(BaseModel):
     repo_url: Optional[str]
     question: Optional[str]
     user_id: Optional[str]
+    filters: Optional[Dict[str, Any]] = None
+    stream: bool = False
 
     class Config:
         populate_by_name = True
@@ -14,7 +16,10 @@ class QueryRequest(BaseModel):
 
 class QueryResponse(BaseModel):
     text: str
+    score: Optional[float] = None
+    metadata: Dict[str, Any] = Field(default_factory=dict)
 
 class RepoRequest(BaseModel):
     repo_url: str
-    github_token: str
\ No newline at end of file
+    github_token: str
+    reindex: bool = False
\ No newline at end of file
@@ -0,0 +1,24 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class RepoRecord(BaseModel):
+    repo: str
+    repo_url: str
+    local_path: Optional[str] = None
+    head_commit: Optional[str] = None
+    downloaded_at: Optional[str] = None
+    indexed_commit: Optional[str] = None
+    indexed_at: Optional[str] = None
+    chunk_count: int = 0
+    embedding_model: Optional[str] = None
+    index_version: Optional[int] = None
+
+    @property
+    def is_downloaded(self) -> bool:
+        return self.downloaded_at is not None
+
+    @property
+    def is_indexed(self) -> bool:
+        return self.indexed_at is not None
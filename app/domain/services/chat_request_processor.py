@@ -1,61 +1,229 @@
+import asyncio
 import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
 from app.domain.schema.chat_response import ChatResponseSchema, AnswerAndQuestionSchema
-from app.domain.schema.query import QueryRequest
-from app.domain.services.document_processor import DocumentProcessor
+from app.core.config import settings
+from app.domain.schema.query import QueryRequest, QueryResponse
 from app.domain.services.embedding_service import EmbeddingService
+from app.domain.services.ingestion_jobs import IngestionJobManager
+from app.domain.services.ingestion_service import IngestionService
+from app.domain.services.intent_router import AnalyticsIntentRouter
 from app.domain.services.response_generator import ResponseGenerator
 from app.domain.services.retriever import DocumentRetriever
 from app.domain.services.session_manager import SessionManager
-from app.infrastructure.qdrant.store import QdrantVectorStore
-from app.infrastructure.sentence_transformers.embedding_client import SentenceTransformersEmbeddingClient
-from app.utils.helpers import is_repo_downloaded
+from app.domain.services.vector_store import VectorStore
+from app.infrastructure.cache.answer_cache import SemanticAnswerCache
+from app.infrastructure.locks.ingestion_guard import IngestionGuard
+from app.infrastructure.registry.repo_registry import RepoRegistry
+from app.utils.helpers import is_repo_downloaded, get_repo_dir, get_repository_data_path
 
 
 class ChatRequestProcessor:
-    def __init__(self):
-        self.document_processor = DocumentProcessor()
-        self.embedding_service = EmbeddingService(SentenceTransformersEmbeddingClient())
-        self.vector_store = QdrantVectorStore()
-        self.retriever = DocumentRetriever(self.vector_store)
-        self.response_generator = ResponseGenerator()
-        self.session_manager = SessionManager()
+    def __init__(
+        self,
+        ingestion_service: IngestionService,
+        embedding_service: EmbeddingService,
+        vector_store: VectorStore,
+        retriever: DocumentRetriever,
+        response_generator: ResponseGenerator,
+        session_manager: SessionManager,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        intent_router: Optional[AnalyticsIntentRouter] = None,
+        ingestion_guard: Optional[IngestionGuard] = None,
+        ingestion_jobs: Optional[IngestionJobManager] = None,
+        repo_registry: Optional[RepoRegistry] = None,
+    ):
+        self.ingestion_service = ingestion_service
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.retriever = retriever
+        self.response_generator = response_generator
+        self.session_manager = session_manager
+        self.answer_cache = answer_cache
+        self.intent_router = intent_router
+        self.ingestion_guard = ingestion_guard
+        self.ingestion_jobs = ingestion_jobs
+        self.repo_registry = repo_registry
+        self._analytics_checked: Set[str] = set()
+
+    def _is_downloaded(self, repo_url: str) -> bool:
+        if self.repo_registry is None:
+            return is_repo_downloaded(repo_url)
+        record = self.repo_registry.get(repo_url)
+        return record is not None and record.is_downloaded
+
+    def _needs_ingestion(self, repo_url: str) -> bool:
+        if self.repo_registry is None:
+            return is_repo_downloaded(repo_url) and not self.vector_store.is_repo_processed(repo_url)
+        record = self.repo_registry.get(repo_url)
+        return record is not None and self.repo_registry.needs_indexing(record)
+
+    async def _ingest_if_needed(self, repo_url: str) -> int:
+        if not await asyncio.to_thread(self._needs_ingestion, repo_url):
+            return 0
+        repo_dir = get_repo_dir(repo_url) if settings.SOURCE_INDEXING_ENABLED else None
+        record = self.repo_registry.get(repo_url) if self.repo_registry is not None else None
+        ingest = (
+            self.ingestion_service.reindex_repo
+            if record is not None and self.repo_registry.is_stale(record)
+            else self.ingestion_service.ingest_repository_data
+        )
+        indexed = await asyncio.to_thread(ingest, repo_url, get_repository_data_path(repo_url), repo_dir=repo_dir)
+        if self.answer_cache is not None:
+            await self.answer_cache.invalidate(repo_url)
+        return indexed
+
+    async def _ensure_indexed(self, repo_url: str) -> None:
+        """
+        Indexes a downloaded repository on first use. Concurrent requests share one
+        ingestion: they join a running /extract job, an in-flight ingestion in this
+        process, or wait on the distributed lock held by another process.
+        """
+        if self.ingestion_jobs is not None:
+            job = self.ingestion_jobs.active_job(repo_url)
+            if job is not None:
+                await self.ingestion_jobs.wait(job.job_id)
+
+        if self.ingestion_guard is None:
+            await self._ingest_if_needed(repo_url)
+        else:
+            needs_ingestion, locked = await asyncio.gather(
+                asyncio.to_thread(self._needs_ingestion, repo_url),
+                self.ingestion_guard.is_locked(repo_url),
+            )
+            if needs_ingestion or locked:
+                await self.ingestion_guard.run(repo_url, lambda: self._ingest_if_needed(repo_url))
+
+        if self.intent_router is not None and repo_url not in self._analytics_checked:
+            self._analytics_checked.add(repo_url)
+            if await asyncio.to_thread(self._is_downloaded, repo_url):
+                await asyncio.to_thread(
+                    self.ingestion_service.ensure_analytics, repo_url, get_repository_data_path(repo_url)
+                )
+
+    async def _route_to_analytics(self, request: QueryRequest) -> Optional[str]:
+        if self.intent_router is None or request.filters:
+            return None
+        return await asyncio.to_thread(self.intent_router.answer, request.repo_url, request.question)
+
+    def _retrieve_context(self, request: QueryRequest, query_embedding: List[float]) -> List[QueryResponse]:
+        return self.retriever.retrieve(
+            request.repo_url,
+            query_embedding,
+            top_k=settings.CONTEXT_CANDIDATE_DOCUMENTS,
+            payload_filter=request.filters,
+            query_text=request.question,
+        )
+
+    async def _lookup_cached_answer(
+        self, request: QueryRequest, query_embedding: List[float]
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Returns a cached answer (or None) and the index version to cache a new answer under.
+        Filtered requests bypass the cache, since their context differs from the unfiltered one.
+        """
+        if self.answer_cache is None or request.filters:
+            return None, None
+        try:
+            return await self.answer_cache.lookup(request.repo_url, query_embedding)
+        except Exception as e:
+            logging.warning(f"Semantic cache lookup failed: {e}")
+            return None, None
+
+    async def _store_answer(
+        self, request: QueryRequest, version: Optional[int], query_embedding: List[float], answer: str
+    ) -> None:
+        if version is None:
+            return
+        try:
+            await self.answer_cache.store(request.repo_url, version, request.question, query_embedding, answer)
+        except Exception as e:
+            logging.warning(f"Semantic cache store failed: {e}")
+
+    async def _record_answer(self, request: QueryRequest, answer: str) -> List[Dict[str, str]]:
+        await self.session_manager.add_message(request.user_id, "user", request.question)
+        return await self.session_manager.append_and_get_history(request.user_id, "assistant", answer)
+
+    @staticmethod
+    def _format_history(chat_history: List[Dict[str, str]]) -> List[AnswerAndQuestionSchema]:
+        """
+        Pairs each user message with the assistant message right after it. A question
+        left without an answer (failed or interrupted generation) is skipped instead of
+        shifting every later pair.
+        """
+        return [
+            AnswerAndQuestionSchema(question=msg["content"], answer=next_msg["content"])
+            for msg, next_msg in zip(chat_history, chat_history[1:])
+            if msg["role"] == "user" and next_msg["role"] == "assistant"
+        ]
 
     async def process(self, request: QueryRequest) -> ChatResponseSchema:
         try:
-            if not self.session_manager.get_history(request.user_id):
-                self.session_manager.create_session(request.user_id)
-                logging.info(f"New session created for user_id: {request.user_id}")
+            await self._ensure_indexed(request.repo_url)
+
+            direct_answer = await self._route_to_analytics(request)
+            if direct_answer is not None:
+                chat_history = await self._record_answer(request, direct_answer)
+                return ChatResponseSchema(chat_history=self._format_history(chat_history))
 
-            repo_data = self._read_repository_data()
-            if not is_repo_downloaded(request.repo_url):
-                self._process_and_store_repository(request.repo_url, repo_data)
+            query_embedding = await asyncio.to_thread(self.embedding_service.embed_query, request.question)
 
-            query_embedding = self.embedding_service.embedding_client.embed(request.question)
-            relevant_docs = self.retriever.retrieve_relevant_documents(request.repo_url, query_embedding)
-            relevant_docs = " ".join(relevant_docs)
+            cached_answer, version = await self._lookup_cached_answer(request, query_embedding)
+            if cached_answer is not None:
+                chat_history = await self._record_answer(request, cached_answer)
+                return ChatResponseSchema(chat_history=self._format_history(chat_history))
+
+            relevant_docs = await asyncio.to_thread(self._retrieve_context, request, query_embedding)
 
             chat_history = await self.response_generator.generate_response(
                 request.user_id, request.question, relevant_docs
             )
 
-            formatted_history = [
-                AnswerAndQuestionSchema(question=msg["content"], answer=next_msg["content"])
-                for msg, next_msg in zip(chat_history[::2], chat_history[1::2])
-                if msg["role"] == "user" and next_msg["role"] == "assistant"
-            ]
+            if chat_history and chat_history[-1]["role"] == "assistant":
+                await self._store_answer(request, version, query_embedding, chat_history[-1]["content"])
 
-            return ChatResponseSchema(chat_history=formatted_history)
+            return ChatResponseSchema(chat_history=self._format_history(chat_history))
 
         except Exception as e:
             logging.error(f"Error processing chat request: {e}")
             return ChatResponseSchema(chat_history=[])
 
-    @staticmethod
-    def _read_repository_data() -> str:
-        with open("/home/logan/TEES/repo-insight-bot/data/phishing-quest-api/repository_data.txt", "r") as file:
-            return file.read()
-
-    def _process_and_store_repository(self, repo_url: str, repo_data: str):
-        chunks = self.document_processor.process_repository_data(repo_data)
-        chunk_embeddings = self.embedding_service.generate_embeddings(chunks)
-        self.vector_store.save(repo_url=repo_url, chunks=chunks, chunk_embeddings=chunk_embeddings)
+    async def stream(self, request: QueryRequest) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Answers a chat request as a sequence of events: one {"type": "token"} event per
+        piece of the answer as the model produces it, then a {"type": "done"} event with
+        the updated chat history, or a single {"type": "error"} event on failure.
+        Answers from the analytics store or the semantic cache are sent as a single token event.
+        """
+        try:
+            await self._ensure_indexed(request.repo_url)
+
+            direct_answer = await self._route_to_analytics(request)
+            if direct_answer is not None:
+                cached_answer, version = direct_answer, None
+            else:
+                query_embedding = await asyncio.to_thread(self.embedding_service.embed_query, request.question)
+                cached_answer, version = await self._lookup_cached_answer(request, query_embedding)
+
+            if cached_answer is not None:
+                yield {"type": "token", "content": cached_answer}
+                chat_history = await self._record_answer(request, cached_answer)
+            else:
+                relevant_docs = await asyncio.to_thread(self._retrieve_context, request, query_embedding)
+
+                tokens = []
+                async for token in self.response_generator.stream_response(
+                    request.user_id, request.question, relevant_docs
+                ):
+                    tokens.append(token)
+                    yield {"type": "token", "content": token}
+
+                await self._store_answer(request, version, query_embedding, "".join(tokens))
+                chat_history = await self.session_manager.get_history(request.user_id)
+
+            response = ChatResponseSchema(chat_history=self._format_history(chat_history))
+            yield {"type": "done", **response.model_dump()}
+
+        except Exception as e:
+            logging.error(f"Error streaming chat request: {e}")
+            yield {"type": "error", "detail": str(e)}
@@ -0,0 +1,136 @@
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.domain.schema.query import QueryResponse
+from app.utils.helpers import estimate_tokens
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class ContextBudgeter:
+    """
+    Assembles the variable part of the prompt (conversation history and retrieved
+    context) so that, together with the fixed system prompt and the reserved answer
+    tokens, it never exceeds settings.PROMPT_TOKEN_BUDGET.
+
+    History may take up to settings.PROMPT_HISTORY_SHARE of what is left; older turns
+    that do not fit are folded into a one-line summary of the questions asked. The
+    rest goes to retrieved chunks in decreasing score order, skipping near-duplicates
+    (overlapping windows of the same text) and truncating the last chunk that only
+    partially fits.
+    """
+
+    def __init__(
+        self,
+        token_budget: Optional[int] = None,
+        response_reserve: Optional[int] = None,
+        history_share: Optional[float] = None,
+    ):
+        self.token_budget = token_budget or settings.PROMPT_TOKEN_BUDGET
+        self.response_reserve = response_reserve or settings.PROMPT_RESPONSE_RESERVE
+        self.history_share = history_share if history_share is not None else settings.PROMPT_HISTORY_SHARE
+
+    @staticmethod
+    def _shingles(text: str) -> Set[Tuple[str, ...]]:
+        words = _WORD_RE.findall(text.lower())
+        return {tuple(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+
+    @staticmethod
+    def _truncate(text: str, max_tokens: int) -> str:
+        max_chars = max_tokens * settings.PROMPT_CHARS_PER_TOKEN
+        if len(text) <= max_chars:
+            return text
+        cut = text.rfind("\n", 0, max_chars)
+        if cut < max_chars // 2:
+            cut = text.rfind(" ", 0, max_chars)
+        return text[:cut if cut > 0 else max_chars].rstrip() + " …"
+
+    def _summarize(self, dropped: List[Dict[str, str]], max_tokens: int) -> Optional[Dict[str, str]]:
+        questions = [message["content"].strip() for message in reversed(dropped) if message["role"] == "user"]
+        if not questions:
+            return None
+        summary = "Earlier in this conversation the user asked (most recent first): " + " | ".join(questions)
+        return {"role": "system", "content": self._truncate(summary, max_tokens)}
+
+    def fit_history(self, history: List[Dict[str, str]], budget: int) -> List[Dict[str, str]]:
+        """
+        Keeps the newest messages that fit `budget` tokens, dropping the oldest in
+        question/answer pairs. The last message (the current question) is always kept.
+        """
+        if not history:
+            return []
+
+        kept = [history[-1]]
+        used = estimate_tokens(history[-1]["content"])
+        start = len(history) - 1
+        while start >= 2:
+            pair = history[start - 2:start]
+            cost = sum(estimate_tokens(message["content"]) for message in pair)
+            if used + cost > budget:
+                break
+            kept[:0] = pair
+            used += cost
+            start -= 2
+
+        summary_budget = min(budget - used, settings.PROMPT_HISTORY_SUMMARY_TOKENS)
+        if start > 0 and summary_budget >= settings.PROMPT_MIN_CHUNK_TOKENS // 2:
+            summary = self._summarize(history[:start], summary_budget - 1)
+            if summary is not None:
+                kept.insert(0, summary)
+        return kept
+
+    def fit_documents(self, documents: List[QueryResponse], budget: int) -> List[str]:
+        """
+        Picks the highest-scoring, non-overlapping chunks that fit `budget` tokens.
+        """
+        ranked = sorted(documents, key=lambda doc: doc.score if doc.score is not None else 0.0, reverse=True)
+        selected: List[str] = []
+        selected_shingles: List[Set[Tuple[str, ...]]] = []
+        remaining = budget
+
+        for document in ranked:
+            text = document.text.strip()
+            if not text:
+                continue
+
+            shingles = self._shingles(text)
+            if any(
+                len(shingles & other) / min(len(shingles), len(other)) >= settings.PROMPT_CHUNK_DEDUP_THRESHOLD
+                for other in selected_shingles
+            ):
+                continue
+
+            cost = estimate_tokens(text)
+            if cost > remaining:
+                if remaining < settings.PROMPT_MIN_CHUNK_TOKENS:
+                    continue
+                text = self._truncate(text, remaining)
+                cost = remaining
+
+            selected.append(text)
+            selected_shingles.append(shingles)
+            remaining -= cost
+
+        return selected
+
+    def pack(
+        self, system_prompt: str, history: List[Dict[str, str]], documents: List[QueryResponse]
+    ) -> Tuple[List[Dict[str, str]], str]:
+        """
+        Splits the prompt budget between history and retrieved context.
+
+        Args:
+            system_prompt (str): The fixed instructions sent with every prompt.
+            history (List[Dict[str, str]]): The session history, ending with the current question.
+            documents (List[QueryResponse]): The retrieved chunks with their scores.
+
+        Returns:
+            Tuple[List[Dict[str, str]], str]: The history to send and the context text.
+        """
+        available = self.token_budget - self.response_reserve - estimate_tokens(system_prompt)
+        history = self.fit_history(history, int(max(available, 0) * self.history_share))
+        available -= sum(estimate_tokens(message["content"]) for message in history)
+
+        context = self.fit_documents(documents, max(available, 0))
+        return history, "\n\n".join(context)
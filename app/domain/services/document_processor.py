@@ -1,9 +1,20 @@
+import ast
 import json
 import logging
+import re
 import traceback
 from datetime import datetime
-from typing import Any, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from app.core.config import settings
+from app.domain.schema.chunk import Chunk
+from app.utils.repository_data import iter_metadata_records
+
+DEFINITION = re.compile(
+    r"^(?:export\s+)?(?:default\s+)?(?:(?:public|private|protected|internal|static|abstract|final|async|"
+    r"unsafe|override|open|sealed|data|pub(?:\([\w:]+\))?)\s+)*"
+    r"(?:def|class|function|func|fn|interface|struct|enum|trait|impl|module|object|sub|type)\b\s*\*?\s*(?P<name>[\w.$]*)"
+)
+
 
 class CustomJSONEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -13,14 +24,235 @@ class CustomJSONEncoder(json.JSONEncoder):
 
 class DocumentProcessor:
     @staticmethod
-    def _create_chunks(data: str) -> List[str]:
-        return [data[i:i + settings.CHUNK_SIZE] for i in range(0, len(data), settings.CHUNK_SIZE)]
+    def _windows(text: str, size: Optional[int] = None, overlap: Optional[int] = None) -> Iterator[str]:
+        """
+        Splits text into windows of at most `size` characters where consecutive windows
+        share `overlap` characters. Windows end on a line break when one is available in
+        the second half of the window, so diff hunks are cut between lines.
+        """
+        size = size or settings.CHUNK_SIZE
+        overlap = min(settings.CHUNK_OVERLAP if overlap is None else overlap, size // 2)
+
+        start = 0
+        while start < len(text):
+            end = min(start + size, len(text))
+            if end < len(text):
+                newline = text.rfind("\n", start + size // 2, end)
+                if newline != -1:
+                    end = newline + 1
+            yield text[start:end]
+            if end == len(text):
+                break
+            start = end - overlap
+
+    @staticmethod
+    def _repository_chunk(record: Dict[str, Any]) -> Chunk:
+        text = (
+            f"Repository {record.get('owner')}/{record.get('name')} ({record.get('url')}). "
+            f"Default branch: {record.get('default_branch')}. Archived: {record.get('archived')}. "
+            f"Last updated: {record.get('updated_at')}. Total commits: {record.get('total_commits')}. "
+            f"Total issues: {record.get('total_issues')}. Open issues: {record.get('open_issues_count')}."
+        )
+        return Chunk(text=text, metadata={"kind": "repository", "key": "repository"})
+
+    @staticmethod
+    def _activity_chunks(days: Dict[str, Dict[str, Any]]) -> Iterator[Chunk]:
+        months: Dict[str, List[str]] = {}
+        for date in sorted(days):
+            day = days[date]
+            months.setdefault(date[:7], []).append(
+                f"{date}: {day['total_commits_on_day']} commits, {day['total_issues_on_day']} issues."
+            )
+
+        for month, lines in months.items():
+            for i, window in enumerate(DocumentProcessor._windows("\n".join(lines), overlap=0)):
+                yield Chunk(
+                    text=f"Repository activity per day in {month}:\n{window}",
+                    metadata={"kind": "activity", "key": f"activity:{month}:{i}", "month": month},
+                )
+
+    @staticmethod
+    def _commit_chunks(record: Dict[str, Any]) -> Iterator[Chunk]:
+        commit_hash = record.get("hash")
+        header = f"Commit {commit_hash} by {record.get('author')} on {record.get('date')}"
+        base_metadata = {
+            "hash": commit_hash,
+            "author": record.get("author"),
+            "date": record.get("day"),
+        }
+
+        files = record.get("files", [])
+        summary = "\n".join(
+            f"- {f.get('filename')} ({f.get('changes')}, +{f.get('additions')}/-{f.get('deletions')})"
+            for f in files
+        )
+        body = f"{record.get('message', '').strip()}\nFiles changed:\n{summary}" if files else record.get("message", "")
+
+        for i, window in enumerate(DocumentProcessor._windows(body)):
+            yield Chunk(
+                text=f"{header}\n{window}",
+                metadata={"kind": "commit", "key": f"commit:{commit_hash}:{i}", **base_metadata},
+            )
+
+        for f in files:
+            diff = f.get("diff")
+            if not diff:
+                continue
+            file_header = f"{header}\nFile {f.get('path') or f.get('filename')} ({f.get('changes')}):\n"
+            for i, window in enumerate(DocumentProcessor._windows(diff)):
+                yield Chunk(
+                    text=file_header + window,
+                    metadata={
+                        "kind": "diff",
+                        "key": f"diff:{commit_hash}:{f.get('path') or f.get('filename')}:{i}",
+                        "filename": f.get("filename"),
+                        "path": f.get("path"),
+                        **base_metadata,
+                    },
+                )
+
+    @staticmethod
+    def _issue_chunk(record: Dict[str, Any]) -> Chunk:
+        label = "Pull request" if record.get("is_pull_request") else "Issue"
+        number = record.get("number") or record.get("id")
+        text = (
+            f"{label} #{number}: {record.get('title')} [{record.get('state')}] "
+            f"opened by {record.get('author')} on {record.get('created_at')}, "
+            f"last updated {record.get('updated_at')}."
+        )
+        return Chunk(
+            text=text,
+            metadata={
+                "kind": "issue",
+                "key": f"issue:{record.get('id')}",
+                "issue_id": record.get("id"),
+                "author": record.get("author"),
+                "state": record.get("state"),
+                "date": record.get("day"),
+            },
+        )
+
+    @staticmethod
+    def _code_segments(text: str, language: str) -> List[Tuple[int, Optional[str]]]:
+        """
+        0-based line numbers where a top-level definition starts, with the defined name.
+        Python files are parsed with ast (decorators belong to their definition); other
+        languages, or Python that does not parse, use a regex over unindented lines.
+        """
+        if language == "python":
+            try:
+                tree = ast.parse(text)
+                return [
+                    (min([node.lineno] + [d.lineno for d in node.decorator_list]) - 1, node.name)
+                    for node in tree.body
+                    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))
+                ]
+            except (SyntaxError, ValueError):
+                pass
+
+        starts = []
+        for number, line in enumerate(text.splitlines()):
+            match = DEFINITION.match(line)
+            if match:
+                starts.append((number, match.group("name") or None))
+        return starts
+
+    @staticmethod
+    def _source_chunks(record: Dict[str, Any]) -> Iterator[Chunk]:
+        """
+        Splits a source file at top-level function/class boundaries. Neighbouring small
+        definitions are packed together up to settings.SOURCE_CHUNK_SIZE characters, and a
+        definition longer than that is cut between lines.
+        """
+        path, language = record["path"], record.get("language") or "text"
+        lines = record["text"].splitlines(keepends=True)
+        size = settings.SOURCE_CHUNK_SIZE
+
+        starts = DocumentProcessor._code_segments(record["text"], language)
+        if not starts or starts[0][0] > 0:
+            starts.insert(0, (0, None))
+        segments = [
+            (start, starts[i + 1][0] if i + 1 < len(starts) else len(lines), name)
+            for i, (start, name) in enumerate(starts)
+        ]
+
+        # Line-aligned pieces of at most `size` characters: whole definitions when they fit,
+        # consecutive definitions packed together, long definitions split between lines.
+        pieces: List[Tuple[int, int, List[str]]] = []
+        piece_length = size + 1
+        for start, end, name in segments:
+            segment_length = sum(min(len(line), size) for line in lines[start:end])
+            for number in range(start, end):
+                line_length = min(len(lines[number]), size)
+                new_definition = number == start and name is not None
+                next_length = piece_length + (segment_length if number == start else line_length)
+                if next_length > size and piece_length > 0:
+                    pieces.append((number, number, []))
+                    piece_length = 0
+                first, _, names = pieces[-1]
+                pieces[-1] = (first, number + 1, names + [name] if new_definition else names)
+                piece_length += line_length
+
+        index = 0
+        for first, last, names in pieces:
+            code = "".join(line[:size] for line in lines[first:last])
+            if not code.strip():
+                continue
+            yield Chunk(
+                text=f"File {path} ({language}), lines {first + 1}-{last}:\n{code}",
+                metadata={
+                    "kind": "source",
+                    "key": f"source:{path}:{index}",
+                    "path": path,
+                    "filename": path.rsplit("/", 1)[-1],
+                    "language": language,
+                    "symbols": names,
+                    "start_line": first + 1,
+                    "end_line": last,
+                    "blob": record.get("blob"),
+                },
+            )
+            index += 1
+
+    @staticmethod
+    def iter_chunks(records: Iterable[Dict[str, Any]]) -> Iterator[Chunk]:
+        """
+        Turns repository records into semantically whole chunks: one summary of the
+        repository, per-day activity grouped by month, one chunk per commit message with
+        its file list, overlapping windows over each file diff, and one chunk per issue,
+        and definition-aligned chunks of every "source" record (see iter_source_files).
+        Every chunk carries hash/author/date/filename metadata to be stored as payload,
+        plus a stable "key" so re-ingesting the same data maps onto the same points.
+        When a day appears more than once (incremental syncs), the last totals win.
+
+        :param records: Records as produced by read_repository_records
+        :return: A generator of Chunk objects
+        """
+        days = {}
+
+        for record in records:
+            record_type = record.get("type")
+            if record_type == "repository":
+                yield DocumentProcessor._repository_chunk(record)
+            elif record_type == "day":
+                days[record["date"]] = record
+            elif record_type == "commit":
+                yield from DocumentProcessor._commit_chunks(record)
+            elif record_type == "issue":
+                yield DocumentProcessor._issue_chunk(record)
+            elif record_type == "source":
+                yield from DocumentProcessor._source_chunks(record)
+            else:
+                yield Chunk(text=json.dumps(record, cls=CustomJSONEncoder)[:settings.CHUNK_SIZE])
+
+        if days:
+            yield from DocumentProcessor._activity_chunks(days)
 
     @staticmethod
     def process_repository_data(repo_data: str) -> List[str]:
         """
         Processa os dados de um reposit rio, separando-os em chunks menores para
-        posteriormente serem enviados para o Elasticsearch.
+        posteriormente serem enviados para o banco vetorial.
 
         :param repo_data: Dados do reposit rio em formato de string no formato JSON
         :return: Uma lista de strings, cada uma representando um chunk do dado
@@ -30,9 +262,7 @@ class DocumentProcessor:
         try:
             data = json.loads(repo_data)
 
-            json_data = json.dumps(data, cls=CustomJSONEncoder)
-
-            chunks = DocumentProcessor._create_chunks(json_data)
+            chunks = [chunk.text for chunk in DocumentProcessor.iter_chunks(iter_metadata_records(data))]
 
         except json.JSONDecodeError as e:
             logging.error(f"Erro ao decodificar JSON: {e}")
@@ -41,4 +271,4 @@ class DocumentProcessor:
             logging.error(f"Erro ao processar dado: {e}")
             logging.error(traceback.format_exc())
 
-        return chunks
\ No newline at end of file
+        return chunks
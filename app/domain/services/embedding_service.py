@@ -1,9 +1,63 @@
+from typing import List, Optional
+
+import numpy as np
+
+from app.infrastructure.cache.embedding_cache import EmbeddingCache
 from app.infrastructure.sentence_transformers.embedding_client import SentenceTransformersEmbeddingClient
 
 
 class EmbeddingService:
-    def __init__(self, embedding_client: SentenceTransformersEmbeddingClient):
+    def __init__(self, embedding_client: SentenceTransformersEmbeddingClient, cache: Optional[EmbeddingCache] = None):
         self.embedding_client = embedding_client
+        self.cache = cache
+
+    def generate_embeddings(self, chunks: List[str]) -> np.ndarray:
+        """
+        Encodes all chunks through the batched path of the embedding client. When a cache
+        is configured, only the chunks it does not already hold are encoded.
+
+        Args:
+            chunks (List[str]): The text chunks to encode.
+
+        Returns:
+            np.ndarray: A (len(chunks), dimension) float32 matrix, one row per chunk.
+        """
+        if self.cache is None:
+            return self.embedding_client.embed_batch(chunks)
+
+        cached = self.cache.get_many(chunks)
+        misses = [i for i, vector in enumerate(cached) if vector is None]
+
+        embeddings = np.empty((len(chunks), self.embedding_client.dimension), dtype=np.float32)
+        for i, vector in enumerate(cached):
+            if vector is not None:
+                embeddings[i] = vector
+
+        if misses:
+            missing_texts = [chunks[i] for i in misses]
+            encoded = self.embedding_client.embed_batch(missing_texts)
+            self.cache.put_many(missing_texts, encoded)
+            embeddings[misses] = encoded
+
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        Encodes a single question, going through the cache when one is configured.
+
+        Args:
+            text (str): The question to encode.
+
+        Returns:
+            List[float]: The embedding of the question.
+        """
+        if self.cache is None:
+            return self.embedding_client.embed(text)
+
+        cached = self.cache.get_many([text])[0]
+        if cached is not None:
+            return cached.tolist()
 
-    def generate_embeddings(self, chunks):
-        return [self.embedding_client.embed(chunk) for chunk in chunks]
\ No newline at end of file
+        embedding = self.embedding_client.embed(text)
+        self.cache.put_many([text], np.asarray([embedding], dtype=np.float32))
+        return embedding
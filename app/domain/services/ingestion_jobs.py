@@ -0,0 +1,176 @@
+import asyncio
+import logging
+import os
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.domain.schema.ingestion_job import IngestionJob, INGESTION_STAGES
+from app.domain.services.ingestion_service import IngestionService
+from app.infrastructure.cache.answer_cache import SemanticAnswerCache
+from app.infrastructure.github.github_repo_processor import GitHubRepoProcessor
+from app.infrastructure.locks.ingestion_guard import IngestionGuard
+from app.infrastructure.registry.repo_registry import RepoRegistry
+from app.utils.helpers import extract_repo_name_and_owner, get_repo_dir
+
+
+class IngestionJobManager:
+    """
+    Runs clone/sync + indexing of repositories as background jobs.
+
+    `submit` returns immediately with a job id; a request for a repository that already
+    has a queued or running job returns that job instead of starting another one. At
+    most settings.INGESTION_MAX_CONCURRENT_JOBS jobs run at a time, and the last
+    settings.INGESTION_JOB_HISTORY jobs are kept for the status endpoint.
+    """
+
+    def __init__(
+        self,
+        ingestion_service: IngestionService,
+        answer_cache: Optional[SemanticAnswerCache] = None,
+        ingestion_guard: Optional[IngestionGuard] = None,
+        repo_registry: Optional[RepoRegistry] = None,
+        max_concurrent_jobs: Optional[int] = None,
+    ):
+        self.ingestion_service = ingestion_service
+        self.answer_cache = answer_cache
+        self.ingestion_guard = ingestion_guard
+        self.repo_registry = repo_registry
+        self._semaphore = asyncio.Semaphore(max_concurrent_jobs or settings.INGESTION_MAX_CONCURRENT_JOBS)
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._active: Dict[str, str] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @staticmethod
+    def _repo_key(repo_url: str) -> str:
+        return extract_repo_name_and_owner(repo_url).lower()
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        return self._jobs.get(job_id)
+
+    def active_job(self, repo_url: str) -> Optional[IngestionJob]:
+        job_id = self._active.get(self._repo_key(repo_url))
+        return self._jobs.get(job_id) if job_id else None
+
+    def submit(self, repo_url: str, github_token: Optional[str] = None, reindex: bool = False) -> IngestionJob:
+        """
+        Starts a clone/sync + indexing job for a repository, or joins the one already in progress.
+
+        Args:
+            repo_url (str): The repository to ingest.
+            github_token (Optional[str]): Token for the GitHub API.
+            reindex (bool): Drop the existing index and rebuild it from the full repository data.
+
+        Returns:
+            IngestionJob: The new or already running job.
+        """
+        running = self.active_job(repo_url)
+        if running is not None:
+            logging.info(f"Joining ingestion job {running.job_id} for {repo_url}")
+            return running
+
+        job = IngestionJob(job_id=uuid.uuid4().hex, repo_url=repo_url, reindex=reindex)
+        self._jobs[job.job_id] = job
+        self._active[self._repo_key(repo_url)] = job.job_id
+        self._tasks[job.job_id] = asyncio.create_task(self._run(job, github_token))
+
+        while len(self._jobs) > settings.INGESTION_JOB_HISTORY:
+            oldest_id, oldest = next(iter(self._jobs.items()))
+            if oldest.status in ("queued", "running"):
+                break
+            self._jobs.pop(oldest_id)
+        return job
+
+    def _is_indexed(self, repo_url: str) -> bool:
+        if self.repo_registry is None:
+            return self.ingestion_service.vector_store.is_repo_processed(repo_url)
+        record = self.repo_registry.get(repo_url)
+        return record is not None and record.is_indexed
+
+    def _needs_rebuild(self, job: IngestionJob) -> bool:
+        if job.reindex:
+            return True
+        record = self.repo_registry.get(job.repo_url) if self.repo_registry is not None else None
+        return record is not None and self.repo_registry.is_stale(record)
+
+    def _select_data_file(self, job: IngestionJob, status: str) -> Optional[str]:
+        repo_url = job.repo_url
+        processed = self._is_indexed(repo_url)
+        if status == "updated" and processed:
+            return os.path.join(get_repo_dir(repo_url), settings.REPOSITORY_DELTA_FILE)
+        if status == "success" or not processed:
+            return os.path.join(get_repo_dir(repo_url), settings.REPOSITORY_DATA_FILE)
+        return None
+
+    async def _index(self, job: IngestionJob, status: str) -> int:
+        repo_dir = get_repo_dir(job.repo_url) if settings.SOURCE_INDEXING_ENABLED else None
+        if await asyncio.to_thread(self._needs_rebuild, job):
+            return await asyncio.to_thread(
+                self.ingestion_service.reindex_repo,
+                job.repo_url,
+                os.path.join(get_repo_dir(job.repo_url), settings.REPOSITORY_DATA_FILE),
+                progress=job,
+                repo_dir=repo_dir,
+            )
+
+        data_path = await asyncio.to_thread(self._select_data_file, job, status)
+        if data_path is None or not os.path.exists(data_path):
+            return 0
+        return await asyncio.to_thread(
+            self.ingestion_service.ingest_repository_data, job.repo_url, data_path, progress=job, repo_dir=repo_dir
+        )
+
+    async def _run(self, job: IngestionJob, github_token: Optional[str]) -> None:
+        async with self._semaphore:
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+            processor = GitHubRepoProcessor(github_token=github_token, local_path=settings.DATA_DIR)
+
+            try:
+                response = await processor.clone_repo(job.repo_url, progress=job)
+                job.result["repository"] = response
+                if response["status"] == "error":
+                    raise RuntimeError(response.get("detail") or response["message"])
+                if self.repo_registry is not None:
+                    await asyncio.to_thread(self.repo_registry.mark_downloaded, job.repo_url, get_repo_dir(job.repo_url))
+
+                if self.ingestion_guard is not None:
+                    async with self.ingestion_guard.lock(job.repo_url):
+                        indexed = await self._index(job, response["status"])
+                else:
+                    indexed = await self._index(job, response["status"])
+                job.result["indexed_chunks"] = indexed
+
+                if indexed and self.answer_cache is not None:
+                    await self.answer_cache.invalidate(job.repo_url)
+
+                for stage in INGESTION_STAGES:
+                    job.skip(stage)
+                job.status = "completed"
+            except asyncio.CancelledError:
+                job.status = "failed"
+                job.error = "cancelled"
+                raise
+            except Exception as e:
+                logging.exception(f"Ingestion job {job.job_id} for {job.repo_url} failed: {e}")
+                job.status = "failed"
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.now(timezone.utc)
+                self._active.pop(self._repo_key(job.repo_url), None)
+                self._tasks.pop(job.job_id, None)
+                await processor.close()
+
+    async def wait(self, job_id: str) -> Optional[IngestionJob]:
+        task = self._tasks.get(job_id)
+        if task is not None:
+            await asyncio.shield(task)
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
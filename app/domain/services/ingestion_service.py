@@ -0,0 +1,247 @@
+import logging
+import time
+from itertools import chain
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.domain.schema.chunk import Chunk
+from app.domain.schema.ingestion_job import IngestionJob
+from app.domain.services.document_processor import DocumentProcessor
+from app.domain.services.embedding_service import EmbeddingService
+from app.domain.services.vector_store import VectorStore
+from app.infrastructure.analytics.analytics_store import AnalyticsStore
+from app.infrastructure.github.source_tree import head_blobs, iter_source_files
+from app.infrastructure.lexical.bm25_index import BM25Index
+from app.infrastructure.registry.repo_registry import RepoRegistry
+from app.utils.helpers import batched, content_hash, make_point_id
+from app.utils.repository_data import read_repository_records
+
+
+class IngestionService:
+    def __init__(
+        self,
+        document_processor: DocumentProcessor,
+        embedding_service: EmbeddingService,
+        vector_store: VectorStore,
+        lexical_index: Optional[BM25Index] = None,
+        analytics_store: Optional[AnalyticsStore] = None,
+        repo_registry: Optional[RepoRegistry] = None,
+    ):
+        self.document_processor = document_processor
+        self.embedding_service = embedding_service
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self.analytics_store = analytics_store
+        self.repo_registry = repo_registry
+
+    def ingest_repository_data(
+        self,
+        repo_url: str,
+        data_path: str,
+        batch_size: Optional[int] = None,
+        progress: Optional[IngestionJob] = None,
+        repo_dir: Optional[str] = None,
+    ) -> int:
+        """
+        Streams a repository_data file, and optionally the source tree of the clone, into the vector store.
+
+        Records are read line by line and chunked lazily, and each batch of chunks is
+        embedded and then handed to a background thread for upserting while the next
+        batch is chunked and embedded. At most one batch waits for upload, so peak memory
+        is bounded by the batch size rather than by the size of the repository.
+
+        Point ids are derived from the repository and the chunk key, and the content hash
+        of each chunk is stored in its payload: chunks whose hash is already stored are
+        neither re-embedded nor re-uploaded, and changed chunks overwrite their old point.
+        Before the source tree is indexed, the chunks of files that changed or no longer
+        exist at HEAD are deleted by path, so a file that shrank leaves no stale chunks.
+
+        Args:
+            repo_url (str): The URL of the repository.
+            data_path (str): Path to the repository_data (or repository_delta) file.
+            batch_size (Optional[int]): Chunks per embed/upsert round. Defaults to settings.INGEST_BATCH_SIZE.
+            progress (Optional[IngestionJob]): Job whose chunk/embed/upsert stages are advanced.
+            repo_dir (Optional[str]): Local clone whose files at HEAD are indexed after the records.
+
+        Returns:
+            int: The number of chunks embedded and stored.
+        """
+        batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        started_at = time.perf_counter()
+        stored = skipped = 0
+        backfill_lexical = self.lexical_index is not None and not self.lexical_index.is_repo_indexed(repo_url)
+
+        records = read_repository_records(data_path)
+        if self.analytics_store is not None:
+            records = self.analytics_store.tap(repo_url, records)
+        if repo_dir is not None:
+            self._delete_stale_sources(repo_url, repo_dir)
+            records = chain(records, iter_source_files(repo_dir))
+
+        chunks = self.document_processor.iter_chunks(records)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert") as uploader:
+            pending: Optional[Future] = None
+            for batch in batched(chunks, batch_size):
+                if progress is not None:
+                    progress.advance("chunk", len(batch))
+
+                prepared = self._prepare_batch(repo_url, batch, backfill_lexical, progress)
+
+                if pending is not None:
+                    pending.result()
+                    pending = None
+                if prepared is not None:
+                    pending = uploader.submit(self._save_batch, repo_url, prepared, backfill_lexical, progress)
+
+                changed = len(prepared[0]) if prepared is not None else 0
+                stored += changed
+                skipped += len(batch) - changed
+                logging.debug(f"Ingested {stored} chunks for {repo_url} ({skipped} unchanged)")
+
+            if pending is not None:
+                pending.result()
+
+        if progress is not None:
+            for stage in ("chunk", "embed", "upsert"):
+                progress.finish(stage)
+        if self.repo_registry is not None:
+            self.repo_registry.mark_indexed(repo_url, self.vector_store.count_points(repo_url))
+
+        logging.info(
+            f"Ingested {stored} chunks for {repo_url} ({skipped} unchanged) "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+        return stored
+
+    def _delete_stale_sources(self, repo_url: str, repo_dir: str) -> None:
+        """
+        Deletes the source chunks of every indexed file whose blob at HEAD differs from the
+        one its chunks were built from, including files that were removed.
+        """
+        current = head_blobs(repo_dir)
+        stale = [
+            path for path, blobs in self.vector_store.get_source_blobs(repo_url).items()
+            if blobs != {current.get(path)}
+        ]
+        if not stale:
+            return
+
+        payload_filter = {"kind": "source", "path": stale}
+        self.vector_store.delete_matching(repo_url, payload_filter)
+        if self.lexical_index is not None:
+            self.lexical_index.delete_matching(repo_url, payload_filter)
+        logging.info(f"Deleted the chunks of {len(stale)} changed or removed files of {repo_url}")
+
+    def delete_repo(self, repo_url: str) -> None:
+        """
+        Drops the repository from the vector store and the lexical index.
+        """
+        self.vector_store.delete_repo(repo_url)
+        if self.lexical_index is not None:
+            self.lexical_index.delete_repo(repo_url)
+        if self.repo_registry is not None:
+            self.repo_registry.mark_deleted(repo_url)
+        logging.info(f"Deleted the index of {repo_url}")
+
+    def reindex_repo(
+        self,
+        repo_url: str,
+        data_path: str,
+        progress: Optional[IngestionJob] = None,
+        repo_dir: Optional[str] = None,
+    ) -> int:
+        """
+        Rebuilds the repository's index from scratch: deletes it, then ingests the full
+        repository_data file (and source tree, when repo_dir is given). Use it after
+        changing the chunking, the embedding model or the collection settings, or to
+        clear points left behind by deleted files.
+
+        Returns:
+            int: The number of chunks stored.
+        """
+        self.delete_repo(repo_url)
+        return self.ingest_repository_data(repo_url, data_path, progress=progress, repo_dir=repo_dir)
+
+    def ensure_analytics(self, repo_url: str, data_path: str) -> bool:
+        """
+        Loads the full repository_data file into the analytics store if it does not yet
+        hold the complete history (e.g. the repository was indexed before analytics existed).
+
+        Returns:
+            bool: True if the file was loaded.
+        """
+        if self.analytics_store is None or self.analytics_store.is_repo_complete(repo_url):
+            return False
+        self.analytics_store.ingest_records(repo_url, read_repository_records(data_path))
+        logging.info(f"Loaded analytics for {repo_url}")
+        return True
+
+    def _prepare_batch(
+        self,
+        repo_url: str,
+        batch: List[Chunk],
+        backfill_lexical: bool = False,
+        progress: Optional[IngestionJob] = None,
+    ) -> Optional[Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray]]:
+        """
+        Dedupes a batch, drops chunks whose content hash is already stored and embeds the rest.
+
+        Returns:
+            Optional[Tuple]: ids, texts, payloads and embeddings of the changed chunks, or None if nothing changed.
+        """
+        latest = {}
+        for chunk in batch:
+            text_hash = content_hash(chunk.text)
+            point_id = make_point_id(repo_url, chunk.metadata.get("key") or text_hash)
+            latest[point_id] = (chunk, text_hash)
+
+        existing = self.vector_store.get_content_hashes(repo_url, list(latest))
+        changed = [
+            (point_id, chunk, text_hash)
+            for point_id, (chunk, text_hash) in latest.items()
+            if existing.get(point_id) != text_hash
+        ]
+        if backfill_lexical:
+            self.lexical_index.save(
+                repo_url,
+                list(latest),
+                [chunk.text for chunk, _ in latest.values()],
+                [{**chunk.metadata, "content_hash": text_hash} for chunk, text_hash in latest.values()],
+            )
+        if not changed:
+            return None
+
+        texts = [chunk.text for _, chunk, _ in changed]
+        payloads = [{**chunk.metadata, "content_hash": text_hash} for _, chunk, text_hash in changed]
+        ids = [point_id for point_id, _, _ in changed]
+        if progress is not None:
+            progress.start("embed")
+        embeddings = self.embedding_service.generate_embeddings(texts)
+        if progress is not None:
+            progress.advance("embed", len(texts))
+        return ids, texts, payloads, embeddings
+
+    def _save_batch(
+        self,
+        repo_url: str,
+        prepared: Tuple[List[str], List[str], List[Dict[str, Any]], np.ndarray],
+        backfill_lexical: bool = False,
+        progress: Optional[IngestionJob] = None,
+    ) -> None:
+        ids, texts, payloads, embeddings = prepared
+        if progress is not None:
+            progress.start("upsert")
+        self.vector_store.save(
+            repo_url=repo_url,
+            chunks=texts,
+            chunk_embeddings=embeddings,
+            payloads=payloads,
+            ids=ids,
+        )
+        if self.lexical_index is not None and not backfill_lexical:
+            self.lexical_index.save(repo_url, ids, texts, payloads)
+        if progress is not None:
+            progress.advance("upsert", len(ids))
@@ -0,0 +1,280 @@
+import logging
+import re
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.infrastructure.analytics.analytics_store import AnalyticsStore
+from app.utils.helpers import extract_repo_name_and_owner
+
+Period = Tuple[Optional[str], Optional[str], str]
+
+OPEN_ENDED = re.compile(r"\b(why|explain|how does|how do|describe|summari[sz]e|por ?que|explique|descreva|resuma)\b")
+
+TIME_PATTERNS: List[Tuple[re.Pattern, Callable[[re.Match, date], Tuple[date, Optional[date]]], Dict[str, str]]] = [
+    (
+        re.compile(r"\b(?:in the )?(?:last|past)\s+(\d+)\s+days?\b|\b(?:nos\s+)?[úu]ltimos\s+(\d+)\s+dias\b"),
+        lambda m, today: (today - timedelta(days=int(m.group(1) or m.group(2))), None),
+        {"en": " in the last {days} days", "pt": " nos últimos {days} dias"},
+    ),
+    (
+        re.compile(r"\btoday\b|\bhoje\b"),
+        lambda m, today: (today, None),
+        {"en": " today", "pt": " hoje"},
+    ),
+    (
+        re.compile(r"\byesterday\b|\bontem\b"),
+        lambda m, today: (today - timedelta(days=1), today),
+        {"en": " yesterday", "pt": " ontem"},
+    ),
+    (
+        re.compile(r"\b(?:last|past|this)\s+week\b|\b(?:na\s+)?[úu]ltima\s+semana\b|\bsemana\s+passada\b|\besta\s+semana\b"),
+        lambda m, today: (today - timedelta(days=7), None),
+        {"en": " in the last 7 days", "pt": " nos últimos 7 dias"},
+    ),
+    (
+        re.compile(r"\b(?:last|past|this)\s+month\b|\b[úu]ltimo\s+m[êe]s\b|\bm[êe]s\s+passado\b|\beste\s+m[êe]s\b"),
+        lambda m, today: (today - timedelta(days=30), None),
+        {"en": " in the last 30 days", "pt": " nos últimos 30 dias"},
+    ),
+    (
+        re.compile(r"\bthis\s+year\b|\beste\s+ano\b"),
+        lambda m, today: (date(today.year, 1, 1), None),
+        {"en": " this year", "pt": " este ano"},
+    ),
+    (
+        re.compile(r"\b(?:last|past)\s+year\b|\b[úu]ltimo\s+ano\b|\bano\s+passado\b"),
+        lambda m, today: (today - timedelta(days=365), None),
+        {"en": " in the last 365 days", "pt": " nos últimos 365 dias"},
+    ),
+    (
+        re.compile(r"\b(?:in|em|during|durante)\s+((?:19|20)\d\d)\b"),
+        lambda m, today: (date(int(m.group(1)), 1, 1), date(int(m.group(1)) + 1, 1, 1)),
+        {"en": " in {year}", "pt": " em {year}"},
+    ),
+    (
+        re.compile(r"\b(?:since|desde)\s+(\d{4}-\d{2}-\d{2})\b"),
+        lambda m, today: (date.fromisoformat(m.group(1)), None),
+        {"en": " since {since}", "pt": " desde {since}"},
+    ),
+]
+
+NAME = r"[\w.\-]+(?: [\w.\-]+){0,2}"
+EN_COUNT = r"(?:how many|(?:the )?(?:total )?number of|total)"
+PT_COUNT = r"(?:quantos|(?:qual (?:[ée] )?)?o n[úu]mero de|n[úu]mero de|total de)"
+
+# Every intent is a list of patterns that must match the whole normalized question (see
+# _normalize). Anything with extra qualifiers ("commits that touch README.md", "commits
+# mentioning the login bug") matches none of them and goes to retrieval + LLM instead.
+LAST_COMMIT = [
+    re.compile(r"(?:(?:what|which) (?:is|was) |what's |show(?: me)? )?(?:the )?(?:last|latest|most recent|newest) commit"),
+    re.compile(r"(?:qual (?:[ée]|foi) |mostre )?o [úu]ltimo commit"),
+]
+TOP_FILES = [
+    re.compile(
+        r"(?:(?:what|which) (?:are|were) |show(?: me)? |list )?(?:the )?(?:top \d+ )?(?:\d+ )?"
+        r"most (?:changed|modified|edited|touched) files"
+    ),
+    re.compile(r"(?:which|what) (?:\d+ )?files (?:were|are|have been|got) (?:changed|modified|edited|touched) (?:the )?most(?: often)?"),
+    re.compile(r"(?:quais (?:s[ãa]o|foram) )?(?:os )?(?:\d+ )?arquivos mais (?:alterados|modificados|editados)"),
+    re.compile(r"quais (?:\d+ )?arquivos (?:foram|s[ãa]o) (?:mais )?(?:alterados|modificados|editados)(?: mais)?(?: vezes)?"),
+]
+TOP_AUTHORS = [
+    re.compile(r"who (?:has |have )?(?:made|authored|pushed|has|had) (?:the )?most commits"),
+    re.compile(r"who (?:has )?(?:contributed|committed) (?:the )?most"),
+    re.compile(r"(?:(?:who are|list|show(?: me)?) )?(?:the )?(?:top|most active)(?: \d+)? (?:contributors|committers|authors|developers)"),
+    re.compile(r"quem (?:fez|tem|criou) mais commits"),
+    re.compile(r"quem (?:mais contribuiu|contribuiu mais)"),
+    re.compile(r"(?:quais s[ãa]o )?(?:os )?(?:\d+ )?principais (?:contribuidores|autores|committers)"),
+]
+BUSIEST_DAY = [
+    re.compile(r"(?:which|what) day (?:had|has|saw|got) (?:the )?most commits"),
+    re.compile(r"(?:(?:what|which) (?:was|is) )?(?:the )?busiest day"),
+    re.compile(r"(?:qual (?:foi|[ée]) )?o dia (?:com|que teve|em que houve) mais commits"),
+]
+COUNT_ISSUES = [
+    re.compile(
+        r"how many (?:(?P<state>open|closed) )?(?P<kind>issues|pull requests|prs)"
+        r"(?: (?:are|were) there| (?:are|were|have been) (?:opened|created|filed))?"
+    ),
+    re.compile(r"how many (?P<kind>issues|pull requests|prs) (?:are|were) (?P<state>open|closed)"),
+    re.compile(
+        r"quant[ao]s (?P<kind>issues|pull requests|prs)(?: (?P<state>abert[ao]s|fechad[ao]s))?"
+        r"(?: (?:existem|h[áa]|tem|foram (?:abert[ao]s|criad[ao]s)))?"
+    ),
+    re.compile(r"quant[ao]s (?P<kind>issues|pull requests|prs) (?:est[ãa]o|foram) (?P<state>abert[ao]s|fechad[ao]s)"),
+]
+COUNT_COMMITS = [
+    re.compile(EN_COUNT + r" commits(?: (?:are there|were there|have been made|were made|exist|(?:does|did) it have))?"),
+    re.compile(EN_COUNT + r" commits (?:by|from|authored by|made by) (?P<author>" + NAME + ")"),
+    re.compile(r"how many commits (?:did|does|has|have) (?P<author>" + NAME + r") (?:make|made|author|authored|push|pushed|do|done)"),
+    re.compile(PT_COUNT + r" commits(?: (?:existem|h[áa]|tem|foram feitos))?"),
+    re.compile(PT_COUNT + r" commits (?:de|por|feitos por|do|da) (?P<author>" + NAME + ")"),
+    re.compile(r"quantos commits (?:o |a )?(?P<author>" + NAME + r") (?:fez|tem|criou)"),
+]
+REPO_REFERENCE = re.compile(
+    r"\b(?:in|of|on|for) (?:this|the) (?:repo|repository|project|codebase)\b"
+    r"|\b(?:d[oe]|n[oe]|neste|deste|desse|nesse) (?:reposit[óo]rio|projeto|repo)\b"
+)
+TOP_N = re.compile(r"\btop\s+(\d+)\b|\b(\d+)\s+(?:principais|maiores|most|arquivos|files)\b")
+PORTUGUESE = re.compile(r"\b(?:quantos|quantas|quem|qual|quais|arquivos?|[úu]ltimo|dia|principais|n[úu]mero)\b")
+
+
+def _full_match(patterns: List[re.Pattern], text: str) -> Optional[re.Match]:
+    for pattern in patterns:
+        match = pattern.fullmatch(text)
+        if match:
+            return match
+    return None
+
+
+class AnalyticsIntentRouter:
+    """
+    Recognizes counting and ranking questions (in English or Portuguese) and answers
+    them from the AnalyticsStore, so they skip retrieval and generation entirely.
+    A question is only routed when one intent pattern matches all of it once the time
+    window and references to "the repository" are removed, and when a named author is
+    a known author of the repository. Anything else, or any repository whose analytics
+    are incomplete, returns None and goes through the regular RAG pipeline.
+    """
+
+    def __init__(self, analytics_store: AnalyticsStore, top_n: Optional[int] = None):
+        self.analytics_store = analytics_store
+        self.top_n = top_n or settings.ANALYTICS_TOP_N
+        self._stats = {"answered": 0, "fallbacks": 0}
+
+    @staticmethod
+    def _parse_period(question: str, lang: str) -> Tuple[str, Period]:
+        today = datetime.now(timezone.utc).date()
+        for pattern, window, labels in TIME_PATTERNS:
+            match = pattern.search(question)
+            if match is None:
+                continue
+            since, until = window(match, today)
+            label = labels[lang].format(
+                days=(today - since).days, year=since.year, since=since.isoformat()
+            )
+            stripped = question[:match.start()] + question[match.end():]
+            return stripped, (since.isoformat(), until.isoformat() if until else None, label)
+        return question, (None, None, "")
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        text = REPO_REFERENCE.sub(" ", text)
+        text = re.sub(r"[,;:]", " ", text)
+        text = re.sub(r"\s+", " ", text).strip()
+        return re.sub(r"\s*[?!.]+$", "", text).strip()
+
+    def answer(self, repo_url: str, question: str) -> Optional[str]:
+        """
+        Answers a counting/ranking question about a repository directly from the analytics tables.
+
+        Args:
+            repo_url (str): The repository the question is about.
+            question (str): The user's question.
+
+        Returns:
+            Optional[str]: The answer, or None if the question should go to the LLM.
+        """
+        text = question.lower().strip()
+        if OPEN_ENDED.search(text) or not self.analytics_store.is_repo_complete(repo_url):
+            self._stats["fallbacks"] += 1
+            return None
+
+        lang = "pt" if PORTUGUESE.search(text) else "en"
+        text, period = self._parse_period(text, lang)
+        text = self._normalize(text)
+
+        try:
+            answer = self._dispatch(repo_url, text, lang, period)
+        except Exception as e:
+            logging.warning(f"Analytics routing failed for {repo_url}: {e}")
+            answer = None
+
+        self._stats["answered" if answer is not None else "fallbacks"] += 1
+        return answer
+
+    def _dispatch(self, repo_url: str, text: str, lang: str, period: Period) -> Optional[str]:
+        since, until, label = period
+        repo = extract_repo_name_and_owner(repo_url)
+        store = self.analytics_store
+        top_n = TOP_N.search(text)
+        limit = min(int(top_n.group(1) or top_n.group(2)), 50) if top_n else self.top_n
+
+        if _full_match(LAST_COMMIT, text):
+            commit = store.last_commit(repo_url)
+            if commit is None:
+                return None
+            commit_hash, author, committed_at, message = commit
+            if lang == "pt":
+                return f"O último commit de {repo} é {commit_hash[:7]}, de {author} em {committed_at[:10]}: {message}"
+            return f"The latest commit in {repo} is {commit_hash[:7]} by {author} on {committed_at[:10]}: {message}"
+
+        if _full_match(TOP_FILES, text):
+            rows = store.top_files(repo_url, limit, since, until)
+            if not rows:
+                return None
+            if lang == "pt":
+                items = "; ".join(f"{i}. {path} ({changes} commits, {lines} linhas)" for i, (path, changes, lines) in enumerate(rows, 1))
+                return f"Arquivos mais alterados em {repo}{label}: {items}."
+            items = "; ".join(f"{i}. {path} ({changes} commits, {lines} lines)" for i, (path, changes, lines) in enumerate(rows, 1))
+            return f"Most changed files in {repo}{label}: {items}."
+
+        if _full_match(TOP_AUTHORS, text):
+            rows = store.top_authors(repo_url, limit, since, until)
+            if not rows:
+                return None
+            items = "; ".join(f"{i}. {author} ({commits})" for i, (author, commits) in enumerate(rows, 1))
+            if lang == "pt":
+                return f"Principais contribuidores de {repo} por número de commits{label}: {items}."
+            return f"Top contributors to {repo} by commits{label}: {items}."
+
+        if _full_match(BUSIEST_DAY, text):
+            rows = store.busiest_days(repo_url, 1)
+            if not rows:
+                return None
+            day, commits = rows[0]
+            if lang == "pt":
+                return f"O dia com mais commits em {repo} foi {day} ({commits} commits)."
+            return f"The day with the most commits in {repo} was {day} ({commits} commits)."
+
+        match = _full_match(COUNT_ISSUES, text)
+        if match:
+            return self._count_issues(repo_url, repo, match, lang, since, until, label)
+
+        match = _full_match(COUNT_COMMITS, text)
+        if match:
+            author = match.groupdict().get("author")
+            if author:
+                author = store.resolve_author(repo_url, author)
+                if author is None:
+                    return None
+            count = store.count_commits(repo_url, author, since, until)
+            if lang == "pt":
+                by = f" de {author}" if author else ""
+                return f"{repo} tem {count} commits{by}{label}."
+            by = f" by {author}" if author else ""
+            return f"{repo} has {count} commits{by}{label}."
+
+        return None
+
+    def _count_issues(
+        self, repo_url: str, repo: str, match: re.Match, lang: str, since: Optional[str], until: Optional[str], label: str
+    ) -> str:
+        kind = match.group("kind").replace(" ", "")
+        state_text = match.groupdict().get("state") or ""
+        state = "open" if state_text.startswith(("open", "abert")) else "closed" if state_text else None
+        pull_requests = kind in ("pullrequests", "prs")
+        count = self.analytics_store.count_issues(repo_url, state, pull_requests, since, until)
+
+        if lang == "pt":
+            noun = "pull requests" if pull_requests else "issues"
+            adjective = {"open": " abertos" if pull_requests else " abertas", "closed": " fechados" if pull_requests else " fechadas"}.get(state, "")
+            return f"{repo} tem {count} {noun}{adjective}{label}."
+        noun = "pull requests" if pull_requests else "issues"
+        adjective = f"{state} " if state else ""
+        return f"{repo} has {count} {adjective}{noun}{label}."
+
+    def get_stats(self) -> Dict[str, Any]:
+        routed = self._stats["answered"] + self._stats["fallbacks"]
+        return {**self._stats, "answer_ratio": self._stats["answered"] / routed if routed else 0.0}
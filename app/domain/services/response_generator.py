@@ -1,18 +1,39 @@
 import logging
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict, Optional
 
-from ollama import chat
+from ollama import AsyncClient
 from ollama import ChatResponse
 
 from app.core.config import settings
+from app.domain.schema.query import QueryResponse
+from app.domain.services.context_budgeter import ContextBudgeter
 from app.domain.services.session_manager import SessionManager
 
 
+SYSTEM_PROMPT = (
+    "You are an AI assistant for a software repository QA task. "
+    "Use the provided context to answer precisely. "
+    "If no clear answer exists, state 'I cannot find sufficient information'. "
+    "Be concise and direct, using maximum three sentences."
+)
+
+
 class ResponseGenerator:
-    def __init__(self):
-        self.session_manager = SessionManager()
+    def __init__(self, session_manager: SessionManager, budgeter: Optional[ContextBudgeter] = None):
+        self.session_manager = session_manager
+        self.budgeter = budgeter or ContextBudgeter()
+        self.client = AsyncClient(host=settings.OLLAMA_HOST)
+
+    def _build_messages(self, history: List[Dict[str, str]], documents: List[QueryResponse]) -> List[Dict[str, str]]:
+        history, context = self.budgeter.pack(SYSTEM_PROMPT, history, documents)
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "system", "content": f"Context: {context}"},
+        ]
+        messages.extend(history)
+        return messages
 
-    async def generate_response(self, user_id: str, question: str, context: str) -> List[Dict[str, str]]:
+    async def generate_response(self, user_id: str, question: str, documents: List[QueryResponse]) -> List[Dict[str, str]]:
         """
         Generate a chat response for a given user query using the context provided.
 
@@ -23,43 +44,67 @@ class ResponseGenerator:
         Args:
             user_id (str): The unique identifier of the user.
             question (str): The user's question to be answered.
-            context (str): Additional context to assist in generating an accurate response.
+            documents (List[QueryResponse]): The retrieved chunks; the best ones that fit the prompt budget are used as context.
 
         Returns:
             List[Dict[str, str]]: The updated chat history including the user's question and the AI's response.
         """
         try:
-            self.session_manager.add_message(user_id, "user", question)
-
-            history = self.session_manager.get_history(user_id)
-
-            messages = [
-                {
-                    "role": "system",
-                    "content": (
-                        "You are an AI assistant for a software repository QA task. "
-                        "Use the provided context to answer precisely. "
-                        "If no clear answer exists, state 'I cannot find sufficient information'. "
-                        "Be concise and direct, using maximum three sentences."
-                    )
-                },
-                {"role": "system", "content": f"Context: {context}"},
-            ]
-            messages.extend(history)
-
-            response: ChatResponse = chat(
+            history = await self.session_manager.append_and_get_history(user_id, "user", question)
+
+            response: ChatResponse = await self.client.chat(
                 model=settings.MODEL_NAME_LLM,
-                messages=messages,
+                messages=self._build_messages(history, documents),
                 options={
                     "temperature": 0,
-                    "max_tokens": 200
+                    "num_predict": settings.PROMPT_RESPONSE_RESERVE
                 }
             )
 
-            self.session_manager.add_message(user_id, "assistant", response.message.content)
-
-            return self.session_manager.get_history(user_id)
+            return await self.session_manager.append_and_get_history(
+                user_id, "assistant", response.message.content
+            )
 
         except Exception as e:
             logging.error(f"Error generating response: {e}")
-            return []
\ No newline at end of file
+            return []
+
+    async def stream_response(self, user_id: str, question: str, documents: List[QueryResponse]) -> AsyncIterator[str]:
+        """
+        Generate a chat response token by token.
+
+        The question is added to the session history before generation starts, and the
+        assistant message is persisted once the model has produced its last token. If the
+        stream ends early (client disconnect, model error), whatever was produced so far
+        is persisted, so the question keeps its answer in the history.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            question (str): The user's question to be answered.
+            documents (List[QueryResponse]): The retrieved chunks; the best ones that fit the prompt budget are used as context.
+
+        Yields:
+            str: The pieces of the answer as the model produces them.
+        """
+        history = await self.session_manager.append_and_get_history(user_id, "user", question)
+
+        stream = await self.client.chat(
+            model=settings.MODEL_NAME_LLM,
+            messages=self._build_messages(history, documents),
+            stream=True,
+            options={
+                "temperature": 0,
+                "num_predict": settings.PROMPT_RESPONSE_RESERVE
+            }
+        )
+
+        parts = []
+        try:
+            async for part in stream:
+                token = part.message.content
+                if token:
+                    parts.append(token)
+                    yield token
+        finally:
+            if parts:
+                await self.session_manager.add_message(user_id, "assistant", "".join(parts))
@@ -1,47 +1,109 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 
-import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
+from app.core.config import settings
+from app.domain.schema.query import QueryResponse
+from app.domain.services.vector_store import VectorStore
+from app.infrastructure.lexical.bm25_index import BM25Index
+from app.utils.helpers import content_hash
+
+
+def reciprocal_rank_fusion(rankings: List[List[QueryResponse]], k: Optional[int] = None) -> List[QueryResponse]:
+    """
+    Merges ranked hit lists with reciprocal-rank fusion: each hit scores the sum of
+    1 / (k + rank) over the lists it appears in. Hits are matched by content hash.
+
+    Args:
+        rankings (List[List[QueryResponse]]): The hit lists, each best first.
+        k (Optional[int]): The rank damping constant. Defaults to settings.RETRIEVAL_RRF_K.
+
+    Returns:
+        List[QueryResponse]: The fused hits, best first, with the fused score.
+    """
+    k = k or settings.RETRIEVAL_RRF_K
+    fused: Dict[str, QueryResponse] = {}
+    scores: Dict[str, float] = {}
+
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking, start=1):
+            key = hit.metadata.get("content_hash") or content_hash(hit.text)
+            fused.setdefault(key, hit)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [fused[key].model_copy(update={"score": scores[key]}) for key in ordered]
 
 
 class DocumentRetriever:
-    def __init__(self, vector_store):
+    def __init__(self, vector_store: VectorStore, lexical_index: Optional[BM25Index] = None):
         self.vector_store = vector_store
+        self.lexical_index = lexical_index
 
-    def retrieve_relevant_documents(self, repo_url: str, query_embedding: List[float], top_k: int = 4):
+    def retrieve(
+        self,
+        repo_url: str,
+        query_embedding: List[float],
+        top_k: Optional[int] = None,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+        query_text: Optional[str] = None,
+    ) -> List[QueryResponse]:
         """
-        Retrieves the top_k documents from the given repository with the highest cosine similarity to the given query_embedding.
+        Retrieves the top_k most similar chunks for the given query_embedding, letting the
+        vector store run the nearest-neighbour search server-side.
+
+        When a lexical index is configured and query_text is given, the BM25 hits for the
+        text are fused with the vector hits by reciprocal rank, so exact identifiers
+        (hashes, file names, logins) surface even when their embeddings are not close.
 
         Args:
             repo_url (str): The URL of the GitHub repository.
-            query_embedding (List[float]): The embedding of the query that will be used to compute the cosine similarity.
-            top_k (int): The number of documents to return. Defaults to 4.
+            query_embedding (List[float]): The embedding of the query.
+            top_k (Optional[int]): The number of documents to return. Defaults to settings.TOP_K_DOCUMENTS.
+            score_threshold (Optional[float]): Minimum similarity for a hit. Defaults to settings.RETRIEVAL_SCORE_THRESHOLD.
+            payload_filter (Optional[Dict[str, Any]]): Payload field/value pairs every hit must match.
+            query_text (Optional[str]): The question text, for lexical retrieval.
 
         Returns:
-            List[str]: A list of the top_k documents with the highest cosine similarity to the given query_embedding.
+            List[QueryResponse]: The hits ordered by decreasing relevance, with their (similarity or fused) scores.
         """
-        documents = self.vector_store.get_all(repo_url)
-
-        embeddings = []
-        texts = []
+        if score_threshold is None:
+            score_threshold = settings.RETRIEVAL_SCORE_THRESHOLD
+        top_k = top_k or settings.TOP_K_DOCUMENTS
 
-        for doc in documents:
-            if doc.embedding:
-                embeddings.append(doc.embedding)
-                texts.append(doc.text)
-            else:
-                embeddings.append([0] * len(query_embedding))
-                texts.append(doc.text)
+        vector_hits = self.vector_store.query(
+            repo_url,
+            query_embedding,
+            top_k=top_k,
+            score_threshold=score_threshold,
+            payload_filter=payload_filter,
+        )
+        if self.lexical_index is None or not query_text:
+            return vector_hits
 
-        embeddings = np.array(embeddings)
+        lexical_hits = self.lexical_index.query(repo_url, query_text, top_k=top_k, payload_filter=payload_filter)
+        if not lexical_hits:
+            return vector_hits
+        return reciprocal_rank_fusion([vector_hits, lexical_hits])[:top_k]
 
-        if embeddings.shape[1] == 0:
-            raise ValueError("Embeddings have no features, cannot perform cosine similarity.")
-
-        query_embedding = np.array(query_embedding).reshape(1, -1)
-        similarities = cosine_similarity(query_embedding, embeddings)[0]
-
-        top_indices = np.argsort(similarities)[-top_k:][::-1]
+    def retrieve_relevant_documents(
+        self,
+        repo_url: str,
+        query_embedding: List[float],
+        top_k: Optional[int] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[str]:
+        """
+        Retrieves the text of the top_k documents from the given repository with the highest
+        cosine similarity to the given query_embedding.
 
-        return [texts[i] for i in top_indices]
+        Args:
+            repo_url (str): The URL of the GitHub repository.
+            query_embedding (List[float]): The embedding of the query.
+            top_k (Optional[int]): The number of documents to return. Defaults to settings.TOP_K_DOCUMENTS.
+            payload_filter (Optional[Dict[str, Any]]): Payload field/value pairs every hit must match.
 
+        Returns:
+            List[str]: The text of the top_k documents, most similar first.
+        """
+        hits = self.retrieve(repo_url, query_embedding, top_k=top_k, payload_filter=payload_filter)
+        return [hit.text for hit in hits]
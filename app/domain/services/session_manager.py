@@ -1,19 +1,71 @@
 import logging
-import redis
 import json
-from typing import List, Dict
+from typing import List, Dict, Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.utils.helpers import estimate_tokens
+
 
 class SessionManager:
-    def __init__(self, host: str = 'localhost', port: int = 6379, db: int = 0):
-        self.redis = redis.Redis(host=host, port=port, db=db)
+    """
+    Chat sessions stored as Redis lists, one JSON message per entry.
+
+    Every write is pipelined with an LTRIM to the last settings.SESSION_MAX_MESSAGES
+    entries and an EXPIRE of settings.SESSION_TTL_SECONDS, so idle sessions disappear
+    and active ones never grow past the window. Histories handed back to callers are
+    further cut to settings.SESSION_MAX_HISTORY_TOKENS, dropping the oldest messages first.
+    """
+
+    def __init__(
+        self,
+        host: Optional[str] = None,
+        port: Optional[int] = None,
+        db: Optional[int] = None,
+        max_messages: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+        max_history_tokens: Optional[int] = None,
+    ):
+        self.redis = redis.Redis(
+            host=host or settings.REDIS_HOST,
+            port=port or settings.REDIS_PORT,
+            db=db if db is not None else settings.REDIS_DB,
+        )
+        self.max_messages = max_messages or settings.SESSION_MAX_MESSAGES
+        self.ttl_seconds = ttl_seconds or settings.SESSION_TTL_SECONDS
+        self.max_history_tokens = max_history_tokens or settings.SESSION_MAX_HISTORY_TOKENS
 
     @staticmethod
     def _get_key(user_id: str) -> str:
         return f"session:{user_id}"
 
-    def create_session(self, user_id: str) -> None:
+    def _fit_budget(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Keeps the newest messages whose estimated token count fits the history budget.
+        The most recent message is always kept, and the window never opens with an
+        assistant message whose question was cut off.
+        """
+        total = 0
+        start = len(messages)
+        while start > 0:
+            total += estimate_tokens(messages[start - 1]["content"])
+            if total > self.max_history_tokens and start < len(messages):
+                break
+            start -= 1
+        if start < len(messages) - 1 and messages[start]["role"] == "assistant":
+            start += 1
+        return messages[start:]
+
+    def _queue_append(self, pipe, key: str, role: str, content: str) -> None:
+        pipe.rpush(key, json.dumps({"role": role, "content": content}))
+        pipe.ltrim(key, -self.max_messages, -1)
+        pipe.expire(key, self.ttl_seconds)
+
+    async def create_session(self, user_id: str) -> None:
         """
         Create a new chat session for a user or do nothing if the session already exists.
+        Sessions are created implicitly by the first message, so this only reports.
 
         Args:
             user_id (str): The unique identifier of the user.
@@ -21,14 +73,12 @@ class SessionManager:
         Returns:
             None
         """
-        key = self._get_key(user_id)
-
-        if not self.session_exists(key):
+        if not await self.session_exists(user_id):
             logging.info(f"New session created for user_id: {user_id}")
         else:
             logging.info(f"Session already exists for user_id: {user_id}")
 
-    def session_exists(self, user_id: str) -> bool:
+    async def session_exists(self, user_id: str) -> bool:
         """
         Check if a chat session exists for a given user.
 
@@ -39,14 +89,13 @@ class SessionManager:
             bool: True if the session exists, False otherwise.
         """
         key = self._get_key(user_id)
-        return self.redis.exists(key) == 1
+        return await self.redis.exists(key) == 1
 
-    def add_message(self, user_id: str, role: str, content: str) -> None:
+    async def add_message(self, user_id: str, role: str, content: str) -> None:
         """
         Add a message to the chat session history for a user.
 
-        This method appends a message to the session history stored in Redis for the specified user.
-        Each message is represented as a dictionary containing the role and content.
+        The append, the trim to the history window and the TTL refresh are sent in one pipeline.
 
         Args:
             user_id (str): The unique identifier of the user.
@@ -57,10 +106,30 @@ class SessionManager:
             None
         """
         key = self._get_key(user_id)
-        message = {"role": role, "content": content}
-        self.redis.rpush(key, json.dumps(message))
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_append(pipe, key, role, content)
+            await pipe.execute()
+
+    async def append_and_get_history(self, user_id: str, role: str, content: str) -> List[Dict[str, str]]:
+        """
+        Add a message and read back the resulting history in a single round trip.
+
+        Args:
+            user_id (str): The unique identifier of the user.
+            role (str): The role of the sender, e.g., 'user' or 'assistant'.
+            content (str): The content of the message to be added.
+
+        Returns:
+            List[Dict[str, str]]: The history including the new message, cut to the token budget.
+        """
+        key = self._get_key(user_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            self._queue_append(pipe, key, role, content)
+            pipe.lrange(key, 0, -1)
+            *_, messages = await pipe.execute()
+        return self._fit_budget([json.loads(message) for message in messages])
 
-    def get_history(self, user_id: str) -> List[Dict[str, str]]:
+    async def get_history(self, user_id: str) -> List[Dict[str, str]]:
         """
         Retrieve the chat session history for a given user.
 
@@ -71,13 +140,14 @@ class SessionManager:
             user_id (str): The unique identifier of the user.
 
         Returns:
-            List[Dict[str, str]]: The chat session history for the user, or an empty list if the user has no history.
+            List[Dict[str, str]]: The chat session history for the user, cut to the token budget,
+            or an empty list if the user has no history.
         """
         key = self._get_key(user_id)
-        messages = self.redis.lrange(key, 0, -1)
-        return [json.loads(message) for message in messages]
+        messages = await self.redis.lrange(key, 0, -1)
+        return self._fit_budget([json.loads(message) for message in messages])
 
-    def clear_history(self, user_id: str) -> None:
+    async def clear_history(self, user_id: str) -> None:
         """
         Clear the chat session history for a given user.
 
@@ -91,6 +161,7 @@ class SessionManager:
             None
         """
         key = self._get_key(user_id)
-        self.redis.delete(key)
-        key = self._get_key(user_id)
-        self.redis.delete(key)
\ No newline at end of file
+        await self.redis.delete(key)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
@@ -0,0 +1,59 @@
+from typing import Any, Dict, List, Optional, Protocol, Set
+
+import numpy as np
+
+from app.domain.schema.document import Document
+from app.domain.schema.query import QueryResponse
+
+
+class VectorStore(Protocol):
+    """
+    What the services need from a vector store. QdrantVectorStore and LocalVectorStore
+    both implement it; settings.VECTOR_STORE_BACKEND picks one at startup.
+
+    Payload filters map a field to the value it must equal, or to a list of accepted values.
+    """
+
+    def is_repo_processed(self, repo_url: str) -> bool:
+        ...
+
+    def count_points(self, repo_url: str) -> int:
+        ...
+
+    def save(
+        self,
+        repo_url: str,
+        chunks: List[str],
+        chunk_embeddings: np.ndarray,
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ) -> None:
+        ...
+
+    def get_content_hashes(self, repo_url: str, ids: List[str]) -> Dict[str, Optional[str]]:
+        ...
+
+    def get_source_blobs(self, repo_url: str) -> Dict[str, Set[str]]:
+        ...
+
+    def delete_matching(self, repo_url: str, payload_filter: Dict[str, Any]) -> None:
+        ...
+
+    def delete_repo(self, repo_url: str) -> bool:
+        ...
+
+    def query(
+        self,
+        repo_url: str,
+        query_embedding: List[float],
+        top_k: int = 3,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[QueryResponse]:
+        ...
+
+    def get_all(self, repo_url: str) -> List[Document]:
+        ...
+
+    def close(self) -> None:
+        ...
@@ -0,0 +1,251 @@
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.helpers import batched, extract_repo_name_and_owner
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    repo TEXT PRIMARY KEY,
+    name TEXT,
+    owner TEXT,
+    total_commits INTEGER,
+    total_issues INTEGER,
+    open_issues_count INTEGER,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS commits (
+    repo TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    author TEXT,
+    date TEXT,
+    day TEXT,
+    message TEXT,
+    PRIMARY KEY (repo, hash)
+);
+CREATE INDEX IF NOT EXISTS commits_by_author ON commits (repo, author);
+CREATE INDEX IF NOT EXISTS commits_by_day ON commits (repo, day);
+CREATE TABLE IF NOT EXISTS file_changes (
+    repo TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    path TEXT NOT NULL,
+    change_type TEXT,
+    additions INTEGER,
+    deletions INTEGER,
+    PRIMARY KEY (repo, hash, path)
+);
+CREATE INDEX IF NOT EXISTS file_changes_by_path ON file_changes (repo, path);
+CREATE TABLE IF NOT EXISTS issues (
+    repo TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    number INTEGER,
+    title TEXT,
+    author TEXT,
+    state TEXT,
+    is_pull_request INTEGER,
+    created_at TEXT,
+    day TEXT,
+    PRIMARY KEY (repo, id)
+);
+CREATE INDEX IF NOT EXISTS issues_by_day ON issues (repo, day);
+"""
+
+
+class AnalyticsStore:
+    """
+    Structured copy of the mined repository data for questions that are really
+    counting or ranking queries (commit totals, top contributors, most changed files,
+    issue counts), answered with indexed SQL aggregates instead of RAG + LLM.
+
+    Rows are upserted by natural key (commit hash, file path, issue id), so feeding the
+    same records twice, or a delta after the full history, never double counts.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or settings.ANALYTICS_DB_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def repo_key(repo_url: str) -> str:
+        return extract_repo_name_and_owner(repo_url).lower()
+
+    def _write(self, repo: str, records: List[Dict[str, Any]]) -> None:
+        repositories, commits, files, issues = [], [], [], []
+        for record in records:
+            record_type = record.get("type")
+            if record_type == "repository":
+                repositories.append((
+                    repo, record.get("name"), record.get("owner"), record.get("total_commits"),
+                    record.get("total_issues"), record.get("open_issues_count"), record.get("updated_at"),
+                ))
+            elif record_type == "commit":
+                message = (record.get("message") or "").splitlines()
+                commits.append((
+                    repo, record["hash"], record.get("author"), record.get("date"), record.get("day"),
+                    message[0] if message else "",
+                ))
+                for file in record.get("files", []):
+                    files.append((
+                        repo, record["hash"], file.get("path") or file.get("filename"), file.get("changes"),
+                        file.get("additions") or 0, file.get("deletions") or 0,
+                    ))
+            elif record_type == "issue":
+                issues.append((
+                    repo, record["id"], record.get("number"), record.get("title"), record.get("author"),
+                    record.get("state"), int(bool(record.get("is_pull_request"))), record.get("created_at"),
+                    record.get("day"),
+                ))
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO repositories VALUES (?, ?, ?, ?, ?, ?, ?)", repositories)
+            self._conn.executemany("INSERT OR REPLACE INTO commits VALUES (?, ?, ?, ?, ?, ?)", commits)
+            self._conn.executemany("INSERT OR REPLACE INTO file_changes VALUES (?, ?, ?, ?, ?, ?)", files)
+            self._conn.executemany("INSERT OR REPLACE INTO issues VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", issues)
+            self._conn.commit()
+
+    def tap(self, repo_url: str, records: Iterable[Dict[str, Any]], batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Passes records through unchanged while writing them to the store in batches,
+        so ingestion can fill the analytics tables from the same single read of the data file.
+        """
+        repo = self.repo_key(repo_url)
+        for batch in batched(records, batch_size):
+            self._write(repo, batch)
+            yield from batch
+
+    def ingest_records(self, repo_url: str, records: Iterable[Dict[str, Any]]) -> None:
+        for _ in self.tap(repo_url, records):
+            pass
+
+    def is_repo_complete(self, repo_url: str) -> bool:
+        """
+        True when the store holds every commit the repository record says exists, i.e.
+        the full history was loaded and not only a delta.
+        """
+        repo = self.repo_key(repo_url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT r.total_commits, (SELECT COUNT(*) FROM commits c WHERE c.repo = r.repo) "
+                "FROM repositories r WHERE r.repo = ?",
+                (repo,),
+            ).fetchone()
+        return row is not None and row[0] is not None and row[1] >= row[0]
+
+    def _query(self, sql: str, params: Tuple) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def resolve_author(self, repo_url: str, name: str) -> Optional[str]:
+        """
+        Maps a name from a question to the one commit author it refers to: an exact
+        (case-insensitive) match, else the only author having it as one of their words.
+
+        Returns:
+            Optional[str]: The author as stored, or None if no author or several authors match.
+        """
+        repo = self.repo_key(repo_url)
+        rows = self._query(
+            "SELECT DISTINCT author FROM commits WHERE repo = ? AND lower(author) = lower(?)", (repo, name)
+        )
+        if len(rows) == 1:
+            return rows[0][0]
+
+        name = name.lower()
+        rows = self._query("SELECT DISTINCT author FROM commits WHERE repo = ? AND author LIKE ?", (repo, f"%{name}%"))
+        matches = [author for (author,) in rows if name in re.split(r"[\s.\-_]+", (author or "").lower())]
+        return matches[0] if len(matches) == 1 else None
+
+    def count_commits(
+        self, repo_url: str, author: Optional[str] = None, since: Optional[str] = None, until: Optional[str] = None
+    ) -> int:
+        sql = "SELECT COUNT(*) FROM commits WHERE repo = ?"
+        params: List[Any] = [self.repo_key(repo_url)]
+        if author:
+            sql += " AND author = ?"
+            params.append(author)
+        if since:
+            sql += " AND day >= ?"
+            params.append(since)
+        if until:
+            sql += " AND day < ?"
+            params.append(until)
+        return self._query(sql, tuple(params))[0][0]
+
+    def top_authors(self, repo_url: str, limit: int, since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[str, int]]:
+        sql = "SELECT author, COUNT(*) AS commits FROM commits WHERE repo = ?"
+        params: List[Any] = [self.repo_key(repo_url)]
+        if since:
+            sql += " AND day >= ?"
+            params.append(since)
+        if until:
+            sql += " AND day < ?"
+            params.append(until)
+        sql += " GROUP BY author ORDER BY commits DESC LIMIT ?"
+        params.append(limit)
+        return self._query(sql, tuple(params))
+
+    def top_files(self, repo_url: str, limit: int, since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[str, int, int]]:
+        sql = (
+            "SELECT f.path, COUNT(*) AS changes, SUM(f.additions + f.deletions) AS lines "
+            "FROM file_changes f JOIN commits c ON c.repo = f.repo AND c.hash = f.hash WHERE f.repo = ?"
+        )
+        params: List[Any] = [self.repo_key(repo_url)]
+        if since:
+            sql += " AND c.day >= ?"
+            params.append(since)
+        if until:
+            sql += " AND c.day < ?"
+            params.append(until)
+        sql += " GROUP BY f.path ORDER BY changes DESC, lines DESC LIMIT ?"
+        params.append(limit)
+        return self._query(sql, tuple(params))
+
+    def busiest_days(self, repo_url: str, limit: int) -> List[Tuple[str, int]]:
+        return self._query(
+            "SELECT day, COUNT(*) AS commits FROM commits WHERE repo = ? GROUP BY day ORDER BY commits DESC, day DESC LIMIT ?",
+            (self.repo_key(repo_url), limit),
+        )
+
+    def last_commit(self, repo_url: str) -> Optional[Tuple[str, str, str, str]]:
+        rows = self._query(
+            "SELECT hash, author, date, message FROM commits WHERE repo = ? ORDER BY date DESC LIMIT 1",
+            (self.repo_key(repo_url),),
+        )
+        return rows[0] if rows else None
+
+    def count_issues(
+        self,
+        repo_url: str,
+        state: Optional[str] = None,
+        pull_requests: Optional[bool] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+    ) -> int:
+        sql = "SELECT COUNT(*) FROM issues WHERE repo = ?"
+        params: List[Any] = [self.repo_key(repo_url)]
+        if state:
+            sql += " AND state = ?"
+            params.append(state)
+        if pull_requests is not None:
+            sql += " AND is_pull_request = ?"
+            params.append(int(pull_requests))
+        if since:
+            sql += " AND day >= ?"
+            params.append(since)
+        if until:
+            sql += " AND day < ?"
+            params.append(until)
+        return self._query(sql, tuple(params))[0][0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
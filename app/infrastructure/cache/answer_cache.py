@@ -0,0 +1,128 @@
+import base64
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.utils.helpers import extract_repo_name_and_owner
+
+
+class SemanticAnswerCache:
+    """
+    Per-repository cache of generated answers, looked up by question similarity.
+
+    Each repository has a Redis list of recent entries (question, answer, question
+    embedding, index version) and a version counter. `invalidate` bumps the counter
+    and drops the list when the repository is re-indexed; entries tagged with an older
+    version are ignored, so answers generated while a re-index was running are never
+    served afterwards. A lookup is a single pipelined round trip and the similarity
+    scan is done in numpy over at most settings.SEMANTIC_CACHE_MAX_ENTRIES vectors.
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        ttl_seconds: Optional[int] = None,
+    ):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        self.threshold = threshold or settings.SEMANTIC_CACHE_THRESHOLD
+        self.max_entries = max_entries or settings.SEMANTIC_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.SEMANTIC_CACHE_TTL_SECONDS
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    @staticmethod
+    def _keys(repo_url: str) -> Tuple[str, str]:
+        repo = extract_repo_name_and_owner(repo_url).lower()
+        return f"answer_cache:{repo}:entries", f"answer_cache:{repo}:version"
+
+    @staticmethod
+    def _encode(embedding: List[float]) -> str:
+        return base64.b64encode(np.asarray(embedding, dtype=np.float32).tobytes()).decode("ascii")
+
+    @staticmethod
+    def _decode(data: str) -> np.ndarray:
+        return np.frombuffer(base64.b64decode(data), dtype=np.float32)
+
+    async def lookup(self, repo_url: str, query_embedding: List[float]) -> Tuple[Optional[str], int]:
+        """
+        Finds the cached answer to the most similar previous question about a repository.
+
+        Args:
+            repo_url (str): The repository the question is about.
+            query_embedding (List[float]): The embedding of the new question.
+
+        Returns:
+            Tuple[Optional[str], int]: The cached answer (None on a miss) and the current
+            index version, to be passed back to `store` for the freshly generated answer.
+        """
+        entries_key, version_key = self._keys(repo_url)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(version_key)
+            pipe.lrange(entries_key, 0, -1)
+            version, raw_entries = await pipe.execute()
+        version = int(version or 0)
+
+        entries = [json.loads(raw) for raw in raw_entries]
+        entries = [entry for entry in entries if entry["version"] == version]
+        if entries:
+            query = np.asarray(query_embedding, dtype=np.float32)
+            matrix = np.stack([self._decode(entry["embedding"]) for entry in entries])
+            scores = matrix @ query / (np.linalg.norm(matrix, axis=1) * np.linalg.norm(query) + 1e-12)
+            best = int(np.argmax(scores))
+            if scores[best] >= self.threshold:
+                self._stats["hits"] += 1
+                logging.info(f"Semantic cache hit for {repo_url} (similarity {scores[best]:.3f})")
+                return entries[best]["answer"], version
+
+        self._stats["misses"] += 1
+        return None, version
+
+    async def store(self, repo_url: str, version: int, question: str, query_embedding: List[float], answer: str) -> None:
+        """
+        Caches a generated answer under the index version it was produced against.
+
+        Args:
+            repo_url (str): The repository the question is about.
+            version (int): The index version returned by `lookup`.
+            question (str): The question that was answered.
+            query_embedding (List[float]): The embedding of the question.
+            answer (str): The generated answer.
+        """
+        if not answer:
+            return
+
+        entries_key, _ = self._keys(repo_url)
+        entry = {
+            "version": version,
+            "question": question,
+            "answer": answer,
+            "embedding": self._encode(query_embedding),
+        }
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.lpush(entries_key, json.dumps(entry))
+            pipe.ltrim(entries_key, 0, self.max_entries - 1)
+            pipe.expire(entries_key, self.ttl_seconds)
+            await pipe.execute()
+
+    async def invalidate(self, repo_url: str) -> None:
+        """
+        Drops every cached answer of a repository; call it after the repository is (re-)indexed.
+        """
+        entries_key, version_key = self._keys(repo_url)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.incr(version_key)
+            pipe.delete(entries_key)
+            await pipe.execute()
+        self._stats["invalidations"] += 1
+        logging.info(f"Semantic cache invalidated for {repo_url}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self._stats["hits"] + self._stats["misses"]
+        return {**self._stats, "hit_ratio": self._stats["hits"] / lookups if lookups else 0.0}
+
+    async def close(self) -> None:
+        await self.redis.aclose()
@@ -0,0 +1,116 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+
+SQLITE_MAX_VARIABLES = 500
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embeddings keyed by sha256(model name + text).
+
+    Lookups go to an in-memory LRU first and then to a SQLite table holding the raw
+    float32 bytes of each vector; disk hits are promoted to the LRU. Hit and miss
+    counters are kept per tier.
+    """
+
+    def __init__(self, model_name: str, path: Optional[str] = None, memory_size: Optional[int] = None):
+        self.model_name = model_name
+        self.memory_size = memory_size or settings.EMBEDDING_CACHE_MEMORY_SIZE
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+        path = path or settings.EMBEDDING_CACHE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._conn.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Looks up the embedding of every text.
+
+        Args:
+            texts (List[str]): The texts to look up.
+
+        Returns:
+            List[Optional[np.ndarray]]: The cached float32 vector of each text, or None on a miss.
+        """
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+
+        with self._lock:
+            for key in keys:
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+            self._stats["memory_hits"] += len(found)
+
+            missing = list({key for key in keys if key not in found})
+            for start in range(0, len(missing), SQLITE_MAX_VARIABLES):
+                batch = missing[start:start + SQLITE_MAX_VARIABLES]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = np.frombuffer(blob, dtype=np.float32)
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self._stats["disk_hits"] += 1
+
+            self._stats["misses"] += sum(1 for key in keys if key not in found)
+
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """
+        Stores the embedding of every text in both tiers.
+
+        Args:
+            texts (List[str]): The encoded texts.
+            vectors (np.ndarray): A (len(texts), dimension) matrix with their embeddings.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        rows = []
+
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = self._key(text)
+                vector = vector.copy()
+                self._remember(key, vector)
+                rows.append((key, vector.tobytes()))
+
+            self._conn.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)", rows)
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_ratio"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        stats["memory_entries"] = len(self._memory)
+        return stats
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,125 @@
+import asyncio
+import logging
+import os
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from pydriller import Git
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TRUNCATED_DIFF_MARKER = "\n... [diff truncated]"
+
+
+def _list_commits(repo_dir: str, since_commit: Optional[str] = None) -> List[str]:
+    """
+    Hashes of the commits reachable from HEAD, oldest first, excluding since_commit and its ancestors.
+    """
+    revision = f"{since_commit}..HEAD" if since_commit else "HEAD"
+    result = subprocess.run(
+        ["git", "rev-list", "--reverse", revision],
+        cwd=repo_dir,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return result.stdout.split()
+
+
+def _shape_diff(diff: str, skip_diffs: bool, max_diff_size: Optional[int], large_diff_mode: str) -> Optional[str]:
+    if skip_diffs:
+        return None
+    if max_diff_size is not None and len(diff) > max_diff_size:
+        if large_diff_mode == "skip":
+            return None
+        return diff[:max_diff_size] + TRUNCATED_DIFF_MARKER
+    return diff
+
+
+def _mine_shard(
+    repo_dir: str,
+    hashes: List[str],
+    skip_diffs: bool,
+    max_diff_size: Optional[int],
+    large_diff_mode: str,
+) -> List[dict]:
+    """
+    Extracts commit and per-file information for one shard of commits. Runs in a worker process.
+    """
+    git = Git(repo_dir)
+    commits = []
+
+    try:
+        for commit_hash in hashes:
+            commit = git.get_commit(commit_hash)
+            commit_info = {
+                "hash": commit.hash,
+                "author": commit.author.name,
+                "date": commit.author_date.isoformat(),
+                "message": commit.msg,
+                "files": []
+            }
+
+            for modified_file in commit.modified_files:
+                commit_info["files"].append({
+                    "filename": modified_file.filename,
+                    "path": modified_file.new_path or modified_file.old_path,
+                    "changes": modified_file.change_type.name,
+                    "additions": modified_file.added_lines,
+                    "deletions": modified_file.deleted_lines,
+                    "diff": _shape_diff(modified_file.diff, skip_diffs, max_diff_size, large_diff_mode)
+                })
+
+            commits.append(commit_info)
+    finally:
+        git.clear()
+
+    return commits
+
+
+def _shard(hashes: List[str], workers: int, min_shard_size: int) -> List[List[str]]:
+    shard_count = max(1, min(workers, len(hashes) // max(min_shard_size, 1)))
+    shard_size = -(-len(hashes) // shard_count)
+    return [hashes[i:i + shard_size] for i in range(0, len(hashes), shard_size)]
+
+
+async def mine_commits(repo_dir: str, since_commit: Optional[str] = None) -> List[dict]:
+    """
+    Mines the commits of a local clone in parallel.
+
+    The commit list (oldest first) is split into contiguous ranges of at least
+    settings.MINING_MIN_SHARD_SIZE commits, each range is mined in a separate process
+    with pydriller, and the results are concatenated back in history order. Small
+    histories are mined in a single worker thread. Diffs are dropped when
+    settings.MINING_SKIP_DIFFS is set, and diffs above settings.MINING_MAX_DIFF_SIZE
+    characters are truncated or dropped according to settings.MINING_LARGE_DIFF_MODE.
+
+    Args:
+        repo_dir (str): Path to the local clone.
+        since_commit (Optional[str]): Only commits after this one are mined.
+
+    Returns:
+        List[dict]: One commit_info dict per commit, oldest first.
+    """
+    hashes = await asyncio.to_thread(_list_commits, repo_dir, since_commit)
+    if not hashes:
+        return []
+
+    workers = settings.MINING_WORKERS or os.cpu_count() or 1
+    shards = _shard(hashes, workers, settings.MINING_MIN_SHARD_SIZE)
+    options = (settings.MINING_SKIP_DIFFS, settings.MINING_MAX_DIFF_SIZE, settings.MINING_LARGE_DIFF_MODE)
+    logger.debug(f"Mining {len(hashes)} commits of {repo_dir} in {len(shards)} shard(s)")
+
+    if len(shards) == 1:
+        return await asyncio.to_thread(_mine_shard, repo_dir, shards[0], *options)
+
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        results = await asyncio.gather(*(
+            loop.run_in_executor(pool, _mine_shard, repo_dir, shard, *options) for shard in shards
+        ))
+
+    return [commit for shard in results for commit in shard]
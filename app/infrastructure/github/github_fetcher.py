@@ -0,0 +1,238 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import aiohttp
+from gidgethub import BadRequest, GitHubBroken, RateLimitExceeded
+from gidgethub.aiohttp import GitHubAPI
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ETagCache(MutableMapping):
+    """
+    The mapping gidgethub uses for conditional requests, stored in a SQLite table:
+    url -> (etag, last_modified, data, next_url). Unlike a shelve file it can be
+    opened by several worker processes at once, and every entry is committed on write.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or settings.GITHUB_CACHE_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS etags (url TEXT PRIMARY KEY, entry TEXT NOT NULL)")
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, url: str) -> Tuple[Any, ...]:
+        with self._lock:
+            row = self._conn.execute("SELECT entry FROM etags WHERE url = ?", (url,)).fetchone()
+        if row is None:
+            raise KeyError(url)
+        return tuple(json.loads(row[0]))
+
+    def __setitem__(self, url: str, entry: Tuple[Any, ...]) -> None:
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO etags (url, entry) VALUES (?, ?)", (url, json.dumps(entry)))
+            self._conn.commit()
+
+    def __delitem__(self, url: str) -> None:
+        with self._lock:
+            deleted = self._conn.execute("DELETE FROM etags WHERE url = ?", (url,)).rowcount
+            self._conn.commit()
+        if not deleted:
+            raise KeyError(url)
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            urls = [row[0] for row in self._conn.execute("SELECT url FROM etags")]
+        return iter(urls)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM etags").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_etag_cache: Optional[ETagCache] = None
+
+
+def get_etag_cache() -> ETagCache:
+    """
+    Returns the process-wide on-disk cache gidgethub uses for conditional requests.
+    Every cached GET stores its ETag/Last-Modified, so repeated fetches are answered
+    with 304 Not Modified, which does not count against the rate limit.
+    """
+    global _etag_cache
+    if _etag_cache is None:
+        _etag_cache = ETagCache()
+    return _etag_cache
+
+
+def close_etag_cache() -> None:
+    global _etag_cache
+    if _etag_cache is not None:
+        _etag_cache.close()
+        _etag_cache = None
+
+
+class GitHubFetcher:
+    """
+    GitHub REST client on top of gidgethub that paginates list endpoints with bounded
+    concurrency, reuses an ETag cache across runs and backs off according to the
+    rate-limit headers. The API root comes from settings.GITHUB_API_URL, so it can be
+    pointed at a local stub server.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        github_token: Optional[str] = None,
+        cache=None,
+        base_url: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        per_page: Optional[int] = None,
+    ):
+        self.gh = GitHubAPI(
+            session,
+            "repo-insight-bot",
+            oauth_token=github_token,
+            cache=cache,
+            base_url=base_url or settings.GITHUB_API_URL,
+        )
+        self.per_page = per_page or settings.GITHUB_PER_PAGE
+        self.concurrency = concurrency or settings.GITHUB_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    async def _wait_for_rate_limit(self) -> None:
+        rate_limit = self.gh.rate_limit
+        if rate_limit is None or rate_limit.remaining > settings.GITHUB_RATE_LIMIT_RESERVE:
+            return
+
+        delay = (rate_limit.reset_datetime - datetime.now(timezone.utc)).total_seconds()
+        if delay > 0:
+            logger.warning(f"GitHub rate limit nearly exhausted ({rate_limit}); sleeping {delay:.0f}s")
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _retry_delay(error: Exception, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying after `error`, or None if it should not be retried."""
+        if isinstance(error, RateLimitExceeded):
+            reset = error.rate_limit.reset_datetime if error.rate_limit else None
+            if reset is not None:
+                return max((reset - datetime.now(timezone.utc)).total_seconds(), 1.0)
+            return 2.0 ** attempt
+
+        if isinstance(error, BadRequest) and error.status_code in (403, 429):
+            headers = getattr(error, "headers", None) or {}
+            retry_after = headers.get("retry-after")
+            return float(retry_after) if retry_after else 2.0 ** attempt
+
+        if isinstance(error, (GitHubBroken, aiohttp.ClientError, asyncio.TimeoutError)):
+            return 2.0 ** attempt
+
+        return None
+
+    async def get(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GETs a single resource, retrying on rate limiting, secondary rate limits and server errors.
+
+        Args:
+            url (str): The API path, e.g. "/repos/{owner}/{repo}".
+            params (Optional[Dict[str, Any]]): Query string parameters.
+
+        Returns:
+            Any: The decoded JSON body (served from the ETag cache on 304).
+        """
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        for attempt in range(1, settings.GITHUB_MAX_RETRIES + 1):
+            await self._wait_for_rate_limit()
+            try:
+                async with self._semaphore:
+                    return await self.gh.getitem(url)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt == settings.GITHUB_MAX_RETRIES:
+                    raise
+                delay = min(delay, settings.GITHUB_MAX_BACKOFF)
+                logger.warning(f"GET {url} failed ({e!r}); retrying in {delay:.0f}s")
+                await asyncio.sleep(delay)
+
+    async def get_all(self, url: str, params: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """
+        Fetches every page of a list endpoint. The first page is requested on its own, so
+        a list that fits in one page costs one request. After that up to `concurrency`
+        pages are in flight at a time, each finished page making room for the next one,
+        and no further page is requested once a short page marks the end of the list.
+
+        Args:
+            url (str): The API path of a list endpoint.
+            params (Optional[Dict[str, Any]]): Query string parameters (page/per_page are managed here).
+
+        Returns:
+            List[Any]: The items of all pages, in page order.
+        """
+        params = {**(params or {}), "per_page": self.per_page}
+        pages = {1: await self.get(url, {**params, "page": 1})}
+        last_page = 1 if len(pages[1]) < self.per_page else None
+        next_page = 2
+        pending: Dict[asyncio.Task, int] = {}
+
+        try:
+            while True:
+                while last_page is None and len(pending) < self.concurrency:
+                    pending[asyncio.ensure_future(self.get(url, {**params, "page": next_page}))] = next_page
+                    next_page += 1
+                if not pending:
+                    break
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    page = pending.pop(task)
+                    pages[page] = task.result()
+                    if len(pages[page]) < self.per_page:
+                        last_page = min(last_page or page, page)
+        finally:
+            for task in pending:
+                task.cancel()
+
+        items = []
+        for page in range(1, last_page + 1):
+            items.extend(pages[page])
+        return items
+
+    async def fetch_repository(self, owner: str, repo: str) -> dict:
+        return await self.get(f"/repos/{owner}/{repo}")
+
+    async def fetch_issues(self, owner: str, repo: str, since: Optional[str] = None, state: str = "all") -> List[dict]:
+        """
+        Fetches the issues and pull requests of a repository, optionally only those updated since a timestamp.
+
+        Args:
+            owner (str): The repository owner.
+            repo (str): The repository name.
+            since (Optional[str]): ISO 8601 timestamp; only issues updated at or after it are returned.
+            state (str): "open", "closed" or "all". Defaults to "all".
+
+        Returns:
+            List[dict]: The issues as returned by the GitHub API.
+        """
+        params = {"state": state, "sort": "created", "direction": "asc"}
+        if since:
+            params["since"] = since
+        return await self.get_all(f"/repos/{owner}/{repo}/issues", params)
@@ -2,35 +2,48 @@ import logging
 import os
 import asyncio
 import json
-from pydriller import Repository, ModificationType
+from datetime import datetime, timezone
+from typing import Optional
+from pydriller import ModificationType
+from app.core.config import settings
+from app.domain.schema.ingestion_job import IngestionJob
+from app.infrastructure.github.commit_miner import mine_commits
 from app.utils.helpers import (
     find_and_convert_in_dir,
-    extract_repo_name,
-    extract_repo_name_and_owner
+    extract_repo_name_and_owner,
+    get_repo_path
 )
+from app.utils.repository_data import iter_metadata_records
+from app.infrastructure.github.github_fetcher import GitHubFetcher, get_etag_cache
 import aiohttp
-from gidgethub.aiohttp import GitHubAPI
 
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
 class GitHubRepoProcessor:
-    def __init__(self, github_token, local_path="data"):
+    def __init__(self, github_token, local_path=settings.DATA_DIR):
         self.github_token = github_token
         self.local_path = local_path
         self.session = aiohttp.ClientSession()
-        self.gh = GitHubAPI(self.session, "my-app", oauth_token=github_token)
+        self.fetcher = GitHubFetcher(self.session, github_token, cache=get_etag_cache())
 
-    async def clone_repo(self, repo_url):
-        repo_name = extract_repo_name(repo_url)
+    async def clone_repo(self, repo_url, progress: Optional[IngestionJob] = None):
+        repo_name = get_repo_path(repo_url)
         repo_dir = os.path.join(self.local_path, repo_name)
 
         if not os.path.isdir(repo_dir):
             try:
                 logger.debug(f"Cloning repository: {repo_url}")
+                if progress is not None:
+                    progress.start("clone")
+                os.makedirs(os.path.dirname(repo_dir), exist_ok=True)
                 process = await asyncio.create_subprocess_exec(
-                    "git", "clone", repo_url,
-                    cwd=self.local_path,
+                    "git", "clone", repo_url, os.path.abspath(repo_dir),
                     stdout=asyncio.subprocess.PIPE,
                     stderr=asyncio.subprocess.PIPE
                 )
@@ -38,9 +51,13 @@ class GitHubRepoProcessor:
 
                 if process.returncode == 0:
                     if os.path.isdir(repo_dir):
-                        meta_data = await self.form_metadata(repo_url)
+                        if progress is not None:
+                            progress.finish("clone", 1)
+                        synced_at = _utc_now()
+                        meta_data = await self.form_metadata(repo_url, progress=progress)
                         self._save_metadata(repo_dir, meta_data)
-                        find_and_convert_in_dir(repo_dir)
+                        self._save_sync_state(repo_name, self._build_sync_state(meta_data, synced_at))
+                        await self._convert(repo_dir, progress)
                         return {"status": "success", "message": f"Cloned repo {repo_url}"}
                     else:
                         logger.error(f"Repository directory {repo_dir} was not created.")
@@ -52,15 +69,87 @@ class GitHubRepoProcessor:
                 logger.exception(f"Exception occurred while cloning repo {repo_url}: {str(e)}")
                 return {"status": "error", "message": f"Exception occurred: {str(e)}"}
         else:
+            return await self.sync_repo(repo_url, progress)
+
+    @staticmethod
+    async def _convert(repo_dir: str, progress: Optional[IngestionJob] = None) -> None:
+        if progress is not None:
+            progress.start("convert")
+        summary = await asyncio.to_thread(find_and_convert_in_dir, repo_dir)
+        if progress is not None:
+            progress.finish("convert", summary["kept"])
+            progress.result["conversion"] = summary
+
+    async def sync_repo(self, repo_url: str, progress: Optional[IngestionJob] = None) -> dict:
+        """
+        Brings an existing clone up to date and mines only what changed since the last sync:
+        commits after the last indexed hash and issues updated since the last issue fetch.
+
+        The delta is appended to repository_data.txt and also written on its own to
+        settings.REPOSITORY_DELTA_FILE so it can be indexed without re-reading the whole history.
+        Day totals for every month touched by the delta are re-emitted with their merged values.
+        """
+        repo_name = get_repo_path(repo_url)
+        repo_dir = os.path.join(self.local_path, repo_name)
+
+        state = self._load_sync_state(repo_name)
+        if state is None:
             logger.info(f"Repo {repo_name} already exists locally")
             return {"status": "info", "message": f"Repo {repo_name} already exists locally"}
 
-    async def form_metadata(self, repo_url: str) -> dict:
+        try:
+            synced_at = _utc_now()
+            if progress is not None:
+                progress.start("clone")
+            await self._run_git(repo_dir, "fetch", "--quiet", "origin")
+            await self._run_git(repo_dir, "reset", "--hard", "--quiet", "origin/HEAD")
+            if progress is not None:
+                progress.finish("clone", 1)
+
+            delta = await self.form_metadata(
+                repo_url, since_commit=state["last_commit"], issues_since=state["issues_synced_at"], progress=progress
+            )
+            delta_metadata = self._merge_sync_state(state, delta, synced_at)
+
+            self._save_metadata(repo_dir, delta_metadata, file_name=settings.REPOSITORY_DELTA_FILE)
+            self._save_metadata(repo_dir, delta_metadata, append=True)
+            self._save_sync_state(repo_name, state)
+            await self._convert(repo_dir, progress)
+
+            return {
+                "status": "updated",
+                "message": f"Synced repo {repo_url}",
+                "new_commits": delta["total_commits"],
+                "updated_issues": delta["total_issues"],
+            }
+        except Exception as e:
+            logger.exception(f"Exception occurred while syncing repo {repo_url}: {str(e)}")
+            return {"status": "error", "message": f"Exception occurred: {str(e)}"}
+
+    @staticmethod
+    async def _run_git(repo_dir: str, *args: str) -> None:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            cwd=repo_dir,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE
+        )
+        _, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} failed: {stderr.decode()}")
+
+    async def form_metadata(
+        self,
+        repo_url: str,
+        since_commit: Optional[str] = None,
+        issues_since: Optional[str] = None,
+        progress: Optional[IngestionJob] = None,
+    ) -> dict:
         repo_name = extract_repo_name_and_owner(repo_url)
         owner, repo = repo_name.split('/')
         logger.debug(f"Processing repository: {repo_name}")
 
-        repo_data = await self.gh.getitem(f"/repos/{owner}/{repo}")
+        repo_data = await self.fetcher.fetch_repository(owner, repo)
         logger.debug(f"Repository data: {repo_data}")
 
         repository_data = {
@@ -76,29 +165,15 @@ class GitHubRepoProcessor:
             "issues_on_date": {}
         }
 
-        commits = []
-        for commit in Repository(repo_url).traverse_commits():
-            commit_info = {
-                "hash": commit.hash,
-                "author": commit.author.name,
-                "date": commit.author_date.isoformat(),
-                "message": commit.msg,
-                "files": []
-            }
+        repo_dir = os.path.join(self.local_path, get_repo_path(repo_url))
+        if progress is not None:
+            progress.start("mine")
+        commits = await mine_commits(repo_dir, since_commit)
+        if progress is not None:
+            progress.finish("mine", len(commits))
 
-            for modified_file in commit.modified_files:
-                mod_info = {
-                    "filename": modified_file.filename,
-                    "changes": modified_file.change_type,
-                    "additions": modified_file.added_lines,
-                    "deletions": modified_file.deleted_lines,
-                    "diff": modified_file.diff
-                }
-                commit_info["files"].append(mod_info)
-
-            commits.append(commit_info)
-
-            date = commit.author_date.date().isoformat()
+        for commit_info in commits:
+            date = commit_info["date"][:10]
             if date not in repository_data["commits_on_date"]:
                 repository_data["commits_on_date"][date] = {"total_commits_on_day": 0, "commits": []}
 
@@ -106,14 +181,21 @@ class GitHubRepoProcessor:
             repository_data["commits_on_date"][date]["total_commits_on_day"] += 1
 
         repository_data["total_commits"] = len(commits)
+        repository_data["last_commit"] = commits[-1]["hash"] if commits else since_commit
 
-        issues = await self.gh.getitem(f"/repos/{owner}/{repo}/issues")
-        logger.debug(f"Issues fetched: {issues}")
+        if progress is not None:
+            progress.start("fetch_issues")
+        issues = await self.fetcher.fetch_issues(owner, repo, since=issues_since)
+        if progress is not None:
+            progress.finish("fetch_issues", len(issues))
+        logger.debug(f"Issues fetched: {len(issues)}")
 
         for issue in issues:
             issue_info = {
                 "id": issue["id"],
+                "number": issue.get("number"),
                 "title": issue["title"],
+                "is_pull_request": "pull_request" in issue,
                 "state": issue["state"],
                 "created_at": issue["created_at"],
                 "updated_at": issue["updated_at"],
@@ -131,26 +213,12 @@ class GitHubRepoProcessor:
 
         return repository_data
 
-    async def close(self):
-        await self.session.close()
-
-    async def initialize_session(self):
-        if self.session is None or self.session.closed:
-            logger.debug("Initializing new aiohttp session")
-            self.session = aiohttp.ClientSession(base_url="https://api.github.com")
-
     async def fetch_all_issues(self, owner: str, repo: str) -> list | None:
-        await self.initialize_session()
-        url = f"/repos/{owner}/{repo}/issues"
         try:
-            logger.debug(f"Fetching issues from {url}")
-            async with self.session.get(url) as response:
-                response.raise_for_status()
-                issues = await response.json()
-                logger.debug(f"Issues fetched successfully: {issues}")
-                return issues
-        except aiohttp.ClientResponseError as e:
-            logger.error(f"HTTP error {e.status} while fetching issues from {owner}/{repo}: {e.message}")
+            logger.debug(f"Fetching issues from {owner}/{repo}")
+            issues = await self.fetcher.fetch_issues(owner, repo)
+            logger.debug(f"Issues fetched successfully: {len(issues)}")
+            return issues
         except Exception as e:
             logger.exception(f"Unexpected error while fetching issues from {owner}/{repo}: {e}")
         return None
@@ -159,12 +227,91 @@ class GitHubRepoProcessor:
         if self.session and not self.session.closed:
             await self.session.close()
 
-    import os
+    def _save_metadata(self, repo_dir: str, metadata: dict, file_name: Optional[str] = None, append: bool = False) -> None:
+        metadata_file = os.path.join(repo_dir, file_name or settings.REPOSITORY_DATA_FILE)
+        with open(metadata_file, "a" if append else "w", encoding='utf-8') as outfile:
+            for record in iter_metadata_records(metadata):
+                outfile.write(json.dumps(record, default=self._handle_commit))
+                outfile.write("\n")
 
-    def _save_metadata(self, repo_dir: str, metadata: dict) -> None:
-        metadata_file = os.path.join(repo_dir, "repository_data.txt")
-        with open(metadata_file, "w", encoding='utf-8') as outfile:
-            json.dump(metadata, outfile, indent=1, default=self._handle_commit)
+    def _sync_state_path(self, repo_name: str) -> str:
+        return os.path.join(self.local_path, f"{repo_name}.sync.json")
+
+    def _load_sync_state(self, repo_name: str) -> Optional[dict]:
+        path = self._sync_state_path(repo_name)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as infile:
+            return json.load(infile)
+
+    def _save_sync_state(self, repo_name: str, state: dict) -> None:
+        path = self._sync_state_path(repo_name)
+        with open(path + ".tmp", "w", encoding="utf-8") as outfile:
+            json.dump(state, outfile)
+        os.replace(path + ".tmp", path)
+
+    @staticmethod
+    def _build_sync_state(metadata: dict, synced_at: str) -> dict:
+        return {
+            "last_commit": metadata.get("last_commit"),
+            "issues_synced_at": synced_at,
+            "commits_per_day": {
+                date: day["total_commits_on_day"] for date, day in metadata["commits_on_date"].items()
+            },
+            "issues_per_day": {
+                date: day["total_issues_on_day"] for date, day in metadata["issues_on_date"].items()
+            },
+            "issue_ids": sorted(
+                issue["id"] for day in metadata["issues_on_date"].values() for issue in day["issues"]
+            ),
+        }
+
+    @staticmethod
+    def _merge_sync_state(state: dict, delta: dict, synced_at: str) -> dict:
+        """
+        Folds the delta into the sync state (in place) and returns the metadata to write:
+        the delta commits and issues plus the merged totals of every day in the months the
+        delta touches, so month-level activity chunks are rebuilt with complete numbers.
+        """
+        commits_per_day = state["commits_per_day"]
+        issues_per_day = state["issues_per_day"]
+        known_issues = set(state["issue_ids"])
+        touched_months = set()
+
+        for date, day in delta["commits_on_date"].items():
+            commits_per_day[date] = commits_per_day.get(date, 0) + day["total_commits_on_day"]
+            touched_months.add(date[:7])
+
+        for date, day in delta["issues_on_date"].items():
+            new_issues = {issue["id"] for issue in day["issues"]} - known_issues
+            issues_per_day[date] = issues_per_day.get(date, 0) + len(new_issues)
+            known_issues |= new_issues
+            touched_months.add(date[:7])
+
+        state["last_commit"] = delta["last_commit"]
+        state["issues_synced_at"] = synced_at
+        state["issue_ids"] = sorted(known_issues)
+
+        days = sorted(date for date in set(commits_per_day) | set(issues_per_day) if date[:7] in touched_months)
+        return {
+            **{key: value for key, value in delta.items() if key not in ("commits_on_date", "issues_on_date")},
+            "total_commits": sum(commits_per_day.values()),
+            "total_issues": len(known_issues),
+            "commits_on_date": {
+                date: {
+                    "total_commits_on_day": commits_per_day.get(date, 0),
+                    "commits": delta["commits_on_date"].get(date, {}).get("commits", []),
+                }
+                for date in days
+            },
+            "issues_on_date": {
+                date: {
+                    "total_issues_on_day": issues_per_day.get(date, 0),
+                    "issues": delta["issues_on_date"].get(date, {}).get("issues", []),
+                }
+                for date in days
+            },
+        }
 
     def _handle_commit(self, obj):
         if isinstance(obj, ModificationType):
@@ -0,0 +1,150 @@
+import logging
+import os
+import re
+import subprocess
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.utils.helpers import BINARY_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+LANGUAGES = {
+    ".py": "python", ".pyi": "python",
+    ".js": "javascript", ".jsx": "javascript", ".mjs": "javascript", ".cjs": "javascript",
+    ".ts": "typescript", ".tsx": "typescript",
+    ".java": "java", ".kt": "kotlin", ".kts": "kotlin", ".scala": "scala", ".groovy": "groovy",
+    ".go": "go", ".rs": "rust", ".c": "c", ".h": "c", ".cc": "cpp", ".cpp": "cpp", ".cxx": "cpp",
+    ".hpp": "cpp", ".hh": "cpp", ".cs": "csharp", ".swift": "swift", ".m": "objective-c",
+    ".rb": "ruby", ".php": "php", ".pl": "perl", ".pm": "perl", ".lua": "lua", ".r": "r",
+    ".ex": "elixir", ".exs": "elixir", ".erl": "erlang", ".hs": "haskell", ".clj": "clojure",
+    ".dart": "dart", ".vue": "vue", ".svelte": "svelte",
+    ".sh": "shell", ".bash": "shell", ".zsh": "shell", ".ps1": "powershell",
+    ".sql": "sql", ".html": "html", ".css": "css", ".scss": "css", ".less": "css",
+    ".md": "markdown", ".rst": "rst", ".txt": "text",
+    ".json": "json", ".yaml": "yaml", ".yml": "yaml", ".toml": "toml", ".ini": "ini", ".cfg": "ini",
+    ".xml": "xml", ".proto": "protobuf", ".graphql": "graphql", ".tf": "terraform",
+}
+LANGUAGE_FILENAMES = {"Dockerfile": "dockerfile", "Makefile": "make", "CMakeLists.txt": "cmake"}
+
+VENDORED_DIRS = frozenset({
+    "node_modules", "bower_components", "vendor", "third_party", "third-party", "external",
+    "dist", "build", "out", "target", ".venv", "venv", "site-packages", "__pycache__",
+})
+GENERATED_FILES = re.compile(
+    r"(\.min\.(js|css)|\.map|\.lock|-lock\.json|-lock\.yaml|\.pb\.go|_pb2\.py|\.g\.dart|\.designer\.cs)$"
+    r"|(^|/)(go\.sum|package-lock\.json|composer\.lock)$"
+)
+GENERATED_MARKER = re.compile(r"@generated|DO NOT EDIT|auto-?generated", re.IGNORECASE)
+
+
+def detect_language(path: str) -> Optional[str]:
+    name = os.path.basename(path)
+    if name in LANGUAGE_FILENAMES:
+        return LANGUAGE_FILENAMES[name]
+    return LANGUAGES.get(os.path.splitext(name)[1].lower())
+
+
+def _is_vendored(path: str) -> bool:
+    parts = path.split("/")
+    return any(part in VENDORED_DIRS for part in parts[:-1]) or GENERATED_FILES.search(path) is not None
+
+
+def _list_blobs(repo_dir: str) -> List[Tuple[str, int, str]]:
+    """
+    (blob id, size, path) of every regular file tracked at HEAD. Only tracked files are
+    listed, so whatever .gitignore excludes never shows up; submodules and symlinks are skipped.
+    """
+    result = subprocess.run(
+        ["git", "ls-tree", "-r", "-z", "--long", "HEAD"],
+        cwd=repo_dir,
+        capture_output=True,
+        check=True,
+    )
+    blobs = []
+    for entry in result.stdout.decode("utf-8", errors="replace").split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        mode, object_type, blob_id, size = info.split()
+        if object_type != "blob" or mode == "120000":
+            continue
+        blobs.append((blob_id, int(size), path))
+    return blobs
+
+
+def head_blobs(repo_dir: str) -> Dict[str, str]:
+    """
+    Path -> blob id of every regular file tracked at HEAD.
+    """
+    return {path: blob_id for blob_id, _, path in _list_blobs(repo_dir)}
+
+
+def iter_source_files(repo_dir: str, max_file_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the source files of the repository at HEAD as "source" records.
+
+    Contents are read from the git object store (`git cat-file --batch`), not the working
+    tree, so the .txt conversion of the clone does not affect them. Files larger than
+    settings.SOURCE_MAX_FILE_BYTES, binaries, files with no known language, vendored and
+    generated files are skipped, and a blob that appears under several paths (copied or
+    vendored code) is indexed only once, since the blob id is a hash of its content.
+
+    Args:
+        repo_dir (str): Path to the local clone.
+        max_file_bytes (Optional[int]): Size cap per file. Defaults to settings.SOURCE_MAX_FILE_BYTES.
+
+    Returns:
+        Iterator[Dict[str, Any]]: Records with type, path, language, blob and text keys.
+    """
+    max_file_bytes = max_file_bytes or settings.SOURCE_MAX_FILE_BYTES
+    seen = set()
+    selected = []
+    skipped = 0
+    for blob_id, size, path in _list_blobs(repo_dir):
+        language = detect_language(path)
+        if (
+            blob_id in seen
+            or size == 0
+            or size > max_file_bytes
+            or language is None
+            or os.path.splitext(path)[1].lower() in BINARY_EXTENSIONS
+            or _is_vendored(path)
+        ):
+            skipped += 1
+            continue
+        seen.add(blob_id)
+        selected.append((blob_id, path, language))
+
+    logger.debug(f"Indexing {len(selected)} source files of {repo_dir} ({skipped} skipped)")
+
+    process = subprocess.Popen(
+        ["git", "cat-file", "--batch"],
+        cwd=repo_dir,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+    )
+    try:
+        for blob_id, path, language in selected:
+            process.stdin.write(f"{blob_id}\n".encode())
+            process.stdin.flush()
+            header = process.stdout.readline().split()
+            if len(header) < 3:
+                continue
+            content = process.stdout.read(int(header[2]))
+            process.stdout.read(1)
+
+            head = content[:settings.CONVERT_SAMPLE_BYTES]
+            if b"\0" in head or GENERATED_MARKER.search(head[:1024].decode("utf-8", errors="replace")):
+                continue
+
+            yield {
+                "type": "source",
+                "path": path,
+                "language": language,
+                "blob": blob_id,
+                "text": content.decode("utf-8", errors="replace"),
+            }
+    finally:
+        process.stdin.close()
+        process.wait()
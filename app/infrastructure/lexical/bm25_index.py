@@ -0,0 +1,180 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+from app.domain.schema.query import QueryResponse
+from app.utils.helpers import extract_repo_name_and_owner
+
+_TOKEN_RE = re.compile(r"[\w.\-/#]+")
+_HEX_RE = re.compile(r"^[0-9a-f]{7,40}$")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how i in is it its last me most "
+    "of on or show tell that the this to was were what when where which who why with "
+    "o a os as de do da dos das e é em no na nos nas um uma para por que qual quais quem "
+    "como quando onde foi foram mais".split()
+)
+
+
+class BM25Index:
+    """
+    Lexical (BM25) index over the same chunks that are embedded, for questions that
+    name exact identifiers: commit hashes, file paths, author logins, issue titles.
+
+    Each repository gets a SQLite FTS5 database under settings.LEXICAL_INDEX_DIR. Rows
+    are keyed by the chunk's point id, so re-ingesting a changed chunk replaces it in
+    place just like the vector store upsert does.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or settings.LEXICAL_INDEX_DIR
+        self._connections: Dict[str, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+
+    def _connection(self, repo_url: str) -> sqlite3.Connection:
+        name = extract_repo_name_and_owner(repo_url).replace("/", "__").lower()
+        with self._lock:
+            conn = self._connections.get(name)
+            if conn is None:
+                os.makedirs(self.index_dir, exist_ok=True)
+                conn = sqlite3.connect(os.path.join(self.index_dir, f"{name}.sqlite3"), check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5("
+                    "text, point_id UNINDEXED, payload UNINDEXED, tokenize=\"unicode61 tokenchars '_'\")"
+                )
+                conn.commit()
+                self._connections[name] = conn
+            return conn
+
+    @staticmethod
+    def _rowid(point_id: str) -> int:
+        return uuid.UUID(point_id).int >> 65
+
+    @staticmethod
+    def build_match_query(question: str) -> Optional[str]:
+        """
+        Turns a free-text question into an FTS5 OR-query of its non-stopword terms.
+        Hex strings that look like abbreviated commit hashes are matched as prefixes.
+        """
+        terms = []
+        for token in _TOKEN_RE.findall(question.lower()):
+            token = token.strip(".-/#")
+            if len(token) < 2 or token in STOPWORDS:
+                continue
+            quoted = '"' + token.replace('"', '""') + '"'
+            terms.append(quoted + "*" if _HEX_RE.match(token) else quoted)
+        return " OR ".join(dict.fromkeys(terms)) or None
+
+    def is_repo_indexed(self, repo_url: str) -> bool:
+        conn = self._connection(repo_url)
+        with self._lock:
+            return conn.execute("SELECT 1 FROM chunks LIMIT 1").fetchone() is not None
+
+    def save(self, repo_url: str, ids: List[str], chunks: List[str], payloads: List[Dict[str, Any]]) -> None:
+        """
+        Inserts or replaces chunks in the repository's lexical index.
+
+        Args:
+            repo_url (str): The repository the chunks belong to.
+            ids (List[str]): The point ids, shared with the vector store.
+            chunks (List[str]): The chunk texts.
+            payloads (List[Dict[str, Any]]): The chunk metadata.
+        """
+        conn = self._connection(repo_url)
+        with self._lock:
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks(rowid, text, point_id, payload) VALUES (?, ?, ?, ?)",
+                [
+                    (self._rowid(point_id), text, point_id, json.dumps(payload))
+                    for point_id, text, payload in zip(ids, chunks, payloads)
+                ],
+            )
+            conn.commit()
+
+    def delete_repo(self, repo_url: str) -> None:
+        conn = self._connection(repo_url)
+        with self._lock:
+            conn.execute("DELETE FROM chunks")
+            conn.commit()
+
+    def delete_matching(self, repo_url: str, payload_filter: Dict[str, Any]) -> None:
+        """
+        Deletes the chunks whose payload matches payload_filter (a list value matches any of its elements).
+        """
+        if not payload_filter:
+            return
+        conn = self._connection(repo_url)
+        with self._lock:
+            rowids = [
+                (rowid,)
+                for rowid, payload in conn.execute("SELECT rowid, payload FROM chunks")
+                if self._matches(json.loads(payload), payload_filter)
+            ]
+            conn.executemany("DELETE FROM chunks WHERE rowid = ?", rowids)
+            conn.commit()
+
+    @staticmethod
+    def _matches(payload: Dict[str, Any], payload_filter: Dict[str, Any]) -> bool:
+        for key, value in payload_filter.items():
+            if isinstance(value, (list, tuple, set)):
+                if payload.get(key) not in value:
+                    return False
+            elif payload.get(key) != value:
+                return False
+        return True
+
+    def query(
+        self,
+        repo_url: str,
+        question: str,
+        top_k: int = 3,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[QueryResponse]:
+        """
+        Ranks the repository's chunks against a question with BM25.
+
+        Args:
+            repo_url (str): The repository to search.
+            question (str): The user's question.
+            top_k (int): The number of hits to return.
+            payload_filter (Optional[Dict[str, Any]]): Payload field/value pairs every hit must match.
+
+        Returns:
+            List[QueryResponse]: The hits, best first; score is the (positive) BM25 score.
+        """
+        match = self.build_match_query(question)
+        if match is None:
+            return []
+
+        limit = top_k * settings.LOCAL_INDEX_FILTER_OVERSAMPLING if payload_filter else top_k
+        conn = self._connection(repo_url)
+        try:
+            rows = conn.execute(
+                "SELECT text, payload, bm25(chunks) FROM chunks WHERE chunks MATCH ? ORDER BY bm25(chunks) LIMIT ?",
+                (match, limit),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return []
+
+        results = []
+        for text, payload, rank in rows:
+            payload = json.loads(payload)
+            if payload_filter and not self._matches(payload, payload_filter):
+                continue
+            results.append(QueryResponse(text=text, score=-rank, metadata=payload))
+            if len(results) == top_k:
+                break
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
@@ -0,0 +1,595 @@
+import json
+import logging
+import math
+import mmap
+import os
+import shutil
+import struct
+import threading
+import uuid
+import zlib
+from contextlib import contextmanager
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.domain.schema.document import Document
+from app.domain.schema.query import QueryResponse
+from app.utils.helpers import extract_repo_name_and_owner, get_repo_path
+
+META_FILE = "meta.json"
+VECTORS_FILE = "vectors.f32"
+RECORDS_FILE = "records.jsonl"
+COMPRESSED_RECORDS_FILE = "records.zlib"
+QUANTIZED_VECTORS_FILE = "vectors.i8"
+QUANTIZATION_SCALES_FILE = "scales.f32"
+OFFSETS_FILE = "offsets.u64"
+IDS_FILE = "ids.txt"
+LIVE_FILE = "live.u8"
+IVF_CENTROIDS_FILE = "ivf_centroids.npy"
+IVF_ORDER_FILE = "ivf_order.npy"
+IVF_LIST_OFFSETS_FILE = "ivf_list_offsets.npy"
+SCORE_BLOCK_ROWS = 16384
+RECORD_LENGTH = struct.Struct("<I")
+
+
+def _ivf_file(path: str, file_name: str, generation: int) -> str:
+    """Generation 0 is the unsuffixed name used before IVF files were versioned."""
+    if generation:
+        stem, extension = os.path.splitext(file_name)
+        file_name = f"{stem}.{generation}{extension}"
+    return os.path.join(path, file_name)
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization: vectors ~= quantized * scales[:, None]."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first, without sorting the whole array."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class IVFIndex:
+    """
+    Inverted-file index over normalized vectors: spherical k-means centroids plus,
+    for each centroid, the contiguous run of row ids assigned to it.
+
+    `build` runs k-means; `add` only assigns new rows to the nearest existing centroid,
+    so it costs one pass over the new rows instead of a full rebuild.
+    """
+
+    def __init__(self, centroids: np.ndarray, order: np.ndarray, list_offsets: np.ndarray):
+        self.centroids = centroids
+        self.order = order
+        self.list_offsets = list_offsets
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, n_lists: Optional[int] = None, iterations: int = 10, seed: int = 0) -> "IVFIndex":
+        count = len(vectors)
+        n_lists = min(n_lists or int(4 * math.sqrt(count)), count)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(count, n_lists * 64)
+        sample = np.asarray(vectors[np.sort(rng.choice(count, sample_size, replace=False))])
+        centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignments, sample)
+            non_empty = np.bincount(assignments, minlength=n_lists) > 0
+            centroids[non_empty] = _normalize(sums[non_empty])
+
+        return cls._from_assignments(centroids, cls._assign(vectors, centroids))
+
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        assignments = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), SCORE_BLOCK_ROWS):
+            block = np.asarray(vectors[start:start + SCORE_BLOCK_ROWS])
+            assignments[start:start + SCORE_BLOCK_ROWS] = np.argmax(block @ centroids.T, axis=1)
+        return assignments
+
+    @classmethod
+    def _from_assignments(cls, centroids: np.ndarray, assignments: np.ndarray) -> "IVFIndex":
+        order = np.argsort(assignments, kind="stable").astype(np.int64)
+        counts = np.bincount(assignments, minlength=len(centroids))
+        list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        return cls(centroids, order, list_offsets)
+
+    def add(self, vectors: np.ndarray) -> "IVFIndex":
+        """
+        Returns the index extended with `vectors` as the rows following the indexed ones.
+        """
+        assignments = np.empty(len(self.order), dtype=np.int32)
+        assignments[np.asarray(self.order)] = np.repeat(
+            np.arange(len(self.centroids), dtype=np.int32), np.diff(self.list_offsets)
+        )
+        new_assignments = self._assign(vectors, self.centroids)
+        return self._from_assignments(self.centroids, np.concatenate([assignments, new_assignments]))
+
+    def candidates(self, query: np.ndarray, n_probe: int) -> np.ndarray:
+        n_probe = min(n_probe, len(self.centroids))
+        probes = _top_k(self.centroids @ query, n_probe)
+        return np.concatenate([self.order[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes])
+
+    def save(self, path: str, generation: int) -> None:
+        # Every save writes a new generation next to the current one; meta.json only points
+        # at it once the rows it covers are committed, so no reader sees a half-written index.
+        for file_name, array in (
+            (IVF_CENTROIDS_FILE, self.centroids),
+            (IVF_ORDER_FILE, self.order),
+            (IVF_LIST_OFFSETS_FILE, self.list_offsets),
+        ):
+            target = _ivf_file(path, file_name, generation)
+            with open(target + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(target + ".tmp", target)
+
+    @classmethod
+    def load(cls, path: str, generation: int) -> "IVFIndex":
+        return cls(
+            np.load(_ivf_file(path, IVF_CENTROIDS_FILE, generation)),
+            np.load(_ivf_file(path, IVF_ORDER_FILE, generation), mmap_mode="r"),
+            np.load(_ivf_file(path, IVF_LIST_OFFSETS_FILE, generation)),
+        )
+
+    @staticmethod
+    def remove(path: str, generation: int) -> None:
+        for file_name in (IVF_CENTROIDS_FILE, IVF_ORDER_FILE, IVF_LIST_OFFSETS_FILE):
+            target = _ivf_file(path, file_name, generation)
+            if os.path.exists(target):
+                os.remove(target)
+
+
+class _RepoIndex:
+    """
+    Read-only, memory-mapped view over the files of one repository index, as of the
+    meta.json it was opened with. Rows appended after that are ignored.
+    """
+
+    def __init__(self, path: str, meta: Dict[str, Any]):
+        self.path = path
+        self.readers = 0
+        self.retired = False
+        self.dimension = meta["dimension"]
+        self.count = meta["count"]
+        self.vectors = np.memmap(
+            os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(self.count, self.dimension)
+        )
+        self.quantized = None
+        self.scales = None
+        if meta.get("quantization") == "int8":
+            self.quantized = np.memmap(
+                os.path.join(path, QUANTIZED_VECTORS_FILE), dtype=np.int8, mode="r", shape=(self.count, self.dimension)
+            )
+            self.scales = np.memmap(
+                os.path.join(path, QUANTIZATION_SCALES_FILE), dtype=np.float32, mode="r", shape=(self.count,)
+            )
+        self.offsets = np.memmap(os.path.join(path, OFFSETS_FILE), dtype=np.uint64, mode="r", shape=(self.count,))
+        self.live = np.memmap(os.path.join(path, LIVE_FILE), dtype=np.uint8, mode="r", shape=(self.count,))
+        self.ivf = IVFIndex.load(path, meta.get("ivf_generation", 0)) if meta.get("ivf") else None
+
+        self.compressed = bool(meta.get("compressed"))
+        records_file = COMPRESSED_RECORDS_FILE if self.compressed else RECORDS_FILE
+        with open(os.path.join(path, records_file), "rb") as f:
+            self.records = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+            self.id_rows = {point_id.rstrip("\n"): row for row, point_id in enumerate(islice(f, self.count))}
+
+    def read_records(self, rows) -> List[Dict[str, Any]]:
+        records = []
+        for row in rows:
+            offset = int(self.offsets[row])
+            if self.compressed:
+                (length,) = RECORD_LENGTH.unpack_from(self.records, offset)
+                start = offset + RECORD_LENGTH.size
+                records.append(json.loads(zlib.decompress(self.records[start:start + length])))
+            else:
+                records.append(json.loads(self.records[offset:self.records.find(b"\n", offset)]))
+        return records
+
+    def scores(self, query: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Cosine similarity of the query to the given rows (all rows when None); deleted rows score -inf.
+        Quantized indexes return the int8 approximation, computed block by block so the
+        whole matrix is never expanded to float32 at once.
+        """
+        if self.quantized is None:
+            scores = (self.vectors[rows] if rows is not None else self.vectors) @ query
+        else:
+            count = len(rows) if rows is not None else self.count
+            scores = np.empty(count, dtype=np.float32)
+            for start in range(0, count, SCORE_BLOCK_ROWS):
+                block = rows[start:start + SCORE_BLOCK_ROWS] if rows is not None else slice(start, start + SCORE_BLOCK_ROWS)
+                scores[start:start + SCORE_BLOCK_ROWS] = (
+                    (self.quantized[block].astype(np.float32) @ query) * self.scales[block]
+                )
+        scores[(self.live[rows] if rows is not None else self.live) == 0] = -np.inf
+        return scores
+
+    def close(self) -> None:
+        self.records.close()
+
+
+class LocalVectorStore:
+    """
+    In-process implementation of the VectorStore protocol, the alternative to QdrantVectorStore.
+
+    Each repository gets a directory under settings.LOCAL_INDEX_DIR holding its
+    L2-normalized float32 embeddings in a flat file that is memory-mapped at query
+    time, the chunk records as JSON lines, and the byte offset of every record.
+    Queries are a single matrix-vector product followed by an argpartition top-k;
+    repositories with at least settings.LOCAL_INDEX_IVF_MIN_VECTORS chunks also get
+    an IVF index so only the closest clusters are scanned. The IVF centroids are
+    recomputed only when the index has grown by settings.LOCAL_INDEX_IVF_REBUILD_GROWTH
+    since they were last built; rows saved in between join their nearest centroid.
+
+    When settings.VECTOR_QUANTIZATION is set, new indexes also store an int8 copy of the
+    vectors with a per-row scale. The scan reads only that copy (a quarter of the
+    float32 bytes), and the top settings.VECTOR_RESCORE_OVERSAMPLING * k candidates are
+    rescored with their float32 rows. With settings.LOCAL_INDEX_COMPRESS_RECORDS each
+    record is stored zlib-compressed with a length prefix instead of as a JSON line.
+
+    Files are append-only: saving an id that already exists appends the new row and
+    clears the live flag of the old one. meta.json is written last and is what makes
+    appended rows visible; views are opened under the store lock, and a view replaced by
+    a save or delete is closed once the last query reading it is done.
+    """
+
+    def __init__(self, index_dir: Optional[str] = None):
+        self.index_dir = index_dir or settings.LOCAL_INDEX_DIR
+        self._indexes: Dict[str, _RepoIndex] = {}
+        self._lock = threading.RLock()
+
+    def _repo_path(self, repo_url: str) -> str:
+        return os.path.join(self.index_dir, get_repo_path(repo_url))
+
+    @staticmethod
+    def _read_meta(path: str) -> Optional[Dict[str, Any]]:
+        meta_file = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_file):
+            return None
+        with open(meta_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    @staticmethod
+    def _write_meta(path: str, meta: Dict[str, Any]) -> None:
+        tmp_file = os.path.join(path, META_FILE + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_file, os.path.join(path, META_FILE))
+
+    def _open(self, repo_url: str) -> _RepoIndex:
+        path = self._repo_path(repo_url)
+        with self._lock:
+            index = self._indexes.get(path)
+            if index is None:
+                meta = self._read_meta(path)
+                if meta is None:
+                    raise ValueError(f"Index for '{extract_repo_name_and_owner(repo_url)}' not found. Did you forget to save it first?")
+                index = _RepoIndex(path, meta)
+                self._indexes[path] = index
+            return index
+
+    @contextmanager
+    def _reading(self, repo_url: str) -> Iterator[_RepoIndex]:
+        with self._lock:
+            index = self._open(repo_url)
+            index.readers += 1
+        try:
+            yield index
+        finally:
+            with self._lock:
+                index.readers -= 1
+                if index.retired and not index.readers:
+                    index.close()
+
+    def _retire(self, path: str) -> None:
+        """Drops the cached view of `path`; must be called with the lock held."""
+        index = self._indexes.pop(path, None)
+        if index is not None:
+            index.retired = True
+            if not index.readers:
+                index.close()
+
+    def is_repo_processed(self, repo_url: str) -> bool:
+        return self._read_meta(self._repo_path(repo_url)) is not None
+
+    def count_points(self, repo_url: str) -> int:
+        if not self.is_repo_processed(repo_url):
+            return 0
+        with self._reading(repo_url) as index:
+            return int(np.count_nonzero(index.live))
+
+    def get_content_hashes(self, repo_url: str, ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns the stored content_hash of every id in `ids` that has a live row in the index.
+        Deleted rows stay in id_rows until compaction and must not count as present.
+        """
+        if not self.is_repo_processed(repo_url):
+            return {}
+
+        with self._reading(repo_url) as index:
+            found = [
+                (point_id, index.id_rows[point_id])
+                for point_id in ids
+                if point_id in index.id_rows and index.live[index.id_rows[point_id]]
+            ]
+            records = index.read_records([row for _, row in found])
+        return {point_id: record.get("content_hash") for (point_id, _), record in zip(found, records)}
+
+    @staticmethod
+    def _iter_live_records(index: _RepoIndex) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        live_rows = np.flatnonzero(index.live)
+        for start in range(0, len(live_rows), SCORE_BLOCK_ROWS):
+            rows = live_rows[start:start + SCORE_BLOCK_ROWS]
+            yield from zip(rows.tolist(), index.read_records(rows))
+
+    def get_source_blobs(self, repo_url: str) -> Dict[str, Set[str]]:
+        """
+        Returns, for every source file with indexed chunks, the git blob ids its chunks were built from.
+        """
+        if not self.is_repo_processed(repo_url):
+            return {}
+
+        blobs: Dict[str, Set[str]] = {}
+        with self._reading(repo_url) as index:
+            for _, record in self._iter_live_records(index):
+                if record.get("kind") == "source":
+                    blobs.setdefault(record.get("path"), set()).add(record.get("blob"))
+        return blobs
+
+    def delete_matching(self, repo_url: str, payload_filter: Dict[str, Any]) -> None:
+        """
+        Clears the live flag of every row whose record matches payload_filter
+        (a list value matches any of its elements).
+        """
+        if not payload_filter or not self.is_repo_processed(repo_url):
+            return
+
+        path = self._repo_path(repo_url)
+        with self._lock:
+            index = self._open(repo_url)
+            rows = [row for row, record in self._iter_live_records(index) if self._matches(record, payload_filter)]
+            if not rows:
+                return
+            live = np.memmap(os.path.join(path, LIVE_FILE), dtype=np.uint8, mode="r+", shape=(index.count,))
+            live[rows] = 0
+            live.flush()
+            del live
+            self._retire(path)
+
+    def save(
+        self,
+        repo_url: str,
+        chunks: List[str],
+        chunk_embeddings: np.ndarray,
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ):
+        """
+        Upserts the given chunks and their embeddings into the local index of the repository.
+
+        Args:
+            repo_url (str): The URL of the repository.
+            chunks (List[str]): A list of strings containing the text of each chunk.
+            chunk_embeddings (np.ndarray): A (len(chunks), dimension) float32 matrix with the embedding of each chunk.
+            payloads (Optional[List[Dict[str, Any]]]): Extra fields (hash, author, date, filename...) for each chunk.
+            ids (Optional[List[str]]): Point ids; rows with an existing id replace it. Random ids when omitted.
+        """
+        if not chunks:
+            return
+
+        payloads = payloads or [{}] * len(chunks)
+        ids = ids or [str(uuid.uuid4()) for _ in chunks]
+        path = self._repo_path(repo_url)
+
+        last_position = {point_id: i for i, point_id in enumerate(ids)}
+        keep = sorted(last_position.values())
+        chunks = [chunks[i] for i in keep]
+        payloads = [payloads[i] for i in keep]
+        ids = [ids[i] for i in keep]
+        embeddings = _normalize(np.asarray(chunk_embeddings, dtype=np.float32)[keep])
+
+        with self._lock:
+            os.makedirs(path, exist_ok=True)
+            meta = self._read_meta(path) or {
+                "dimension": embeddings.shape[1],
+                "count": 0,
+                "quantization": "int8" if settings.VECTOR_QUANTIZATION else None,
+                "compressed": settings.LOCAL_INDEX_COMPRESS_RECORDS,
+            }
+            if meta["dimension"] != embeddings.shape[1]:
+                raise ValueError(
+                    f"Embedding dimension {embeddings.shape[1]} does not match index dimension {meta['dimension']}."
+                )
+
+            stale_rows = []
+            if meta["count"]:
+                id_rows = self._open(repo_url).id_rows
+                stale_rows = [id_rows[point_id] for point_id in ids if point_id in id_rows]
+
+            with open(os.path.join(path, VECTORS_FILE), "ab") as f:
+                embeddings.tofile(f)
+
+            if meta.get("quantization") == "int8":
+                quantized, scales = _quantize(embeddings)
+                with open(os.path.join(path, QUANTIZED_VECTORS_FILE), "ab") as f:
+                    quantized.tofile(f)
+                with open(os.path.join(path, QUANTIZATION_SCALES_FILE), "ab") as f:
+                    scales.tofile(f)
+
+            offsets = np.empty(len(chunks), dtype=np.uint64)
+            records_file = COMPRESSED_RECORDS_FILE if meta.get("compressed") else RECORDS_FILE
+            with open(os.path.join(path, records_file), "ab") as f:
+                for i, chunk in enumerate(chunks):
+                    offsets[i] = f.tell()
+                    record = json.dumps({**payloads[i], "text": chunk}).encode("utf-8")
+                    if meta.get("compressed"):
+                        record = zlib.compress(record)
+                        f.write(RECORD_LENGTH.pack(len(record)) + record)
+                    else:
+                        f.write(record + b"\n")
+
+            with open(os.path.join(path, OFFSETS_FILE), "ab") as f:
+                offsets.tofile(f)
+
+            with open(os.path.join(path, IDS_FILE), "a", encoding="utf-8") as f:
+                f.writelines(f"{point_id}\n" for point_id in ids)
+
+            with open(os.path.join(path, LIVE_FILE), "ab") as f:
+                np.ones(len(chunks), dtype=np.uint8).tofile(f)
+
+            if stale_rows:
+                live = np.memmap(os.path.join(path, LIVE_FILE), dtype=np.uint8, mode="r+", shape=(meta["count"],))
+                live[stale_rows] = 0
+                live.flush()
+                del live
+
+            meta["count"] += len(chunks)
+            previous_ivf = meta.get("ivf_generation", 0) if meta.get("ivf") else None
+            if meta["count"] >= settings.LOCAL_INDEX_IVF_MIN_VECTORS:
+                built_count = meta.get("ivf_built_count", 0) if meta.get("ivf") else 0
+                if meta["count"] >= built_count * (1 + settings.LOCAL_INDEX_IVF_REBUILD_GROWTH):
+                    ivf = self._build_ivf(path, meta)
+                    meta["ivf_built_count"] = meta["count"]
+                else:
+                    ivf = IVFIndex.load(path, previous_ivf).add(embeddings)
+                meta["ivf_generation"] = (previous_ivf or 0) + 1
+                ivf.save(path, meta["ivf_generation"])
+                meta["ivf"] = True
+
+            self._write_meta(path, meta)
+            self._retire(path)
+            if previous_ivf is not None and previous_ivf != meta.get("ivf_generation"):
+                IVFIndex.remove(path, previous_ivf)
+
+    def delete_repo(self, repo_url: str) -> bool:
+        """
+        Removes the repository's index directory.
+
+        Returns:
+            bool: True if there was anything to delete.
+        """
+        path = self._repo_path(repo_url)
+        with self._lock:
+            self._retire(path)
+            if not os.path.isdir(path):
+                return False
+            shutil.rmtree(path)
+            return True
+
+    @staticmethod
+    def _build_ivf(path: str, meta: Dict[str, Any]) -> IVFIndex:
+        vectors = np.memmap(
+            os.path.join(path, VECTORS_FILE), dtype=np.float32, mode="r", shape=(meta["count"], meta["dimension"])
+        )
+        logging.info(f"Building IVF index over {meta['count']} vectors in {path}")
+        return IVFIndex.build(vectors, n_lists=settings.LOCAL_INDEX_IVF_LISTS)
+
+    def query(
+        self,
+        repo_url: str,
+        query_embedding: List[float],
+        top_k: int = 3,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[QueryResponse]:
+        """
+        Returns the top_k chunks of the repository with the highest cosine similarity to query_embedding.
+
+        Args:
+            repo_url (str): The URL of the repository.
+            query_embedding (List[float]): The query embedding.
+            top_k (int, optional): The number of top results to return. Defaults to 3.
+            score_threshold (Optional[float]): Hits scoring below this value are dropped.
+            payload_filter (Optional[Dict[str, Any]]): Record field/value pairs every hit must match.
+                Filtering is applied to an oversampled candidate set, so fewer than top_k hits may come back.
+
+        Returns:
+            List[QueryResponse]: A list of QueryResponse objects containing the text, score and payload of the top-k results.
+        """
+        with self._reading(repo_url) as index:
+            if index.count == 0:
+                return []
+
+            query = _normalize(np.asarray(query_embedding, dtype=np.float32))
+            rows = index.ivf.candidates(query, settings.LOCAL_INDEX_IVF_NPROBE) if index.ivf is not None else None
+            scores = index.scores(query, rows)
+
+            k = top_k * settings.LOCAL_INDEX_FILTER_OVERSAMPLING if payload_filter else top_k
+            if index.quantized is not None:
+                candidates = _top_k(scores, int(math.ceil(k * settings.VECTOR_RESCORE_OVERSAMPLING)))
+                candidates = candidates[np.isfinite(scores[candidates])]
+                candidate_rows = rows[candidates] if rows is not None else candidates
+                scores[candidates] = index.vectors[candidate_rows] @ query
+                best = candidates[_top_k(scores[candidates], k)]
+            else:
+                best = _top_k(scores, k)
+                best = best[np.isfinite(scores[best])]
+            if score_threshold is not None:
+                best = best[scores[best] >= score_threshold]
+
+            hit_rows = rows[best] if rows is not None else best
+            results = []
+            for record, score in zip(index.read_records(hit_rows), scores[best]):
+                if payload_filter and not self._matches(record, payload_filter):
+                    continue
+                text = record.pop("text")
+                results.append(QueryResponse(text=text, score=float(score), metadata=record))
+                if len(results) == top_k:
+                    break
+
+        return results
+
+    @staticmethod
+    def _matches(record: Dict[str, Any], payload_filter: Dict[str, Any]) -> bool:
+        for key, value in payload_filter.items():
+            if isinstance(value, (list, tuple, set)):
+                if record.get(key) not in value:
+                    return False
+            elif record.get(key) != value:
+                return False
+        return True
+
+    def get_all(self, repo_url: str) -> List[Document]:
+        """
+        Retrieves all documents from the local index of the given repository.
+
+        Args:
+            repo_url (str): The URL of the repository.
+
+        Returns:
+            List[Document]: A list of Document objects, each containing the text of a document and its normalized embedding.
+        """
+        with self._reading(repo_url) as index:
+            rows = np.flatnonzero(index.live)
+            records = index.read_records(rows)
+            return [
+                Document(text=record["text"], embedding=index.vectors[row].tolist())
+                for row, record in zip(rows, records)
+            ]
+
+    def close(self) -> None:
+        for index in self._indexes.values():
+            index.close()
+        self._indexes.clear()
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import redis.asyncio as redis
+from redis.exceptions import LockError, RedisError
+
+from app.core.config import settings
+from app.utils.helpers import extract_repo_name_and_owner
+
+
+class IngestionGuard:
+    """
+    Makes sure only one ingestion of a repository runs at a time across every API and
+    worker process.
+
+    `lock` is a per-repository mutex: an asyncio.Lock for the tasks of this process
+    plus a Redis lock (SET NX with a TTL, renewed while held) for the other processes.
+    If a renewal finds the lock gone (expired or taken over), the block holding it is
+    cancelled and fails with RuntimeError instead of running on unguarded.
+    `run` adds singleflight on top: concurrent callers in this process share a single
+    execution of the guarded function and all receive its result.
+    """
+
+    def __init__(self, lock_ttl: Optional[float] = None, wait_timeout: Optional[float] = None):
+        self.redis = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        self.lock_ttl = lock_ttl or settings.INGESTION_LOCK_TTL_SECONDS
+        self.wait_timeout = wait_timeout or settings.INGESTION_LOCK_WAIT_SECONDS
+        self._local_locks: Dict[str, asyncio.Lock] = {}
+        self._flights: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def _key(repo_url: str) -> str:
+        return extract_repo_name_and_owner(repo_url).lower()
+
+    async def is_locked(self, repo_url: str) -> bool:
+        """
+        True while any process is ingesting the repository.
+        """
+        key = self._key(repo_url)
+        local_lock = self._local_locks.get(key)
+        if local_lock is not None and local_lock.locked():
+            return True
+        return await self.redis.exists(f"lock:ingest:{key}") == 1
+
+    async def _keep_alive(self, lock, repo_url: str, holder: asyncio.Task) -> None:
+        while True:
+            await asyncio.sleep(self.lock_ttl / 3)
+            try:
+                await lock.reacquire()
+            except LockError as e:
+                logging.error(f"Lost the ingestion lock of {repo_url}: {e}")
+                holder.cancel()
+                raise
+            except RedisError as e:
+                # The TTL covers a few renewal intervals, so a transient failure is retried on the next tick.
+                logging.warning(f"Could not renew the ingestion lock of {repo_url}: {e}")
+
+    @staticmethod
+    def _lost(keep_alive: asyncio.Task) -> bool:
+        return keep_alive.done() and not keep_alive.cancelled() and keep_alive.exception() is not None
+
+    @asynccontextmanager
+    async def lock(self, repo_url: str) -> AsyncIterator[None]:
+        """
+        Holds the repository's ingestion lock for the duration of the block.
+
+        Raises:
+            TimeoutError: If the lock is not acquired within settings.INGESTION_LOCK_WAIT_SECONDS.
+            RuntimeError: If the lock is lost while the block is running.
+        """
+        key = self._key(repo_url)
+        local_lock = self._local_locks.setdefault(key, asyncio.Lock())
+
+        async with local_lock:
+            distributed = self.redis.lock(
+                f"lock:ingest:{key}", timeout=self.lock_ttl, blocking_timeout=self.wait_timeout, sleep=0.5
+            )
+            if not await distributed.acquire():
+                raise TimeoutError(f"Timed out waiting for the ingestion lock of {repo_url}")
+
+            holder = asyncio.current_task()
+            keep_alive = asyncio.create_task(self._keep_alive(distributed, repo_url, holder))
+            try:
+                yield
+            except asyncio.CancelledError:
+                if not self._lost(keep_alive):
+                    raise
+                if hasattr(holder, "uncancel"):
+                    holder.uncancel()
+                raise RuntimeError(f"Lost the ingestion lock of {repo_url}") from keep_alive.exception()
+            finally:
+                keep_alive.cancel()
+                await asyncio.gather(keep_alive, return_exceptions=True)
+                try:
+                    await distributed.release()
+                except Exception as e:
+                    logging.warning(f"Could not release the ingestion lock of {repo_url}: {e}")
+
+    async def run(self, repo_url: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs `fn` under the repository's lock, unless a call for the same repository is
+        already in flight in this process, in which case its result is awaited instead.
+        `fn` should re-check whether its work is still needed once it gets the lock.
+
+        Args:
+            repo_url (str): The repository being ingested.
+            fn (Callable[[], Awaitable[Any]]): The ingestion to run.
+
+        Returns:
+            Any: The result of the (shared) call.
+        """
+        key = self._key(repo_url)
+        flight = self._flights.get(key)
+        if flight is None:
+            async def guarded():
+                async with self.lock(repo_url):
+                    return await fn()
+
+            flight = asyncio.ensure_future(guarded())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        else:
+            logging.info(f"Joining in-flight ingestion of {repo_url}")
+
+        return await asyncio.shield(flight)
+
+    async def close(self) -> None:
+        await self.redis.aclose()
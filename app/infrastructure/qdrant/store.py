@@ -1,72 +1,359 @@
+import os
 import uuid
-from typing import List
+from typing import Any, Dict, List, Optional, Set
+import numpy as np
 from qdrant_client import QdrantClient
-from qdrant_client.models import PointStruct, VectorParams, Distance
+from qdrant_client.http.exceptions import UnexpectedResponse
+from qdrant_client.models import (
+    BinaryQuantization,
+    BinaryQuantizationConfig,
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    HnswConfigDiff,
+    KeywordIndexParams,
+    KeywordIndexType,
+    MatchAny,
+    MatchValue,
+    OptimizersConfigDiff,
+    PayloadSchemaType,
+    PointStruct,
+    QuantizationSearchParams,
+    ScalarQuantization,
+    ScalarQuantizationConfig,
+    ScalarType,
+    SearchParams,
+    VectorParams,
+)
 from app.core.config import settings
 from app.domain.schema.document import Document
 from app.domain.schema.query import QueryResponse
-from app.utils.helpers import extract_repo_name
+from app.utils.helpers import extract_repo_name_and_owner, get_repo_path
+
+PAYLOAD_INDEXES = {
+    "kind": PayloadSchemaType.KEYWORD,
+    "author": PayloadSchemaType.KEYWORD,
+    "date": PayloadSchemaType.KEYWORD,
+    "hash": PayloadSchemaType.KEYWORD,
+    "path": PayloadSchemaType.KEYWORD,
+    "language": PayloadSchemaType.KEYWORD,
+}
+# In the shared collection every extra index covers all tenants' points and slows every
+# upsert, so only the fields nearly every filtered search uses are indexed there; filters
+# on the rest are evaluated within the tenant's points, which the "repo" index narrows down.
+SHARED_PAYLOAD_INDEXES = {field: PAYLOAD_INDEXES[field] for field in ("kind", "language")}
 
 
 class QdrantVectorStore:
+    """
+    Vector store backed by Qdrant.
+
+    With settings.QDRANT_COLLECTION_LAYOUT = "per_repo" (the default) every repository
+    gets its own collection named "<owner>__<repo>", so same-named repositories of
+    different owners do not collide. With "shared", all repositories live in the sharded
+    settings.QDRANT_SHARED_COLLECTION. Every point there carries an owner/repo "repo"
+    payload field with a tenant index on it, and every read and delete is filtered by it,
+    so the per-collection overhead is paid once instead of once per repository.
+
+    With settings.VECTOR_QUANTIZATION set to "scalar" (int8) or "binary", new collections
+    keep a quantized copy of the vectors in RAM for the search itself and rescore the
+    oversampled candidates with the original vectors, which can then live on disk
+    (settings.QDRANT_VECTORS_ON_DISK). Payloads, chunk text included, can be kept on
+    disk as well (settings.QDRANT_ON_DISK_PAYLOAD) since only the top-k hits read them.
+
+    Collections are created with the HNSW/optimizer settings from settings.QDRANT_HNSW_*
+    and settings.QDRANT_INDEXING_THRESHOLD, plus keyword indexes on the payload fields
+    used in filters (PAYLOAD_INDEXES, or the smaller SHARED_PAYLOAD_INDEXES in the
+    shared collection).
+    """
+
     def __init__(self):
-        self.client = QdrantClient(url=settings.QDRANT_URL)
+        self.client = QdrantClient(
+            url=settings.QDRANT_URL,
+            prefer_grpc=settings.QDRANT_PREFER_GRPC,
+            grpc_port=settings.QDRANT_GRPC_PORT,
+        )
+
+    @staticmethod
+    def _quantization_config():
+        if settings.VECTOR_QUANTIZATION == "scalar":
+            return ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, quantile=0.99, always_ram=True)
+            )
+        if settings.VECTOR_QUANTIZATION == "binary":
+            return BinaryQuantization(binary=BinaryQuantizationConfig(always_ram=True))
+        return None
+
+    @staticmethod
+    def _search_params() -> Optional[SearchParams]:
+        if not settings.VECTOR_QUANTIZATION:
+            return None
+        return SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=settings.VECTOR_RESCORE_OVERSAMPLING)
+        )
+
+    @staticmethod
+    def _is_shared() -> bool:
+        return settings.QDRANT_COLLECTION_LAYOUT == "shared"
+
+    def _collection(self, repo_url: str) -> str:
+        if self._is_shared():
+            return settings.QDRANT_SHARED_COLLECTION
+        return get_repo_path(repo_url).replace(os.sep, "__")
+
+    def _filter(self, repo_url: str, payload_filter: Optional[Dict[str, Any]] = None) -> Optional[Filter]:
+        if self._is_shared():
+            payload_filter = {**(payload_filter or {}), "repo": extract_repo_name_and_owner(repo_url).lower()}
+        return self._build_filter(payload_filter)
 
     def is_repo_processed(self, repo_url: str) -> bool:
+        collection_name = self._collection(repo_url)
+        if not self.client.collection_exists(collection_name):
+            return False
+        if not self._is_shared():
+            return True
+        points, _ = self.client.scroll(
+            collection_name=collection_name,
+            scroll_filter=self._filter(repo_url),
+            limit=1,
+            with_payload=False,
+            with_vectors=False,
+        )
+        return bool(points)
 
-        return self.client.collection_exists(extract_repo_name(repo_url))
+    def count_points(self, repo_url: str) -> int:
+        collection_name = self._collection(repo_url)
+        if not self.client.collection_exists(collection_name):
+            return 0
+        return self.client.count(collection_name=collection_name, count_filter=self._filter(repo_url), exact=True).count
 
-    def save(self, repo_url: str, chunks: List[str], chunk_embeddings: List[List[float]]):
+    def save(
+        self,
+        repo_url: str,
+        chunks: List[str],
+        chunk_embeddings: np.ndarray,
+        payloads: Optional[List[Dict[str, Any]]] = None,
+        ids: Optional[List[str]] = None,
+    ):
         """
-        Saves the given chunks and chunk embeddings to the Qdrant collection for the given repository URL.
+        Upserts the given chunks and chunk embeddings to the Qdrant collection for the given repository URL.
+
+        Points are built lazily and sent with upload_points in batches of
+        settings.QDRANT_UPLOAD_BATCH_SIZE over settings.QDRANT_UPLOAD_PARALLEL workers,
+        retrying failed batches, so no single request has to carry the whole input.
 
         Args:
             repo_url (str): The URL of the repository.
             chunks (List[str]): A list of strings containing the text of each chunk.
-            chunk_embeddings (List[List[float]]): A list of lists of floats containing the embedding for each chunk.
+            chunk_embeddings (np.ndarray): A (len(chunks), dimension) float32 matrix with the embedding of each chunk.
+            payloads (Optional[List[Dict[str, Any]]]): Extra payload fields (hash, author, date, filename...) for each chunk.
+            ids (Optional[List[str]]): Point ids; points with an existing id are overwritten. Random ids when omitted.
         """
-        collection_name = extract_repo_name(repo_url)
+        collection_name = self._collection(repo_url)
+        payloads = payloads or [{}] * len(chunks)
+        ids = ids or [str(uuid.uuid4()) for _ in chunks]
+        chunk_embeddings = np.asarray(chunk_embeddings, dtype=np.float32)
+        tenant = {"repo": extract_repo_name_and_owner(repo_url).lower()} if self._is_shared() else {}
 
-        if not self.client.collection_exists(collection_name):
+        self._ensure_collection(collection_name, chunk_embeddings.shape[1])
+
+        points = (
+            PointStruct(
+                id=ids[i],
+                vector=chunk_embeddings[i].tolist(),
+                payload={**payloads[i], **tenant, "text": chunks[i]},
+            )
+            for i in range(len(chunks))
+        )
+        self.client.upload_points(
+            collection_name=collection_name,
+            points=points,
+            batch_size=settings.QDRANT_UPLOAD_BATCH_SIZE,
+            parallel=settings.QDRANT_UPLOAD_PARALLEL,
+            max_retries=settings.QDRANT_UPLOAD_MAX_RETRIES,
+            wait=True,
+        )
+
+    def _ensure_collection(self, collection_name: str, dimension: int) -> None:
+        if self.client.collection_exists(collection_name):
+            return
+
+        shared = self._is_shared()
+        try:
             self.client.create_collection(
                 collection_name=collection_name,
-                vectors_config=VectorParams(size=len(chunk_embeddings[0]), distance=Distance.COSINE),
+                vectors_config=VectorParams(
+                    size=dimension,
+                    distance=Distance.COSINE,
+                    on_disk=settings.QDRANT_VECTORS_ON_DISK,
+                ),
+                # In the shared layout searches are always filtered to one tenant, so only the
+                # per-tenant graphs (payload_m) are built, not a global one over every repository.
+                hnsw_config=HnswConfigDiff(
+                    m=0 if shared else settings.QDRANT_HNSW_M,
+                    payload_m=settings.QDRANT_HNSW_M if shared else None,
+                    ef_construct=settings.QDRANT_HNSW_EF_CONSTRUCT,
+                    on_disk=settings.QDRANT_HNSW_ON_DISK,
+                ),
+                shard_number=settings.QDRANT_SHARD_NUMBER if shared else None,
+                optimizers_config=OptimizersConfigDiff(indexing_threshold=settings.QDRANT_INDEXING_THRESHOLD),
+                quantization_config=self._quantization_config(),
+                on_disk_payload=settings.QDRANT_ON_DISK_PAYLOAD,
             )
+        except UnexpectedResponse as e:
+            if e.status_code != 409:
+                raise
+            return
 
-        points = [
-            PointStruct(id=str(uuid.uuid4()), vector=chunk_embeddings[i], payload={"text": chunks[i]})
-            for i in range(len(chunks))
-        ]
-        self.client.upsert(collection_name=collection_name, points=points)
+        if shared:
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name="repo",
+                field_schema=KeywordIndexParams(type=KeywordIndexType.KEYWORD, is_tenant=True),
+            )
+        for field_name, field_schema in (SHARED_PAYLOAD_INDEXES if shared else PAYLOAD_INDEXES).items():
+            self.client.create_payload_index(
+                collection_name=collection_name, field_name=field_name, field_schema=field_schema
+            )
+
+    def delete_repo(self, repo_url: str) -> bool:
+        """
+        Drops every point of the repository.
+
+        Returns:
+            bool: True if there was anything to delete.
+        """
+        collection_name = self._collection(repo_url)
+        if not self.is_repo_processed(repo_url):
+            return False
+        if not self._is_shared():
+            return self.client.delete_collection(collection_name)
+        self.client.delete(
+            collection_name=collection_name,
+            points_selector=FilterSelector(filter=self._filter(repo_url)),
+            wait=True,
+        )
+        return True
 
-    def query(self, repo_url: str, query_embedding: List[float], top_k: int = 3) -> List[QueryResponse]:
+    def delete_matching(self, repo_url: str, payload_filter: Dict[str, Any]) -> None:
+        """
+        Deletes the repository's points whose payload matches payload_filter
+        (a list value matches any of its elements).
+        """
+        if not payload_filter or not self.is_repo_processed(repo_url):
+            return
+        self.client.delete(
+            collection_name=self._collection(repo_url),
+            points_selector=FilterSelector(filter=self._filter(repo_url, payload_filter)),
+            wait=True,
+        )
+
+    def get_source_blobs(self, repo_url: str) -> Dict[str, Set[str]]:
+        """
+        Returns, for every source file with indexed chunks, the git blob ids its chunks were built from.
+        """
+        if not self.is_repo_processed(repo_url):
+            return {}
+
+        blobs: Dict[str, Set[str]] = {}
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self._collection(repo_url),
+                scroll_filter=self._filter(repo_url, {"kind": "source"}),
+                limit=settings.QDRANT_UPLOAD_BATCH_SIZE,
+                offset=offset,
+                with_payload=["path", "blob"],
+                with_vectors=False,
+            )
+            for point in points:
+                blobs.setdefault(point.payload.get("path"), set()).add(point.payload.get("blob"))
+            if offset is None:
+                return blobs
+
+    def get_content_hashes(self, repo_url: str, ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns the stored content_hash of every id in `ids` that already exists in the collection.
+
+        Args:
+            repo_url (str): The URL of the repository.
+            ids (List[str]): The point ids to look up.
+
+        Returns:
+            Dict[str, Optional[str]]: Point id to content hash, for the ids that were found.
+        """
+        collection_name = self._collection(repo_url)
+
+        if not ids or not self.client.collection_exists(collection_name):
+            return {}
+
+        points = self.client.retrieve(
+            collection_name=collection_name,
+            ids=ids,
+            with_payload=["content_hash"],
+            with_vectors=False,
+        )
+        return {str(point.id): point.payload.get("content_hash") for point in points}
+
+    def query(
+        self,
+        repo_url: str,
+        query_embedding: List[float],
+        top_k: int = 3,
+        score_threshold: Optional[float] = None,
+        payload_filter: Optional[Dict[str, Any]] = None,
+    ) -> List[QueryResponse]:
         """
         Queries the Qdrant collection for the given repository URL with the given query embedding.
 
+        The nearest-neighbour search runs on the server; only the payload and score of the
+        top-k hits are sent back, never the stored vectors.
+
         Args:
             repo_url (str): The URL of the repository.
             query_embedding (List[float]): The query embedding.
             top_k (int, optional): The number of top results to return. Defaults to 3.
+            score_threshold (Optional[float]): Hits scoring below this value are dropped by the server.
+            payload_filter (Optional[Dict[str, Any]]): Payload field/value pairs every hit must match.
+                A list value matches any of its elements.
 
         Returns:
-            List[QueryResponse]: A list of QueryResponse objects containing the text of the top-k results.
+            List[QueryResponse]: A list of QueryResponse objects containing the text, score and payload of the top-k results.
         """
-        collection_name = extract_repo_name(repo_url)
-
-        if not self.client.collection_exists(collection_name):
+        collection_name = self._collection(repo_url)
+        if self._is_shared() and not self.client.collection_exists(collection_name):
             raise ValueError(f"Collection '{collection_name}' not found. Did you forget to save it first?")
 
-        search_result = self.client.search(
-            collection_name=collection_name,
-            query_vector=query_embedding,
-            limit=top_k,
-        )
+        try:
+            result = self.client.query_points(
+                collection_name=collection_name,
+                query=query_embedding,
+                query_filter=self._filter(repo_url, payload_filter),
+                limit=top_k,
+                score_threshold=score_threshold,
+                search_params=self._search_params(),
+                with_payload=True,
+                with_vectors=False,
+            )
+        except UnexpectedResponse as e:
+            if e.status_code == 404:
+                raise ValueError(f"Collection '{collection_name}' not found. Did you forget to save it first?")
+            raise
 
-        return [QueryResponse(text=hit.payload["text"]) for hit in search_result]
+        return [
+            QueryResponse(
+                text=hit.payload["text"],
+                score=hit.score,
+                metadata={key: value for key, value in hit.payload.items() if key not in ("text", "repo")},
+            )
+            for hit in result.points
+        ]
 
     def get_all(self, repo_url: str) -> List[Document]:
         """
-        Retrieves all documents from the Qdrant collection for the given repository URL.
+        Retrieves all documents from the Qdrant collection for the given repository URL,
+        following scroll pagination until the collection is exhausted.
 
         Args:
             repo_url (str): The URL of the repository.
@@ -74,18 +361,45 @@ class QdrantVectorStore:
         Returns:
             List[Document]: A list of Document objects, each containing the text of a document and the corresponding embedding.
         """
-        collection_name = extract_repo_name(repo_url)
+        collection_name = self._collection(repo_url)
 
         if not self.client.collection_exists(collection_name):
             raise ValueError(f"Collection '{collection_name}' not found.")
 
-        scroll_result = self.client.scroll(collection_name=collection_name)
+        documents = []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=collection_name,
+                scroll_filter=self._filter(repo_url),
+                limit=settings.QDRANT_SCROLL_PAGE_SIZE,
+                offset=offset,
+                with_payload=["text"],
+                with_vectors=True,
+            )
 
-        points = scroll_result[0]
+            for point in points:
+                vector = point.vector if point.vector is not None else []
+                documents.append(Document(text=point.payload["text"], embedding=vector))
 
-        documents = []
-        for point in points:
-            vector = point.vector if point.vector is not None else []
-            documents.append(Document(text=point.payload["text"], embedding=vector))
+            if offset is None:
+                break
 
         return documents
+
+    @staticmethod
+    def _build_filter(payload_filter: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        if not payload_filter:
+            return None
+
+        conditions = []
+        for key, value in payload_filter.items():
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(FieldCondition(key=key, match=MatchAny(any=list(value))))
+            else:
+                conditions.append(FieldCondition(key=key, match=MatchValue(value=value)))
+
+        return Filter(must=conditions)
+
+    def close(self) -> None:
+        self.client.close()
@@ -0,0 +1,201 @@
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from app.core.config import settings
+from app.domain.schema.repo_record import RepoRecord
+from app.utils.helpers import extract_repo_name_and_owner, get_repo_path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS repositories (
+    repo TEXT PRIMARY KEY,
+    repo_url TEXT NOT NULL,
+    local_path TEXT,
+    head_commit TEXT,
+    downloaded_at TEXT,
+    indexed_commit TEXT,
+    indexed_at TEXT,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    embedding_model TEXT,
+    index_version INTEGER
+);
+"""
+
+SCHEMA_VERSION = 1
+GITHUB_REMOTE = re.compile(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def head_commit(repo_dir: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=repo_dir, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def origin_url(repo_dir: str) -> Optional[str]:
+    """
+    Canonical https URL of the clone's origin remote, or None if it is not a GitHub repository.
+    """
+    try:
+        result = subprocess.run(
+            ["git", "config", "--get", "remote.origin.url"], cwd=repo_dir, capture_output=True, text=True, check=True
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    match = GITHUB_REMOTE.search(result.stdout.strip())
+    return f"https://github.com/{match.group(1)}/{match.group(2)}" if match else None
+
+
+class RepoRegistry:
+    """
+    One row per known repository, keyed by owner/repo: where its clone lives and at
+    which commit, and what is indexed (commit, chunk count, embedding model, index
+    version). Answers "is this repository downloaded / indexed" with a primary-key
+    lookup instead of checking the filesystem or the vector store.
+
+    An index built with another embedding model or with an index version other than
+    settings.INDEX_VERSION counts as stale and is rebuilt on next use. A repository
+    with no row is neither downloaded nor indexed; clones made before the registry
+    existed are imported once by migrate().
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        path = path or settings.REPO_REGISTRY_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def repo_key(repo_url: str) -> str:
+        return extract_repo_name_and_owner(repo_url).removesuffix(".git").lower()
+
+    def get(self, repo_url: str) -> Optional[RepoRecord]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM repositories WHERE repo = ?", (self.repo_key(repo_url),)).fetchone()
+        return RepoRecord(**dict(row)) if row is not None else None
+
+    def mark_downloaded(self, repo_url: str, local_path: str) -> RepoRecord:
+        """
+        Records that the repository is cloned (or synced) at local_path, with its current HEAD.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO repositories (repo, repo_url, local_path, head_commit, downloaded_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(repo) DO UPDATE SET repo_url = excluded.repo_url, local_path = excluded.local_path, "
+                "head_commit = excluded.head_commit, downloaded_at = excluded.downloaded_at",
+                (self.repo_key(repo_url), repo_url, local_path, head_commit(local_path), _utc_now()),
+            )
+            self._conn.commit()
+        return self.get(repo_url)
+
+    def mark_indexed(self, repo_url: str, chunk_count: int) -> RepoRecord:
+        """
+        Records that the repository's index is complete and current as of its downloaded HEAD.
+        """
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO repositories (repo, repo_url) VALUES (?, ?) ON CONFLICT(repo) DO NOTHING",
+                (self.repo_key(repo_url), repo_url),
+            )
+            self._conn.execute(
+                "UPDATE repositories SET indexed_commit = head_commit, indexed_at = ?, chunk_count = ?, "
+                "embedding_model = ?, index_version = ? WHERE repo = ?",
+                (_utc_now(), chunk_count, settings.MODEL_NAME_EMBEDDING, settings.INDEX_VERSION, self.repo_key(repo_url)),
+            )
+            self._conn.commit()
+        return self.get(repo_url)
+
+    def mark_deleted(self, repo_url: str) -> None:
+        """
+        Forgets the repository's index; the clone stays registered.
+        """
+        with self._lock:
+            self._conn.execute(
+                "UPDATE repositories SET indexed_commit = NULL, indexed_at = NULL, chunk_count = 0, "
+                "embedding_model = NULL, index_version = NULL WHERE repo = ?",
+                (self.repo_key(repo_url),),
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def is_stale(record: RepoRecord) -> bool:
+        return record.is_indexed and (
+            record.embedding_model != settings.MODEL_NAME_EMBEDDING or record.index_version != settings.INDEX_VERSION
+        )
+
+    @staticmethod
+    def needs_indexing(record: RepoRecord) -> bool:
+        return record.is_downloaded and (not record.is_indexed or RepoRegistry.is_stale(record))
+
+    def migrate(self, vector_store: Any, data_dir: Optional[str] = None) -> int:
+        """
+        One-off import of clones made before the registry existed, run at startup.
+
+        Old clones live directly under settings.DATA_DIR, keyed by repository name only.
+        Each one's origin remote decides which repository it is; it is moved (with its
+        sync state) to the owner/repo layout and registered, and marked indexed if the
+        vector store already holds points for it. Directories whose origin is not a GitHub
+        repository are left alone. Runs once per registry database.
+
+        Args:
+            vector_store: Store asked whether an imported repository is already indexed.
+            data_dir (Optional[str]): Where the clones live. Defaults to settings.DATA_DIR.
+
+        Returns:
+            int: The number of clones registered.
+        """
+        with self._lock:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return 0
+
+        data_dir = data_dir or settings.DATA_DIR
+        imported = 0
+        for name in sorted(os.listdir(data_dir)) if os.path.isdir(data_dir) else []:
+            legacy_dir = os.path.join(data_dir, name)
+            if not os.path.isdir(os.path.join(legacy_dir, ".git")):
+                continue
+            repo_url = origin_url(legacy_dir)
+            if repo_url is None:
+                logging.warning(f"Not importing {legacy_dir}: its origin is not a GitHub repository")
+                continue
+
+            repo_dir = os.path.join(data_dir, get_repo_path(repo_url))
+            if os.path.exists(repo_dir):
+                logging.warning(f"Not importing {legacy_dir}: {repo_dir} already exists")
+                continue
+            os.makedirs(os.path.dirname(repo_dir), exist_ok=True)
+            os.rename(legacy_dir, repo_dir)
+            if os.path.exists(legacy_dir + ".sync.json"):
+                os.rename(legacy_dir + ".sync.json", repo_dir + ".sync.json")
+
+            self.mark_downloaded(repo_url, repo_dir)
+            if vector_store.is_repo_processed(repo_url):
+                self.mark_indexed(repo_url, vector_store.count_points(repo_url))
+            imported += 1
+            logging.info(f"Imported legacy clone {legacy_dir} as {repo_url}")
+
+        with self._lock:
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            self._conn.commit()
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,3 +1,7 @@
+import logging
+from typing import List, Optional
+
+import numpy as np
 from app.core.config import settings
 from sentence_transformers import SentenceTransformer
 import torch
@@ -7,7 +11,78 @@ class SentenceTransformersEmbeddingClient:
         device = "cuda" if torch.cuda.is_available() else "cpu"
         self.model = SentenceTransformer(settings.MODEL_NAME_EMBEDDING).to(device)
         self.device = device
+        self.dimension = self.model.get_sentence_embedding_dimension()
+        self._pool = None
 
     def embed(self, text):
-        embedding = self.model.encode(text, convert_to_tensor=True).to(self.device)
-        return embedding.cpu().numpy().tolist()
+        embedding = self.model.encode(text, convert_to_numpy=True)
+        return embedding.astype(np.float32).tolist()
+
+    def embed_batch(
+        self,
+        texts: List[str],
+        batch_size: Optional[int] = None,
+        sort_by_length: Optional[bool] = None,
+    ) -> np.ndarray:
+        """
+        Encodes many texts at once and returns them as a single float32 matrix.
+
+        Texts are optionally sorted by length before encoding so each batch holds
+        sequences of similar size (less padding), and the rows are scattered back
+        to the original order afterwards. On CPU-only nodes with
+        EMBEDDING_NUM_WORKERS > 1, large inputs are spread over a multi-process pool.
+
+        Args:
+            texts (List[str]): The texts to encode.
+            batch_size (Optional[int]): Texts per forward pass. Defaults to settings.EMBEDDING_BATCH_SIZE.
+            sort_by_length (Optional[bool]): Whether to bucket texts by length. Defaults to settings.EMBEDDING_SORT_BY_LENGTH.
+
+        Returns:
+            np.ndarray: A C-contiguous (len(texts), dimension) float32 matrix.
+        """
+        batch_size = batch_size or settings.EMBEDDING_BATCH_SIZE
+        if sort_by_length is None:
+            sort_by_length = settings.EMBEDDING_SORT_BY_LENGTH
+
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+
+        order = None
+        if sort_by_length:
+            order = np.argsort([len(text) for text in texts], kind="stable")
+            texts = [texts[i] for i in order]
+
+        if self._use_multi_process(len(texts)):
+            encoded = self.model.encode_multi_process(texts, self._get_pool(), batch_size=batch_size)
+        else:
+            encoded = self.model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+        encoded = np.asarray(encoded, dtype=np.float32)
+
+        if order is not None:
+            embeddings = np.empty_like(encoded)
+            embeddings[order] = encoded
+        else:
+            embeddings = encoded
+
+        return np.ascontiguousarray(embeddings)
+
+    def _use_multi_process(self, count: int) -> bool:
+        return (
+            self.device == "cpu"
+            and settings.EMBEDDING_NUM_WORKERS > 1
+            and count >= settings.EMBEDDING_MULTI_PROCESS_MIN_TEXTS
+        )
+
+    def _get_pool(self):
+        if self._pool is None:
+            logging.info(f"Starting embedding process pool with {settings.EMBEDDING_NUM_WORKERS} workers.")
+            self._pool = self.model.start_multi_process_pool(
+                target_devices=["cpu"] * settings.EMBEDDING_NUM_WORKERS
+            )
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self.model.stop_multi_process_pool(self._pool)
+            self._pool = None
@@ -6,29 +6,36 @@ import uvicorn
 from app.api.rest_router import router as api_router
 from app.websocket.websocket_server import WebSocketServer
 from app.domain.services.rabbitmq_service import RabbitMQService
-from app.domain.services.session_manager import SessionManager
-from workers.chat_worker import chat_worker
+from app.core.config import settings
+from app.core.container import container
+from app.infrastructure.github.github_fetcher import close_etag_cache
+from app.workers.chat_worker import ChatWorkerPool
 
-redis_service = SessionManager()
 rabbitmq_service = RabbitMQService()
-websocket_server = WebSocketServer(redis_service, rabbitmq_service)
+websocket_server = WebSocketServer(rabbitmq_service)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    await asyncio.to_thread(container.initialize)
+    app.state.container = container
+
     await rabbitmq_service.connect()
-    worker_task = asyncio.create_task(chat_worker(rabbitmq_service))
+    await websocket_server.start()
+    worker_pool = None
+    if settings.RUN_EMBEDDED_WORKER:
+        worker_pool = ChatWorkerPool(rabbitmq_service, container.chat_processor)
+        await worker_pool.start()
 
     yield
 
-    await rabbitmq_service.close()
-
-    worker_task.cancel()
+    await websocket_server.stop()
     try:
-        await worker_task
-    except asyncio.CancelledError:
-        pass
+        if worker_pool is not None:
+            await worker_pool.drain()
     finally:
         await rabbitmq_service.close()
+        await container.shutdown()
+        close_etag_cache()
 app = FastAPI(
     title="Repo Insight Bot",
     version="0.0.1",
@@ -0,0 +1,120 @@
+import asyncio
+
+from app.infrastructure.cache.answer_cache import SemanticAnswerCache
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+class _Pipeline:
+    def __init__(self, data):
+        self.data = data
+        self.commands = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def __getattr__(self, name):
+        return lambda *args: self.commands.append((name, args))
+
+    async def execute(self):
+        results = [getattr(self, f"_{name}")(*args) for name, args in self.commands]
+        self.commands = []
+        return results
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _lrange(self, key, start, end):
+        items = self.data.get(key, [])
+        return items[start:] if end == -1 else items[start:end + 1]
+
+    def _lpush(self, key, value):
+        self.data.setdefault(key, []).insert(0, value.encode())
+        return len(self.data[key])
+
+    def _ltrim(self, key, start, end):
+        self.data[key] = self._lrange(key, start, end)
+
+    def _expire(self, key, seconds):
+        return True
+
+    def _incr(self, key):
+        self.data[key] = str(int(self.data.get(key) or 0) + 1).encode()
+        return int(self.data[key])
+
+    def _delete(self, key):
+        return int(self.data.pop(key, None) is not None)
+
+
+class _Redis:
+    def __init__(self):
+        self.data = {}
+
+    def pipeline(self, transaction=True):
+        return _Pipeline(self.data)
+
+
+def _cache(**kwargs):
+    cache = SemanticAnswerCache(**kwargs)
+    cache.redis = _Redis()
+    return cache
+
+
+def test_lookup_hits_only_above_the_similarity_threshold():
+    async def run():
+        cache = _cache(threshold=0.95)
+        _, version = await cache.lookup(REPO_URL, [1.0, 0.0, 0.0])
+        await cache.store(REPO_URL, version, "How do I build?", [1.0, 0.0, 0.0], "Run make.")
+
+        similar = await cache.lookup(REPO_URL, [0.99, 0.05, 0.0])
+        different = await cache.lookup(REPO_URL, [0.7, 0.7, 0.0])
+        other_repo = await cache.lookup("https://github.com/acme/widgets", [1.0, 0.0, 0.0])
+        return similar, different, other_repo
+
+    similar, different, other_repo = asyncio.run(run())
+
+    assert similar == ("Run make.", 0)
+    assert different == (None, 0)
+    assert other_repo == (None, 0)
+
+
+def test_answers_from_before_invalidate_are_not_served():
+    async def run():
+        cache = _cache(threshold=0.9)
+        _, version = await cache.lookup(REPO_URL, [1.0, 0.0])
+        await cache.store(REPO_URL, version, "q", [1.0, 0.0], "before re-index")
+        await cache.invalidate(REPO_URL)
+        # An answer generated while the re-index was running is stored under the old version.
+        await cache.store(REPO_URL, version, "q", [1.0, 0.0], "during re-index")
+        stale = await cache.lookup(REPO_URL, [1.0, 0.0])
+
+        await cache.store(REPO_URL, stale[1], "q", [1.0, 0.0], "after re-index")
+        fresh = await cache.lookup(REPO_URL, [1.0, 0.0])
+        return stale, fresh, cache.get_stats()
+
+    stale, fresh, stats = asyncio.run(run())
+
+    assert stale == (None, 1)
+    assert fresh == ("after re-index", 1)
+    assert stats["invalidations"] == 1
+
+
+def test_hit_ratio_counts_every_lookup():
+    async def run():
+        cache = _cache(threshold=0.9)
+        empty = cache.get_stats()
+        _, version = await cache.lookup(REPO_URL, [1.0, 0.0])
+        await cache.store(REPO_URL, version, "q", [1.0, 0.0], "answer")
+        await cache.lookup(REPO_URL, [1.0, 0.0])
+        await cache.lookup(REPO_URL, [0.0, 1.0])
+        await cache.lookup(REPO_URL, [1.0, 0.01])
+        return empty, cache.get_stats()
+
+    empty, stats = asyncio.run(run())
+
+    assert empty["hit_ratio"] == 0.0
+    assert stats["hits"] == 2 and stats["misses"] == 2
+    assert stats["hit_ratio"] == 0.5
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.domain.services.chat_request_processor import ChatRequestProcessor
+from app.domain.services.response_generator import ResponseGenerator
+
+
+class _Sessions:
+    def __init__(self):
+        self.messages = []
+
+    async def add_message(self, user_id, role, content):
+        self.messages.append({"role": role, "content": content})
+
+    async def append_and_get_history(self, user_id, role, content):
+        await self.add_message(user_id, role, content)
+        return list(self.messages)
+
+
+class _StreamingClient:
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    async def chat(self, **kwargs):
+        async def stream():
+            for token in self.tokens:
+                yield SimpleNamespace(message=SimpleNamespace(content=token))
+        return stream()
+
+
+def _message(role, content):
+    return {"role": role, "content": content}
+
+
+def test_history_pairs_follow_roles_not_positions():
+    history = [
+        _message("user", "q1"),
+        _message("assistant", "a1"),
+        _message("user", "unanswered"),
+        _message("user", "q2"),
+        _message("assistant", "a2"),
+    ]
+    pairs = ChatRequestProcessor._format_history(history)
+    assert [(pair.question, pair.answer) for pair in pairs] == [("q1", "a1"), ("q2", "a2")]
+
+
+def test_interrupted_stream_keeps_partial_answer():
+    sessions = _Sessions()
+    generator = ResponseGenerator(sessions)
+    generator.client = _StreamingClient(["The ", "answer ", "is ", "42."])
+
+    async def read_two_tokens():
+        stream = generator.stream_response("u1", "What is it?", [])
+        received = [await stream.__anext__(), await stream.__anext__()]
+        await stream.aclose()
+        return received
+
+    assert asyncio.run(read_two_tokens()) == ["The ", "answer "]
+    assert sessions.messages == [_message("user", "What is it?"), _message("assistant", "The answer ")]
+
+
+def test_completed_stream_saves_whole_answer_once():
+    sessions = _Sessions()
+    generator = ResponseGenerator(sessions)
+    generator.client = _StreamingClient(["The ", "answer."])
+
+    async def read_all():
+        return [token async for token in generator.stream_response("u1", "What is it?", [])]
+
+    assert asyncio.run(read_all()) == ["The ", "answer."]
+    assert sessions.messages == [_message("user", "What is it?"), _message("assistant", "The answer.")]
@@ -0,0 +1,80 @@
+from app.domain.schema.query import QueryResponse
+from app.domain.services.context_budgeter import ContextBudgeter
+from app.utils.helpers import estimate_tokens
+
+SYSTEM_PROMPT = "Answer from the context."
+
+
+def _words(prefix: str, count: int) -> str:
+    return " ".join(f"{prefix}{i}" for i in range(count))
+
+
+def _turns(count: int, size: int = 40):
+    history = []
+    for i in range(count):
+        history.append({"role": "user", "content": f"question {i} " + _words("q", size)})
+        history.append({"role": "assistant", "content": f"answer {i} " + _words("a", size)})
+    return history
+
+
+def _prompt_tokens(history, context) -> int:
+    return (
+        estimate_tokens(SYSTEM_PROMPT)
+        + sum(estimate_tokens(message["content"]) for message in history)
+        + estimate_tokens(context)
+    )
+
+
+def test_prompt_never_exceeds_budget():
+    budgeter = ContextBudgeter(token_budget=600, response_reserve=100, history_share=0.3)
+    history = _turns(10) + [{"role": "user", "content": "current question"}]
+    documents = [QueryResponse(text=_words(f"d{n}_", 120), score=1.0 - n / 10) for n in range(8)]
+
+    packed_history, context = budgeter.pack(SYSTEM_PROMPT, history, documents)
+
+    assert _prompt_tokens(packed_history, context) <= 600 - 100 + len(packed_history) + 1
+    assert packed_history[-1]["content"] == "current question"
+    assert context.startswith("d0_0")
+
+
+def test_old_turns_are_dropped_in_pairs_and_summarized():
+    budgeter = ContextBudgeter()
+    history = _turns(6) + [{"role": "user", "content": "current question"}]
+
+    kept = budgeter.fit_history(history, budget=150)
+
+    first_kept = history.index(kept[1])
+    assert first_kept > 0 and first_kept % 2 == 0
+    assert kept[0]["role"] == "system" and kept[0]["content"].startswith("Earlier in this conversation")
+    assert f"question {first_kept // 2 - 1} " in kept[0]["content"]
+    assert [message["role"] for message in kept[1:]] == ["user", "assistant"] * ((len(kept) - 2) // 2) + ["user"]
+    assert kept[-1]["content"] == "current question"
+
+
+def test_current_question_is_kept_even_over_budget():
+    budgeter = ContextBudgeter()
+    question = {"role": "user", "content": _words("w", 500)}
+    assert budgeter.fit_history(_turns(2) + [question], budget=10)[-1] == question
+
+
+def test_near_duplicate_chunks_are_skipped_and_last_chunk_truncated():
+    budgeter = ContextBudgeter()
+    text = _words("token", 100)
+    documents = [
+        QueryResponse(text=text, score=0.9),
+        QueryResponse(text=text + " extra", score=0.8),
+        QueryResponse(text=_words("other", 200), score=0.7),
+    ]
+
+    selected = budgeter.fit_documents(documents, budget=estimate_tokens(text) + 60)
+
+    assert len(selected) == 2
+    assert selected[0] == text
+    assert selected[1].startswith("other0") and selected[1].endswith(" …")
+    assert sum(estimate_tokens(chunk) for chunk in selected) <= estimate_tokens(text) + 60 + 1
+
+
+def test_chunks_that_cannot_fit_a_useful_piece_are_dropped():
+    budgeter = ContextBudgeter()
+    documents = [QueryResponse(text=_words("big", 400), score=0.9)]
+    assert budgeter.fit_documents(documents, budget=10) == []
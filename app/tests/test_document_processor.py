@@ -0,0 +1,159 @@
+import pytest
+
+from app.core.config import settings
+from app.domain.services.document_processor import DocumentProcessor
+
+
+def _log_lines(count: int) -> str:
+    return "".join(f"+ line {i} changes value_{i} to value_{i + 1}\n" for i in range(count))
+
+
+@pytest.mark.parametrize("size, overlap", [(350, 20), (100, 0), (64, 30)])
+def test_windows_cover_text_with_bounded_overlap(size, overlap):
+    text = _log_lines(80)
+    windows = list(DocumentProcessor._windows(text, size=size, overlap=overlap))
+
+    assert all(len(window) <= size for window in windows)
+    assert windows[0] == text[:len(windows[0])]
+    rebuilt = windows[0]
+    for window in windows[1:]:
+        shared = min(overlap, size // 2)
+        assert rebuilt.endswith(window[:shared])
+        rebuilt += window[shared:]
+    assert rebuilt == text
+    if size // 2 > max(len(line) for line in text.splitlines(keepends=True)):
+        assert all(window.endswith("\n") for window in windows)
+
+
+def test_commit_is_split_into_message_and_diff_chunks():
+    record = {
+        "type": "commit",
+        "hash": "abc123",
+        "author": "Alice",
+        "date": "2024-02-01T10:00:00",
+        "day": "2024-02-01",
+        "message": "Fix parser",
+        "files": [
+            {"filename": "parser.py", "path": "src/parser.py", "changes": "MODIFY", "additions": 80, "deletions": 0,
+             "diff": _log_lines(80)},
+            {"filename": "README.md", "path": "README.md", "changes": "MODIFY", "additions": 1, "deletions": 1},
+        ],
+    }
+
+    chunks = list(DocumentProcessor.iter_chunks([record]))
+    kinds = [chunk.metadata["kind"] for chunk in chunks]
+    keys = [chunk.metadata["key"] for chunk in chunks]
+
+    assert kinds[0] == "commit" and set(kinds[1:]) == {"diff"}
+    assert "parser.py (MODIFY, +80/-0)" in chunks[0].text and "README.md" in chunks[0].text
+    assert len(keys) == len(set(keys))
+    assert all(chunk.metadata["hash"] == "abc123" and chunk.metadata["date"] == "2024-02-01" for chunk in chunks)
+    assert all(chunk.text.startswith("Commit abc123 by Alice") for chunk in chunks)
+    diff_lines = {line for chunk in chunks[1:] for line in chunk.text.splitlines() if line.startswith("+ line")}
+    assert diff_lines == set(_log_lines(80).splitlines())
+
+
+def test_diffs_of_same_named_files_get_distinct_keys():
+    record = {
+        "type": "commit",
+        "hash": "abc123",
+        "message": "Touch packages",
+        "files": [
+            {"filename": "__init__.py", "path": "a/__init__.py", "changes": "MODIFY", "diff": "+ a = 1\n"},
+            {"filename": "__init__.py", "path": "b/__init__.py", "changes": "MODIFY", "diff": "+ b = 2\n"},
+        ],
+    }
+
+    diffs = [chunk for chunk in DocumentProcessor.iter_chunks([record]) if chunk.metadata["kind"] == "diff"]
+
+    assert [chunk.metadata["key"] for chunk in diffs] == [
+        "diff:abc123:a/__init__.py:0",
+        "diff:abc123:b/__init__.py:0",
+    ]
+
+def test_activity_uses_last_totals_of_each_day():
+    records = [
+        {"type": "day", "date": "2024-02-01", "total_commits_on_day": 1, "total_issues_on_day": 0},
+        {"type": "day", "date": "2024-03-01", "total_commits_on_day": 4, "total_issues_on_day": 2},
+        {"type": "day", "date": "2024-02-01", "total_commits_on_day": 3, "total_issues_on_day": 1},
+    ]
+
+    chunks = list(DocumentProcessor.iter_chunks(records))
+
+    assert [chunk.metadata["key"] for chunk in chunks] == ["activity:2024-02:0", "activity:2024-03:0"]
+    assert "2024-02-01: 3 commits, 1 issues." in chunks[0].text
+
+
+def test_every_record_type_produces_chunks():
+    records = [
+        {"type": "repository", "owner": "octo", "name": "widgets", "total_commits": 3},
+        {"type": "issue", "id": 7, "number": 7, "title": "Crash", "state": "open", "is_pull_request": True},
+        {"type": "unknown", "value": "x" * (settings.CHUNK_SIZE * 2)},
+    ]
+
+    chunks = list(DocumentProcessor.iter_chunks(records))
+
+    assert chunks[0].metadata == {"kind": "repository", "key": "repository"}
+    assert chunks[1].text.startswith("Pull request #7: Crash [open]")
+    assert len(chunks[2].text) == settings.CHUNK_SIZE
+
+
+def _python_module(functions: int, body_lines: int) -> str:
+    header = '"""Module docstring."""\nimport os\n\n'
+    definitions = [
+        f"@decorator\ndef function_{i}(value):\n" + "".join(f"    value += {j}  # step {j}\n" for j in range(body_lines))
+        + "    return value\n"
+        for i in range(functions)
+    ]
+    return header + "\n\n".join(definitions)
+
+
+@pytest.mark.parametrize("functions, body_lines", [(1, 2), (12, 3), (3, 60)])
+def test_source_chunks_cover_every_line_once(monkeypatch, functions, body_lines):
+    monkeypatch.setattr(settings, "SOURCE_CHUNK_SIZE", 400)
+    text = _python_module(functions, body_lines)
+    record = {"type": "source", "path": "pkg/mod.py", "language": "python", "blob": "b1", "text": text}
+
+    chunks = list(DocumentProcessor.iter_chunks([record]))
+    lines = text.splitlines(keepends=True)
+
+    covered = []
+    for index, chunk in enumerate(chunks):
+        meta = chunk.metadata
+        assert meta["key"] == f"source:pkg/mod.py:{index}"
+        assert meta["kind"] == "source" and meta["blob"] == "b1" and meta["filename"] == "mod.py"
+        header, code = chunk.text.split("\n", 1)
+        assert header == f"File pkg/mod.py (python), lines {meta['start_line']}-{meta['end_line']}:"
+        assert code == "".join(lines[meta["start_line"] - 1:meta["end_line"]])
+        assert len(code) <= 400 or meta["end_line"] - meta["start_line"] == 0
+        covered.extend(range(meta["start_line"], meta["end_line"] + 1))
+    assert covered == list(range(1, len(lines) + 1))
+
+
+def test_small_definitions_are_not_split(monkeypatch):
+    monkeypatch.setattr(settings, "SOURCE_CHUNK_SIZE", 400)
+    text = _python_module(12, 3)
+    record = {"type": "source", "path": "mod.py", "language": "python", "text": text}
+
+    chunks = list(DocumentProcessor.iter_chunks([record]))
+    symbols = [name for chunk in chunks for name in chunk.metadata["symbols"]]
+
+    assert symbols == [f"function_{i}" for i in range(12)]
+    for chunk in chunks:
+        for name in chunk.metadata["symbols"]:
+            assert f"def {name}(value):" in chunk.text and chunk.text.count("@decorator") >= 1
+            assert chunk.text.split(f"def {name}(value):", 1)[1].count("return value") >= 1
+
+
+def test_other_languages_split_on_definition_lines(monkeypatch):
+    monkeypatch.setattr(settings, "SOURCE_CHUNK_SIZE", 120)
+    text = "".join(
+        f"export function handler{i}(event) {{\n  const result = process(event, {i});\n  return result;\n}}\n\n"
+        for i in range(4)
+    )
+    record = {"type": "source", "path": "src/handlers.js", "language": "javascript", "text": text}
+
+    chunks = list(DocumentProcessor.iter_chunks([record]))
+
+    assert [chunk.metadata["symbols"] for chunk in chunks] == [[f"handler{i}"] for i in range(4)]
+    assert all(chunk.text.split("\n", 1)[1].startswith("export function") for chunk in chunks)
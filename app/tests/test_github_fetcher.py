@@ -0,0 +1,72 @@
+import asyncio
+
+import aiohttp
+from aiohttp import web
+
+from app.infrastructure.github.github_fetcher import ETagCache, GitHubFetcher
+
+
+async def _serve_issues(total: int, handler_calls: list):
+    async def issues(request: web.Request) -> web.Response:
+        page = int(request.query["page"])
+        per_page = int(request.query["per_page"])
+        handler_calls.append((page, request.headers.get("If-None-Match")))
+        etag = f'"page-{page}"'
+        if request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304, headers={"ETag": etag})
+        items = [{"number": n} for n in range((page - 1) * per_page + 1, min(page * per_page, total) + 1)]
+        return web.json_response(items, headers={"ETag": etag})
+
+    app = web.Application()
+    app.router.add_get("/repos/octo/widgets/issues", issues)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+async def _fetch_issues(total: int, caches=(None,), concurrency: int = 4, per_page: int = 10):
+    calls = []
+    results = []
+    runner, base_url = await _serve_issues(total, calls)
+    try:
+        for cache in caches:
+            async with aiohttp.ClientSession() as session:
+                fetcher = GitHubFetcher(session, cache=cache, base_url=base_url, concurrency=concurrency, per_page=per_page)
+                results.append(await fetcher.fetch_issues("octo", "widgets"))
+    finally:
+        await runner.cleanup()
+    return (results[0] if len(results) == 1 else results), calls
+
+
+def test_single_short_page_costs_one_request():
+    issues, calls = asyncio.run(_fetch_issues(7))
+    assert [issue["number"] for issue in issues] == list(range(1, 8))
+    assert [page for page, _ in calls] == [1]
+
+
+def test_pages_stop_at_the_first_short_page():
+    issues, calls = asyncio.run(_fetch_issues(95))
+    assert [issue["number"] for issue in issues] == list(range(1, 96))
+    pages = sorted(page for page, _ in calls)
+    assert pages[:10] == list(range(1, 11))
+    assert len(pages) <= 10 + 3
+
+
+def test_exact_multiple_of_page_size_ends_on_empty_page():
+    issues, calls = asyncio.run(_fetch_issues(30, concurrency=1))
+    assert len(issues) == 30
+    assert [page for page, _ in calls] == [1, 2, 3, 4]
+
+
+def test_etag_cache_answers_repeat_fetches_with_304(tmp_path):
+    first_cache = ETagCache(str(tmp_path / "etags.sqlite3"))
+    second_cache = ETagCache(str(tmp_path / "etags.sqlite3"))
+    (first, second), calls = asyncio.run(_fetch_issues(25, caches=(first_cache, second_cache), concurrency=1))
+    first_cache.close()
+    second_cache.close()
+
+    assert second == first
+    assert calls == [(1, None), (2, None), (3, None), (1, '"page-1"'), (2, '"page-2"'), (3, '"page-3"')]
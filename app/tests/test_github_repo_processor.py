@@ -0,0 +1,53 @@
+import asyncio
+import json
+import os
+import subprocess
+
+from app.core.config import settings
+from app.infrastructure.github.github_repo_processor import GitHubRepoProcessor
+
+
+def _bare_remote(tmp_path):
+    work = tmp_path / "work"
+    work.mkdir()
+    (work / "app.py").write_text("print('hello')\n")
+    subprocess.run(["git", "init", "-q", str(work)], check=True)
+    subprocess.run(["git", "-C", str(work), "add", "."], check=True)
+    subprocess.run(
+        ["git", "-C", str(work), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"],
+        check=True,
+    )
+    remote = tmp_path / "remote" / "octo" / "widgets"
+    remote.parent.mkdir(parents=True)
+    subprocess.run(["git", "clone", "-q", "--bare", str(work), str(remote)], check=True)
+    return tmp_path / "remote"
+
+
+def test_clone_repo_clones_into_owner_repo_under_relative_data_dir(tmp_path, monkeypatch):
+    remote_root = _bare_remote(tmp_path)
+    # Serve https://github.com/<owner>/<repo> from the local bare repositories.
+    monkeypatch.setenv("GIT_CONFIG_COUNT", "1")
+    monkeypatch.setenv("GIT_CONFIG_KEY_0", f"url.{remote_root.as_uri()}/.insteadOf")
+    monkeypatch.setenv("GIT_CONFIG_VALUE_0", "https://github.com/")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("data")
+
+    async def form_metadata(repo_url, **kwargs):
+        return {"name": "widgets", "owner": "octo", "last_commit": None, "commits_on_date": {}, "issues_on_date": {}}
+
+    async def clone():
+        processor = GitHubRepoProcessor(github_token=None, local_path="./data")
+        processor.form_metadata = form_metadata
+        try:
+            return await processor.clone_repo("https://github.com/octo/widgets")
+        finally:
+            await processor.close()
+
+    response = asyncio.run(clone())
+
+    assert response["status"] == "success", response
+    repo_dir = tmp_path / "data" / "octo" / "widgets"
+    assert (repo_dir / ".git").is_dir()
+    assert not (tmp_path / "data" / "data").exists()
+    assert json.loads((repo_dir / settings.REPOSITORY_DATA_FILE).read_text().splitlines()[0])["type"] == "repository"
+    assert (tmp_path / "data" / "octo" / "widgets.sync.json").exists()
@@ -0,0 +1,22 @@
+from app.core.config import settings
+from app.utils.helpers import find_and_convert_in_dir
+
+
+def test_files_sharing_a_txt_path_are_not_overwritten(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "CONVERT_WORKERS", 1)
+    (tmp_path / "foo.py").write_text("print('py')\n")
+    (tmp_path / "foo.js").write_text("console.log('js')\n")
+    (tmp_path / "bar.md").write_text("# bar\n")
+    (tmp_path / "bar.txt").write_text("bar notes\n")
+
+    summary = find_and_convert_in_dir(str(tmp_path))
+
+    assert summary["files"] == 1 and summary["kept"] == 1 and summary["collisions"] == 2
+    names = {path.name for path in tmp_path.iterdir()}
+    assert names in ({"bar.md", "bar.txt", "foo.js", "foo.txt"}, {"bar.md", "bar.txt", "foo.py", "foo.txt"})
+    assert (tmp_path / "bar.txt").read_text() == "bar notes\n"
+    unconverted = (names - {"bar.md", "bar.txt", "foo.txt"}).pop()
+    assert {(tmp_path / "foo.txt").read_text(), (tmp_path / unconverted).read_text()} == {
+        "print('py')\n",
+        "console.log('js')\n",
+    }
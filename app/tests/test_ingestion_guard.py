@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from redis.exceptions import ConnectionError, LockNotOwnedError
+
+from app.infrastructure.locks.ingestion_guard import IngestionGuard
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+class _Lock:
+    def __init__(self, failures):
+        self.failures = list(failures)
+        self.renewals = 0
+
+    async def acquire(self):
+        return True
+
+    async def reacquire(self):
+        self.renewals += 1
+        if self.failures:
+            raise self.failures.pop(0)
+
+    async def release(self):
+        pass
+
+
+class _Redis:
+    def __init__(self, lock):
+        self._lock = lock
+
+    def lock(self, name, **kwargs):
+        return self._lock
+
+    async def aclose(self):
+        pass
+
+
+def _guard(lock):
+    guard = IngestionGuard(lock_ttl=0.03)
+    guard.redis = _Redis(lock)
+    return guard
+
+
+def test_losing_the_lock_fails_the_guarded_block():
+    lock = _Lock([LockNotOwnedError("expired")])
+    finished = []
+
+    async def run():
+        async with _guard(lock).lock(REPO_URL):
+            await asyncio.sleep(1)
+            finished.append(True)
+
+    with pytest.raises(RuntimeError, match="Lost the ingestion lock"):
+        asyncio.run(run())
+    assert finished == [] and lock.renewals == 1
+
+
+def test_transient_renewal_errors_are_retried():
+    lock = _Lock([ConnectionError("reset")])
+
+    async def run():
+        async with _guard(lock).lock(REPO_URL):
+            await asyncio.sleep(0.1)
+        return "done"
+
+    assert asyncio.run(run()) == "done"
+    assert lock.renewals >= 2
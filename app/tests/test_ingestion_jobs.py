@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+import pytest
+
+from app.core.config import settings
+from app.domain.services import ingestion_jobs
+from app.domain.services.ingestion_jobs import IngestionJobManager
+from app.utils.helpers import get_repo_dir
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+class _Processor:
+    clones = 0
+    release: asyncio.Event
+
+    def __init__(self, github_token=None, local_path=None):
+        pass
+
+    async def clone_repo(self, repo_url, progress=None):
+        type(self).clones += 1
+        await type(self).release.wait()
+        return {"status": "success"}
+
+    async def close(self):
+        pass
+
+
+class _IngestionService:
+    def __init__(self):
+        self.calls = []
+        self.vector_store = self
+
+    def is_repo_processed(self, repo_url):
+        return False
+
+    def ingest_repository_data(self, repo_url, data_path, progress=None, repo_dir=None):
+        self.calls.append(repo_url)
+        return 3
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(ingestion_jobs, "GitHubRepoProcessor", _Processor)
+    _Processor.clones = 0
+    for repo_url in (REPO_URL, "https://github.com/acme/widgets"):
+        os.makedirs(get_repo_dir(repo_url))
+        open(os.path.join(get_repo_dir(repo_url), settings.REPOSITORY_DATA_FILE), "w").close()
+    return IngestionJobManager(_IngestionService(), max_concurrent_jobs=2)
+
+
+def test_concurrent_submissions_share_one_job(manager):
+    async def scenario():
+        _Processor.release = asyncio.Event()
+        first = manager.submit(REPO_URL)
+        same = manager.submit("https://github.com/Octo/Widgets")
+        other = manager.submit("https://github.com/acme/widgets")
+        await asyncio.sleep(0)
+        _Processor.release.set()
+        await asyncio.gather(manager.wait(first.job_id), manager.wait(other.job_id))
+        return first, same, other
+
+    first, same, other = asyncio.run(scenario())
+
+    assert same is first and other is not first
+    assert _Processor.clones == 2
+    assert manager.ingestion_service.calls == [REPO_URL, "https://github.com/acme/widgets"]
+    assert first.status == "completed" and first.result["indexed_chunks"] == 3
+    assert manager.active_job(REPO_URL) is None
+
+
+def test_finished_job_is_not_joined(manager):
+    async def scenario():
+        _Processor.release = asyncio.Event()
+        _Processor.release.set()
+        first = manager.submit(REPO_URL)
+        await manager.wait(first.job_id)
+        second = manager.submit(REPO_URL)
+        await manager.wait(second.job_id)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert second.job_id != first.job_id
+    assert _Processor.clones == 2
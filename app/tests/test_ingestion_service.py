@@ -0,0 +1,100 @@
+import hashlib
+import json
+import subprocess
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.domain.services.document_processor import DocumentProcessor
+from app.domain.services.ingestion_service import IngestionService
+from app.infrastructure.lexical.bm25_index import BM25Index
+from app.infrastructure.local.vector_index import LocalVectorStore
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+class _HashEmbeddings:
+    def generate_embeddings(self, texts):
+        rows = [np.frombuffer(hashlib.sha256(text.encode()).digest(), dtype=np.uint8) for text in texts]
+        return np.asarray(rows, dtype=np.float32) - 127.5
+
+
+def _commit(repo_dir, files):
+    for name, text in files.items():
+        path = repo_dir / name
+        if text is None:
+            path.unlink()
+        else:
+            path.write_text(text)
+    subprocess.run(["git", "-C", str(repo_dir), "add", "-A"], check=True)
+    subprocess.run(
+        ["git", "-C", str(repo_dir), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "change"],
+        check=True,
+    )
+
+
+def _functions(count):
+    return "\n\n".join(f"def function_{i}():\n    return {i}  # {'x' * 80}" for i in range(count)) + "\n"
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SOURCE_CHUNK_SIZE", 300)
+    monkeypatch.setattr(settings, "VECTOR_QUANTIZATION", None)
+    store = LocalVectorStore(str(tmp_path / "index"))
+    lexical = BM25Index(str(tmp_path / "lexical"))
+    yield IngestionService(DocumentProcessor(), _HashEmbeddings(), store, lexical_index=lexical)
+    store.close()
+    lexical.close()
+
+
+def _source_paths(service):
+    store = service.vector_store
+    return {
+        (record["path"], record["start_line"])
+        for _, record in store._iter_live_records(store._open(REPO_URL))
+        if record.get("kind") == "source"
+    }
+
+
+def test_changed_and_removed_files_leave_no_stale_chunks(service, tmp_path):
+    repo_dir = tmp_path / "widgets"
+    repo_dir.mkdir()
+    subprocess.run(["git", "init", "-q", str(repo_dir)], check=True)
+    data_path = tmp_path / "repository_data.txt"
+    data_path.write_text(json.dumps({"type": "repository", "name": "widgets", "owner": "octo"}) + "\n")
+
+    _commit(repo_dir, {"big.py": _functions(12), "gone.py": _functions(2), "same.py": _functions(1)})
+    service.ingest_repository_data(REPO_URL, str(data_path), repo_dir=str(repo_dir))
+    before = _source_paths(service)
+    assert len([path for path, _ in before if path == "big.py"]) > 2
+
+    _commit(repo_dir, {"big.py": _functions(2), "gone.py": None})
+    service.ingest_repository_data(REPO_URL, str(data_path), repo_dir=str(repo_dir))
+    after = _source_paths(service)
+
+    assert {path for path, _ in after} == {"big.py", "same.py"}
+    assert len([path for path, _ in after if path == "big.py"]) == 1
+    assert {entry for entry in after if entry[0] == "same.py"} == {entry for entry in before if entry[0] == "same.py"}
+    assert service.lexical_index.query(REPO_URL, "function_5", payload_filter={"kind": "source"}) == []
+
+
+def test_appending_to_a_file_keeps_its_unchanged_chunks(service, tmp_path):
+    repo_dir = tmp_path / "widgets"
+    repo_dir.mkdir()
+    subprocess.run(["git", "init", "-q", str(repo_dir)], check=True)
+    data_path = tmp_path / "repository_data.txt"
+    data_path.write_text(json.dumps({"type": "repository", "name": "widgets", "owner": "octo"}) + "\n")
+
+    _commit(repo_dir, {"big.py": _functions(6)})
+    service.ingest_repository_data(REPO_URL, str(data_path), repo_dir=str(repo_dir))
+    before = _source_paths(service)
+
+    _commit(repo_dir, {"big.py": _functions(8)})
+    service.ingest_repository_data(REPO_URL, str(data_path), repo_dir=str(repo_dir))
+    after = _source_paths(service)
+
+    assert before < after
+    for name in ("function_0", "function_5", "function_7"):
+        assert service.lexical_index.query(REPO_URL, name, payload_filter={"kind": "source"})
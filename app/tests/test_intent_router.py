@@ -0,0 +1,94 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.domain.services.intent_router import AnalyticsIntentRouter
+from app.infrastructure.analytics.analytics_store import AnalyticsStore
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+def _day(days_ago: int) -> str:
+    return (datetime.now(timezone.utc).date() - timedelta(days=days_ago)).isoformat()
+
+
+@pytest.fixture
+def router(tmp_path):
+    commits = [
+        ("a1", "Alice Smith", 1, [("README.md", 3, 1)]),
+        ("a2", "Alice Smith", 2, [("src/app.py", 10, 2)]),
+        ("a3", "Alice Smith", 40, [("src/app.py", 5, 5)]),
+        ("b1", "Bob Jones", 3, [("src/app.py", 1, 0)]),
+        ("c1", "Carol Smith", 100, [("docs/index.md", 2, 0)]),
+    ]
+    records = [{"type": "repository", "name": "widgets", "owner": "octo", "total_commits": len(commits)}]
+    for commit_hash, author, days_ago, files in commits:
+        day = _day(days_ago)
+        records.append({
+            "type": "commit",
+            "hash": commit_hash,
+            "author": author,
+            "date": f"{day}T12:00:00",
+            "day": day,
+            "message": f"commit {commit_hash}",
+            "files": [{"path": path, "additions": added, "deletions": removed} for path, added, removed in files],
+        })
+    records += [
+        {"type": "issue", "id": 1, "number": 1, "state": "open", "is_pull_request": False, "day": _day(1)},
+        {"type": "issue", "id": 2, "number": 2, "state": "closed", "is_pull_request": False, "day": _day(2)},
+        {"type": "issue", "id": 3, "number": 3, "state": "open", "is_pull_request": True, "day": _day(2)},
+    ]
+
+    store = AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+    store.ingest_records(REPO_URL, records)
+    yield AnalyticsIntentRouter(store)
+    store.close()
+
+
+@pytest.mark.parametrize(
+    "question, expected",
+    [
+        ("How many commits are there?", "octo/widgets has 5 commits."),
+        ("How many commits in this repository?", "octo/widgets has 5 commits."),
+        ("Qual o número de commits do repositório?", "octo/widgets tem 5 commits."),
+        ("How many commits by Bob?", "octo/widgets has 1 commits by Bob Jones."),
+        ("How many commits did Alice make last week?", "octo/widgets has 2 commits by Alice Smith in the last 7 days."),
+        ("How many open issues are there?", "octo/widgets has 1 open issues."),
+        ("Quantos pull requests abertos?", "octo/widgets tem 1 pull requests abertos."),
+    ],
+)
+def test_routes_whole_question_matches(router, question, expected):
+    assert router.answer(REPO_URL, question) == expected
+
+
+def test_ranks_authors_and_files(router):
+    assert router.answer(REPO_URL, "Who are the top 2 contributors?") == (
+        "Top contributors to octo/widgets by commits: 1. Alice Smith (3); 2. Bob Jones (1)."
+    )
+    assert router.answer(REPO_URL, "What are the most changed files?").startswith(
+        "Most changed files in octo/widgets: 1. src/app.py (3 commits"
+    )
+    assert "a1" in router.answer(REPO_URL, "What is the latest commit?")
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "How many commits by the core team?",
+        "How many commits did Mallory make?",
+        "How many commits by Smith?",
+        "How many commits touch README.md?",
+        "How many commits mention the login bug?",
+        "Why did the number of commits drop?",
+        "What does src/app.py do?",
+    ],
+)
+def test_falls_back_to_llm(router, question):
+    assert router.answer(REPO_URL, question) is None
+
+
+def test_incomplete_history_is_not_routed(tmp_path):
+    store = AnalyticsStore(str(tmp_path / "analytics.sqlite3"))
+    store.ingest_records(REPO_URL, [{"type": "repository", "total_commits": 10}])
+    assert AnalyticsIntentRouter(store).answer(REPO_URL, "How many commits are there?") is None
+    store.close()
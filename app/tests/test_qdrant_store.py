@@ -0,0 +1,29 @@
+import numpy as np
+from qdrant_client import QdrantClient
+
+from app.core.config import settings
+from app.infrastructure.qdrant.store import QdrantVectorStore
+
+
+def _store():
+    store = QdrantVectorStore.__new__(QdrantVectorStore)
+    store.client = QdrantClient(":memory:")
+    return store
+
+
+def test_per_repo_collections_are_owner_qualified(monkeypatch):
+    monkeypatch.setattr(settings, "QDRANT_COLLECTION_LAYOUT", "per_repo")
+    monkeypatch.setattr(settings, "VECTOR_QUANTIZATION", None)
+    store = _store()
+    first, second = "https://github.com/octo/api", "https://github.com/acme/api.git"
+
+    store.save(first, ["octo chunk"], np.ones((1, 4), dtype=np.float32))
+    store.save(second, ["acme chunk"], np.ones((1, 4), dtype=np.float32))
+
+    assert store._collection(first) != store._collection(second)
+    assert [document.text for document in store.get_all(first)] == ["octo chunk"]
+
+    assert store.delete_repo(second)
+    assert not store.is_repo_processed(second)
+    assert store.count_points(first) == 1
+    store.close()
@@ -0,0 +1,63 @@
+import os
+import subprocess
+
+import pytest
+
+from app.infrastructure.registry.repo_registry import RepoRegistry
+from app.utils.helpers import get_repo_path
+
+
+class _VectorStore:
+    def __init__(self, indexed):
+        self.indexed = indexed
+
+    def is_repo_processed(self, repo_url):
+        return repo_url in self.indexed
+
+    def count_points(self, repo_url):
+        return 7
+
+
+def _clone(path, origin):
+    os.makedirs(path)
+    subprocess.run(["git", "init", "-q", path], check=True)
+    subprocess.run(["git", "-C", path, "remote", "add", "origin", origin], check=True)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = RepoRegistry(str(tmp_path / "registry.sqlite3"))
+    yield registry
+    registry.close()
+
+
+def test_repo_path_includes_owner():
+    assert get_repo_path("https://github.com/Octo/Widgets.git") == os.path.join("octo", "widgets")
+    assert get_repo_path("https://github.com/octo/widgets") != get_repo_path("https://github.com/acme/widgets")
+    with pytest.raises(ValueError):
+        get_repo_path("https://github.com/octo/..")
+
+
+def test_unknown_repository_is_not_downloaded(registry):
+    assert registry.get("https://github.com/octo/widgets") is None
+
+
+def test_migrate_imports_legacy_clones_once(registry, tmp_path):
+    data_dir = tmp_path / "data"
+    _clone(str(data_dir / "widgets"), "git@github.com:Octo/widgets.git")
+    (data_dir / "widgets.sync.json").write_text("{}")
+    _clone(str(data_dir / "scratch"), "https://gitlab.com/octo/scratch.git")
+    vector_store = _VectorStore({"https://github.com/Octo/widgets"})
+
+    assert registry.migrate(vector_store, str(data_dir)) == 1
+
+    record = registry.get("https://github.com/octo/widgets")
+    assert record.repo_url == "https://github.com/Octo/widgets"
+    assert record.local_path == str(data_dir / "octo" / "widgets")
+    assert record.is_indexed and record.chunk_count == 7
+    assert (data_dir / "octo" / "widgets.sync.json").exists()
+    assert (data_dir / "scratch").is_dir()
+
+    _clone(str(data_dir / "gadgets"), "https://github.com/octo/gadgets")
+    assert registry.migrate(vector_store, str(data_dir)) == 0
+    assert registry.get("https://github.com/octo/gadgets") is None
@@ -0,0 +1,37 @@
+import subprocess
+
+from app.infrastructure.github.source_tree import head_blobs, iter_source_files
+
+
+def test_only_tracked_hand_written_source_is_yielded(tmp_path):
+    files = {
+        "src/app.py": "def main():\n    return 1\n",
+        "src/copy_of_app.py": "def main():\n    return 1\n",
+        "src/api.pb.go": "package api\n",
+        "src/generated.ts": "// @generated by protoc\nexport const x = 1;\n",
+        "node_modules/lib/index.js": "module.exports = 1;\n",
+        "assets/logo.png": "not really a png",
+        "data/blob.py": "x = 1\0\n",
+        "big.py": "x = 1\n" * 100,
+        "notes.unknownext": "text\n",
+        "ignored.py": "print('ignored')\n",
+        ".gitignore": "ignored.py\n",
+    }
+    for path, text in files.items():
+        target = tmp_path / path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(text)
+    subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+    subprocess.run(["git", "-C", str(tmp_path), "add", "."], check=True)
+    subprocess.run(
+        ["git", "-C", str(tmp_path), "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", "init"],
+        check=True,
+    )
+    (tmp_path / "src/app.py").write_text("changed in the working tree only\n")
+
+    records = list(iter_source_files(str(tmp_path), max_file_bytes=200))
+
+    assert [(record["path"], record["language"]) for record in records] == [("src/app.py", "python")]
+    assert records[0]["text"] == files["src/app.py"]
+    assert records[0]["blob"] == head_blobs(str(tmp_path))["src/app.py"]
+    assert "ignored.py" not in head_blobs(str(tmp_path))
@@ -0,0 +1,65 @@
+from app.infrastructure.github.github_repo_processor import GitHubRepoProcessor
+
+
+def _metadata(commits, issues, last_commit):
+    commits_on_date = {}
+    for date, commit_hash in commits:
+        day = commits_on_date.setdefault(date, {"total_commits_on_day": 0, "commits": []})
+        day["total_commits_on_day"] += 1
+        day["commits"].append({"hash": commit_hash})
+    issues_on_date = {}
+    for date, issue_id in issues:
+        day = issues_on_date.setdefault(date, {"total_issues_on_day": 0, "issues": []})
+        day["total_issues_on_day"] += 1
+        day["issues"].append({"id": issue_id})
+    return {
+        "name": "widgets",
+        "last_commit": last_commit,
+        "total_commits": len(commits),
+        "total_issues": len(issues),
+        "commits_on_date": commits_on_date,
+        "issues_on_date": issues_on_date,
+    }
+
+
+def test_delta_is_merged_into_month_totals():
+    initial = _metadata(
+        commits=[("2024-01-05", "c1"), ("2024-01-05", "c2"), ("2024-02-01", "c3")],
+        issues=[("2024-01-06", 1), ("2024-02-02", 2)],
+        last_commit="c3",
+    )
+    state = GitHubRepoProcessor._build_sync_state(initial, "2024-02-03T00:00:00Z")
+
+    delta = _metadata(
+        commits=[("2024-02-10", "c4"), ("2024-02-01", "c5")],
+        issues=[("2024-02-02", 2), ("2024-02-11", 3)],
+        last_commit="c5",
+    )
+    merged = GitHubRepoProcessor._merge_sync_state(state, delta, "2024-02-12T00:00:00Z")
+
+    assert merged["total_commits"] == 5
+    assert merged["total_issues"] == 3
+    assert sorted(merged["commits_on_date"]) == ["2024-02-01", "2024-02-02", "2024-02-10", "2024-02-11"]
+    assert merged["commits_on_date"]["2024-02-01"] == {"total_commits_on_day": 2, "commits": [{"hash": "c5"}]}
+    assert merged["commits_on_date"]["2024-02-02"] == {"total_commits_on_day": 0, "commits": []}
+    assert merged["issues_on_date"]["2024-02-02"]["total_issues_on_day"] == 1
+    assert merged["issues_on_date"]["2024-02-11"]["total_issues_on_day"] == 1
+
+    assert state["last_commit"] == "c5"
+    assert state["issues_synced_at"] == "2024-02-12T00:00:00Z"
+    assert state["issue_ids"] == [1, 2, 3]
+    assert state["commits_per_day"]["2024-01-05"] == 2
+
+
+def test_empty_delta_keeps_totals():
+    initial = _metadata(commits=[("2024-01-05", "c1")], issues=[("2024-01-06", 1)], last_commit="c1")
+    state = GitHubRepoProcessor._build_sync_state(initial, "2024-01-07T00:00:00Z")
+
+    merged = GitHubRepoProcessor._merge_sync_state(
+        state, _metadata(commits=[], issues=[], last_commit="c1"), "2024-01-08T00:00:00Z"
+    )
+
+    assert merged["total_commits"] == 1
+    assert merged["total_issues"] == 1
+    assert merged["commits_on_date"] == {} and merged["issues_on_date"] == {}
+    assert state["last_commit"] == "c1"
@@ -0,0 +1,127 @@
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.infrastructure.local import vector_index
+from app.infrastructure.local.vector_index import LocalVectorStore
+from app.utils.helpers import make_point_id
+
+REPO_URL = "https://github.com/octo/widgets"
+
+
+def _vectors(count: int, dimension: int = 32, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    clusters = rng.standard_normal((16, dimension))
+    return (clusters[rng.integers(0, 16, count)] + 0.3 * rng.standard_normal((count, dimension))).astype(np.float32)
+
+
+def _save(store: LocalVectorStore, vectors: np.ndarray, first: int = 0) -> None:
+    rows = range(first, first + len(vectors))
+    store.save(
+        REPO_URL,
+        [f"chunk {i}" for i in rows],
+        vectors,
+        [{"n": i, "kind": "commit" if i % 2 else "issue"} for i in rows],
+        [make_point_id(REPO_URL, str(i)) for i in rows],
+    )
+
+
+def _exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int, rows=None) -> list:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    candidates = np.arange(len(vectors)) if rows is None else np.asarray(rows)
+    return [int(i) for i in candidates[np.argsort(-scores[candidates], kind="stable")[:k]]]
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_QUANTIZATION", None)
+    monkeypatch.setattr(settings, "LOCAL_INDEX_COMPRESS_RECORDS", True)
+    store = LocalVectorStore(str(tmp_path))
+    yield store
+    store.close()
+
+
+def test_top_k_matches_exact_search(store):
+    vectors = _vectors(500)
+    _save(store, vectors)
+    query = vectors[7] + 0.05
+
+    hits = store.query(REPO_URL, query.tolist(), top_k=5)
+
+    assert [hit.metadata["n"] for hit in hits] == _exact_top_k(vectors, query, 5)
+    assert hits[0].text == f"chunk {hits[0].metadata['n']}"
+    assert all(a.score >= b.score for a, b in zip(hits, hits[1:]))
+
+
+def test_payload_filter_and_threshold(store):
+    vectors = _vectors(500)
+    _save(store, vectors)
+    query = vectors[8]
+
+    hits = store.query(REPO_URL, query.tolist(), top_k=5, payload_filter={"kind": "commit"})
+    assert [hit.metadata["n"] for hit in hits] == _exact_top_k(vectors, query, 5, rows=range(1, 500, 2))
+
+    hits = store.query(REPO_URL, query.tolist(), top_k=5, score_threshold=0.999)
+    assert [hit.metadata["n"] for hit in hits] == [8]
+
+
+def test_upsert_replaces_existing_id(store):
+    vectors = _vectors(50)
+    _save(store, vectors)
+    store.save(REPO_URL, ["replaced"], vectors[3:4] * -1, [{"n": 3, "content_hash": "h"}], [make_point_id(REPO_URL, "3")])
+
+    assert store.count_points(REPO_URL) == 50
+    assert store.get_content_hashes(REPO_URL, [make_point_id(REPO_URL, "3")]) == {make_point_id(REPO_URL, "3"): "h"}
+    assert all(hit.metadata["n"] != 3 for hit in store.query(REPO_URL, vectors[3].tolist(), top_k=10))
+
+
+def test_int8_quantization_keeps_top_k(store, monkeypatch):
+    monkeypatch.setattr(settings, "VECTOR_QUANTIZATION", "scalar")
+    vectors = _vectors(2000, dimension=64)
+    _save(store, vectors)
+    queries = _vectors(20, dimension=64, seed=1)
+
+    recall = np.mean([
+        len({hit.metadata["n"] for hit in store.query(REPO_URL, query.tolist(), top_k=10)} & set(_exact_top_k(vectors, query, 10))) / 10
+        for query in queries
+    ])
+    assert recall >= 0.95
+
+
+def test_ivf_is_rebuilt_only_after_growth(store, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_MIN_VECTORS", 400)
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_REBUILD_GROWTH", 0.5)
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_NPROBE", 64)
+    builds = []
+    original_build = vector_index.IVFIndex.build.__func__
+    monkeypatch.setattr(
+        vector_index.IVFIndex, "build",
+        classmethod(lambda cls, vectors, **kwargs: builds.append(len(vectors)) or original_build(cls, vectors, **kwargs)),
+    )
+
+    vectors = _vectors(1000)
+    for first in range(0, 1000, 100):
+        _save(store, vectors[first:first + 100], first)
+
+    assert builds == [400, 600, 900]
+    query = vectors[950]
+    assert store.query(REPO_URL, query.tolist(), top_k=1)[0].metadata["n"] == 950
+
+
+def test_replaced_view_stays_readable_until_its_reader_is_done(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "LOCAL_INDEX_IVF_MIN_VECTORS", 100)
+    vectors = _vectors(300)
+    _save(store, vectors[:200])
+
+    with store._reading(REPO_URL) as old_view:
+        _save(store, vectors[200:], first=200)
+        assert old_view.retired and old_view.count == 200
+        assert old_view.read_records([199])[0]["n"] == 199
+        assert old_view.ivf.order.max() < 200
+    assert old_view.records.closed
+
+    ivf_files = sorted(path.name for path in (tmp_path / "octo" / "widgets").glob("ivf_*.npy"))
+    assert ivf_files == ["ivf_centroids.2.npy", "ivf_list_offsets.2.npy", "ivf_order.2.npy"]
+    assert store.count_points(REPO_URL) == 300
+    assert store.query(REPO_URL, vectors[250].tolist(), top_k=1)[0].metadata["n"] == 250
@@ -1,28 +1,99 @@
+import codecs
+import hashlib
+import logging
 import os
-import shutil
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
 from urllib.parse import urlparse
 import chardet
+from app.core.config import settings
 
+T = TypeVar("T")
 
-def convert_to_txt(file_path, txt_path):
+
+BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".tif", ".tiff", ".psd",
+    ".pdf", ".doc", ".docx", ".xls", ".xlsx", ".ppt", ".pptx", ".odt",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".7z", ".rar", ".tar", ".jar", ".war", ".whl", ".egg",
+    ".exe", ".dll", ".so", ".dylib", ".a", ".o", ".obj", ".lib", ".bin", ".class", ".pyc", ".pyo", ".wasm",
+    ".mp3", ".mp4", ".wav", ".ogg", ".flac", ".avi", ".mov", ".mkv", ".webm",
+    ".ttf", ".otf", ".woff", ".woff2", ".eot",
+    ".sqlite", ".sqlite3", ".db", ".pkl", ".npy", ".npz", ".parquet", ".h5", ".pt", ".onnx",
+})
+
+
+def _is_readable_text(sample: bytes) -> bool:
+    if b"\0" in sample:
+        return False
     try:
+        # Decode incrementally so a multi-byte character cut off by the sample boundary still counts as UTF-8.
+        codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
+        return chardet.detect(sample)["confidence"] >= 0.5
+
+
+def convert_to_txt(file_path: str, txt_path: str, sample_size: Optional[int] = None) -> str:
+    """
+    Renames a readable text file to its .txt path and deletes anything else.
+
+    Binary extensions are dropped without being opened; other files are judged on their
+    first `sample_size` bytes: a NUL byte means binary, valid UTF-8 is kept as is, and
+    anything else is kept only if chardet is confident about its encoding.
+
+    Returns:
+        str: "kept", "binary", "unreadable" or "error".
+    """
+    try:
+        if os.path.splitext(file_path)[1].lower() in BINARY_EXTENSIONS:
+            os.remove(file_path)
+            return "binary"
+
         with open(file_path, 'rb') as f:
-            result = chardet.detect(f.read())
+            sample = f.read(sample_size or settings.CONVERT_SAMPLE_BYTES)
 
-        if result['confidence'] < 0.5:
-            print(f"Deleting unreadable file: {file_path}")
+        if not sample or not _is_readable_text(sample):
             os.remove(file_path)
-            return
+            return "binary" if b"\0" in sample else "unreadable"
 
-        shutil.copyfile(file_path, txt_path)
-        os.remove(file_path)
+        os.replace(file_path, txt_path)
+        return "kept"
 
     except Exception as e:
-        print(f"Error processing file {file_path}: {e}")
-        return
+        logging.warning(f"Error processing file {file_path}: {e}")
+        return "error"
+
+def _convert_shard(paths: List[Tuple[str, str]], sample_size: int) -> Counter:
+    counts = Counter()
+    for file_path, txt_path in paths:
+        counts[convert_to_txt(file_path, txt_path, sample_size)] += 1
+    return counts
+
+def find_and_convert_in_dir(dir_path: str) -> Dict[str, Any]:
+    """
+    Turns a clone into .txt files for indexing, skipping .git.
+
+    The files are split into shards of at least settings.CONVERT_MIN_SHARD_SIZE and
+    converted in a process pool of up to settings.CONVERT_WORKERS processes; a tree
+    with a single shard is converted in the calling thread.
+
+    Returns:
+        Dict[str, Any]: How many files were kept, dropped as binary or unreadable,
+        failed, or left unconverted because their .txt path was taken, and the seconds
+        spent.
+    """
+    started = time.perf_counter()
+    paths = []
+    claimed = set()
+    collisions = 0
+    for root, dirs, files in os.walk(dir_path):
+        if ".git" in dirs:
+            dirs.remove(".git")
 
-def find_and_convert_in_dir(dir_path):
-    for root, _, files in os.walk(dir_path):
         for file in files:
             if file.endswith(".txt"):
                 continue
@@ -30,19 +101,67 @@ def find_and_convert_in_dir(dir_path):
             file_path = os.path.join(root, file)
             base = os.path.splitext(file_path)[0]
             txt_path = base + '.txt'
-            if not os.path.exists(txt_path):
-                convert_to_txt(file_path, txt_path)
+            # foo.py and foo.js (or an existing foo.txt) would end up on the same .txt path;
+            # only the first one is renamed, the others keep their original name.
+            if txt_path in claimed or os.path.exists(txt_path):
+                collisions += 1
+                continue
+            claimed.add(txt_path)
+            paths.append((file_path, txt_path))
+
+    workers = settings.CONVERT_WORKERS or os.cpu_count() or 1
+    shard_count = max(1, min(workers, len(paths) // settings.CONVERT_MIN_SHARD_SIZE))
+    shards = [paths[i::shard_count] for i in range(shard_count)]
+
+    counts = Counter()
+    if shard_count == 1:
+        counts = _convert_shard(paths, settings.CONVERT_SAMPLE_BYTES)
+    else:
+        with ProcessPoolExecutor(max_workers=shard_count) as pool:
+            for shard_counts in pool.map(_convert_shard, shards, [settings.CONVERT_SAMPLE_BYTES] * shard_count):
+                counts.update(shard_counts)
+
+    summary = {
+        "files": len(paths),
+        "kept": counts["kept"],
+        "dropped_binary": counts["binary"],
+        "dropped_unreadable": counts["unreadable"],
+        "errors": counts["error"],
+        "collisions": collisions,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    logging.info(f"Converted {dir_path}: {summary}")
+    return summary
 
 def is_repo_downloaded(repo_url):
-    repo_name = extract_repo_name(repo_url)
-    repo_dir = os.path.join("./data", repo_name)
-    return os.path.isdir(repo_dir)
+    return os.path.isdir(get_repo_dir(repo_url))
+
+def get_repo_dir(repo_url: str) -> str:
+    return os.path.join(settings.DATA_DIR, get_repo_path(repo_url))
+
+def get_repository_data_path(repo_url: str) -> str:
+    return os.path.join(get_repo_dir(repo_url), settings.REPOSITORY_DATA_FILE)
+
+def batched(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 def extract_repo_name_and_owner(repo_url: str) -> str:
     path = urlparse(repo_url).path
     return path.strip("/")
 
+def get_repo_path(repo_url: str) -> str:
+    """
+    Relative "owner/repo" path under which everything stored on disk for a repository lives,
+    so two owners' repositories with the same name never share a clone, sync state or index.
+    """
+    parts = extract_repo_name_and_owner(repo_url).removesuffix(".git").lower().split("/")
+    if len(parts) != 2 or any(part in ("", ".", "..") for part in parts):
+        raise ValueError(f"Not a repository URL: {repo_url}")
+    return os.path.join(*parts)
+
 def extract_repo_name(repo_url: str) -> str:
     path = urlparse(repo_url).path
     path = path.strip("/")
@@ -53,3 +172,20 @@ def extract_repo_name(repo_url: str) -> str:
     repo_name = path.split("/")[-1]
 
     return repo_name
+
+def make_point_id(repo_url: str, key: str) -> str:
+    """
+    Deterministic vector store id for a chunk: the same repository and chunk key always map to the same UUID.
+    """
+    repo = extract_repo_name_and_owner(repo_url).removesuffix(".git")
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"{repo}#{key}"))
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate used for prompt budgeting (no tokenizer round trip).
+    """
+    return len(text) // settings.PROMPT_CHARS_PER_TOKEN + 1
@@ -0,0 +1,76 @@
+import json
+from typing import Any, Dict, Iterator
+
+REPOSITORY_FIELDS = (
+    "id", "name", "owner", "url", "updated_at", "archived", "default_branch",
+    "open_issues_count", "total_commits", "total_issues",
+)
+
+
+def iter_metadata_records(metadata: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Flattens the nested structure built by GitHubRepoProcessor.form_metadata into
+    self-contained records: one for the repository, one per day with its totals,
+    one per commit and one per issue.
+
+    Args:
+        metadata (Dict[str, Any]): The repository metadata with commits_on_date/issues_on_date.
+
+    Returns:
+        Iterator[Dict[str, Any]]: Records tagged with a "type" key.
+    """
+    repository = {field: metadata[field] for field in REPOSITORY_FIELDS if field in metadata}
+    yield {"type": "repository", **repository}
+
+    commits_on_date = metadata.get("commits_on_date", {})
+    issues_on_date = metadata.get("issues_on_date", {})
+
+    for date in sorted(set(commits_on_date) | set(issues_on_date)):
+        yield {
+            "type": "day",
+            "date": date,
+            "total_commits_on_day": commits_on_date.get(date, {}).get("total_commits_on_day", 0),
+            "total_issues_on_day": issues_on_date.get(date, {}).get("total_issues_on_day", 0),
+        }
+
+    for date, day in commits_on_date.items():
+        for commit in day["commits"]:
+            yield {"type": "commit", "day": date, **commit}
+
+    for date, day in issues_on_date.items():
+        for issue in day["issues"]:
+            yield {"type": "issue", "day": date, **issue}
+
+
+def read_repository_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Streams the records of a repository_data file one line at a time.
+
+    Files written before the JSON Lines format (a single JSON document) are still
+    accepted; they are loaded whole and flattened with iter_metadata_records.
+
+    Args:
+        path (str): Path to the repository_data file.
+
+    Returns:
+        Iterator[Dict[str, Any]]: Records tagged with a "type" key.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        first_line = file.readline()
+        try:
+            first_record = json.loads(first_line)
+        except json.JSONDecodeError:
+            first_record = None
+
+        if isinstance(first_record, dict) and "type" in first_record:
+            yield first_record
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        if first_record is None:
+            file.seek(0)
+            first_record = json.load(file)
+
+    yield from iter_metadata_records(first_record)
@@ -1,61 +1,89 @@
+import asyncio
 import json
 import logging
+import uuid
+from typing import Dict, Optional
+
 from fastapi import WebSocket
+from starlette.websockets import WebSocketState
 
 
 class WebSocketServer:
-    def __init__(self, redis_service, rabbitmq_service):
-        self.active_connections = set()
-        self.redis_service = redis_service
+    """
+    Bridges WebSocket clients and the chat worker pool.
+
+    Every connection gets its own correlation id. Requests are published to
+    "chat_requests" with that id and with reply_to set to this process' exclusive
+    reply queue; a single consumer on that queue routes each reply to the socket
+    registered under its correlation id. Any number of WebSocket processes can run
+    side by side, each receiving only the replies for its own connections.
+    """
+
+    def __init__(self, rabbitmq_service):
+        self.active_connections: Dict[str, WebSocket] = {}
         self.rabbitmq_service = rabbitmq_service
+        self.reply_queue = None
+        self._reply_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.reply_queue = await self.rabbitmq_service.declare_reply_queue()
+        self._reply_task = asyncio.create_task(self._route_replies())
+        logging.info(f"Fila de respostas {self.reply_queue.name} pronta.")
+
+    async def stop(self):
+        if self._reply_task:
+            self._reply_task.cancel()
+            try:
+                await self._reply_task
+            except asyncio.CancelledError:
+                pass
+            self._reply_task = None
+
+    async def _route_replies(self):
+        async with self.reply_queue.iterator(no_ack=True) as queue_iter:
+            async for message in queue_iter:
+                websocket = self.active_connections.get(message.correlation_id)
+                if websocket is None:
+                    logging.warning(f"Resposta descartada; conexão {message.correlation_id} não existe mais.")
+                    continue
+                try:
+                    await websocket.send_text(message.body.decode())
+                except Exception as e:
+                    logging.error(f"Erro ao enviar resposta para a conexão {message.correlation_id}: {e}")
 
     async def websocket_handler(self, websocket: WebSocket):
         await websocket.accept()
-        self.active_connections.add(websocket)
-        logging.info("Nova conexão WebSocket aceita.")
+        connection_id = uuid.uuid4().hex
+        self.active_connections[connection_id] = websocket
+        logging.info(f"Nova conexão WebSocket aceita: {connection_id}.")
 
         try:
-            data = await websocket.receive_text()
-            logging.info(f"Mensagem inicial recebida: {data}")
-
-            try:
-                request_data = json.loads(data)
-                user_id = request_data.get("user_id")
-                question = request_data.get("question")
-                repo_url = request_data.get("repo_url")
-
-                if not user_id or not question or not repo_url:
-                    raise ValueError("Campos user_id, question ou repo_url ausentes na mensagem inicial.")
-            except Exception as e:
-                logging.error(f"Erro ao extrair dados da mensagem: {e}")
-                await websocket.send_text(json.dumps({"error": "Dados inválidos ou ausentes na mensagem inicial."}))
-                return
-
-            # chat_history = self.redis_service.get_history(user_id)
-            # if chat_history:
-            #     logging.info(f"Histórico encontrado para o usuário {user_id}.")
-            #
-            #
-            #     await self.rabbitmq_service.publish(
-            #         "chat_responses",
-            #         json.dumps({"history": chat_history})
-            #     )
-            #     logging.info("Histórico adicionado à fila 'chat_responses'.")
-
             while True:
                 data = await websocket.receive_text()
                 logging.info(f"Mensagem recebida: {data}")
 
-                await self.rabbitmq_service.publish("chat_requests", data)
-                logging.info("Mensagem publicada na fila 'chat_requests'.")
+                try:
+                    request_data = json.loads(data)
+                    if not all(request_data.get(field) for field in ("user_id", "question", "repo_url")):
+                        raise ValueError("Campos user_id, question ou repo_url ausentes na mensagem.")
+                except Exception as e:
+                    logging.error(f"Erro ao extrair dados da mensagem: {e}")
+                    await websocket.send_text(json.dumps({"error": "Dados inválidos ou ausentes na mensagem."}))
+                    continue
+
+                request_data.setdefault("stream", True)
 
-                async for response in self.rabbitmq_service.consume("chat_responses"):
-                    await websocket.send_text(response)
-                    logging.info(f"Resposta enviada para o front-end: {response}")
-                    # break
+                await self.rabbitmq_service.publish(
+                    "chat_requests",
+                    json.dumps(request_data),
+                    correlation_id=connection_id,
+                    reply_to=self.reply_queue.name,
+                )
+                logging.info("Mensagem publicada na fila 'chat_requests'.")
         except Exception as e:
             logging.error(f"Erro na conexão WebSocket: {e}")
         finally:
-            self.active_connections.remove(websocket)
-            await websocket.close()
-            logging.info("Conexão WebSocket encerrada.")
\ No newline at end of file
+            self.active_connections.pop(connection_id, None)
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await websocket.close()
+            logging.info(f"Conexão WebSocket encerrada: {connection_id}.")
@@ -0,0 +1,48 @@
+"""
+Standalone chat worker: `python -m app.workers`.
+
+Consumes "chat_requests" with settings.WORKER_CONCURRENCY consumers and answers on each
+request's reply_to queue, so inference capacity scales independently of the API and
+WebSocket tier (run the API with RUN_EMBEDDED_WORKER=false). SIGINT/SIGTERM drain the
+requests in flight before exiting.
+"""
+import asyncio
+import logging
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.config import settings
+from app.core.container import container
+from app.domain.services.rabbitmq_service import RabbitMQService
+from app.workers.chat_worker import ChatWorkerPool
+
+
+async def main():
+    loop = asyncio.get_running_loop()
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=settings.WORKER_THREADS))
+
+    await asyncio.to_thread(container.initialize)
+
+    rabbitmq_service = RabbitMQService()
+    await rabbitmq_service.connect()
+
+    pool = ChatWorkerPool(rabbitmq_service, container.chat_processor)
+    await pool.start()
+
+    stop = asyncio.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await stop.wait()
+    logging.info("Sinal de parada recebido; drenando o worker.")
+
+    try:
+        await pool.drain()
+    finally:
+        await rabbitmq_service.close()
+        await container.shutdown()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
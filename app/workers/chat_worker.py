@@ -1,20 +1,141 @@
+import asyncio
 import json
 import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional, Set
+
+from app.core.config import settings
 from app.domain.schema.query import QueryRequest
 from app.domain.services.chat_request_processor import ChatRequestProcessor
 
+CHAT_REQUESTS_QUEUE = "chat_requests"
+
+
+async def handle_chat_message(rabbitmq_service, chat_processor: ChatRequestProcessor, message):
+    reply_to = message.reply_to or "chat_responses"
+    correlation_id = message.correlation_id
+
+    try:
+        request_data = json.loads(message.body.decode())
+        request = QueryRequest(**request_data)
+
+        if request.stream:
+            async for event in chat_processor.stream(request):
+                await rabbitmq_service.publish(reply_to, json.dumps(event), correlation_id=correlation_id)
+            return
+
+        response = await chat_processor.process(request)
+
+        await rabbitmq_service.publish(reply_to, response.model_dump_json(), correlation_id=correlation_id)
+
+    except Exception as e:
+        logging.error(f"Erro ao processar mensagem do RabbitMQ: {e}")
+
+
+class ChatWorkerPool:
+    """
+    Runs `concurrency` consumers of the "chat_requests" queue, each on its own channel
+    with `prefetch_count` unacknowledged messages at most, so the broker only hands a
+    worker as much as it is currently able to answer and the rest stays queued for
+    other worker processes.
 
-async def chat_worker(rabbitmq_service):
-    chat_processor = ChatRequestProcessor()
+    `drain()` stops taking new requests, lets the ones in flight finish (up to
+    `drain_timeout` seconds) and leaves anything unacknowledged to be redelivered.
+    """
 
-    async for message in rabbitmq_service.consume("chat_requests"):
+    def __init__(
+        self,
+        rabbitmq_service,
+        chat_processor: ChatRequestProcessor,
+        concurrency: Optional[int] = None,
+        prefetch_count: Optional[int] = None,
+        drain_timeout: Optional[float] = None,
+        lag_report_interval: Optional[float] = None,
+    ):
+        self.rabbitmq_service = rabbitmq_service
+        self.chat_processor = chat_processor
+        self.concurrency = concurrency or settings.WORKER_CONCURRENCY
+        self.prefetch_count = prefetch_count or settings.WORKER_PREFETCH_COUNT
+        self.drain_timeout = drain_timeout if drain_timeout is not None else settings.WORKER_DRAIN_TIMEOUT
+        self.lag_report_interval = lag_report_interval or settings.WORKER_LAG_REPORT_INTERVAL
+
+        self._stopping = asyncio.Event()
+        self._consumers: Dict[int, asyncio.Task] = {}
+        self._busy: Set[int] = set()
+        self._reporter: Optional[asyncio.Task] = None
+        self._handled = 0
+        self._wait_seconds = 0.0
+
+    async def start(self):
+        for index in range(self.concurrency):
+            self._consumers[index] = asyncio.create_task(self._consume(index))
+        self._reporter = asyncio.create_task(self._report_lag())
+        logging.info(f"{self.concurrency} consumidores da fila '{CHAT_REQUESTS_QUEUE}' iniciados.")
+
+    async def _consume(self, index: int):
+        messages = self.rabbitmq_service.consume(CHAT_REQUESTS_QUEUE, prefetch_count=self.prefetch_count)
         try:
-            request_data = json.loads(message)
-            request = QueryRequest(**request_data)
+            async for message in messages:
+                if self._stopping.is_set():
+                    break
+
+                self._busy.add(index)
+                try:
+                    self._record_wait(message)
+                    async with message.process(requeue=True):
+                        await handle_chat_message(self.rabbitmq_service, self.chat_processor, message)
+                finally:
+                    self._busy.discard(index)
+
+                if self._stopping.is_set():
+                    break
+        finally:
+            await messages.aclose()
+
+    def _record_wait(self, message):
+        if message.timestamp is None:
+            return
+        published_at = message.timestamp
+        if published_at.tzinfo is None:
+            published_at = published_at.replace(tzinfo=timezone.utc)
+        self._handled += 1
+        self._wait_seconds += max((datetime.now(timezone.utc) - published_at).total_seconds(), 0.0)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "consumers": self.concurrency,
+            "in_flight": len(self._busy),
+            "handled": self._handled,
+            "avg_queue_wait_seconds": self._wait_seconds / self._handled if self._handled else 0.0,
+        }
+
+    async def _report_lag(self):
+        while True:
+            await asyncio.sleep(self.lag_report_interval)
+            try:
+                queue = await self.rabbitmq_service.queue_stats(CHAT_REQUESTS_QUEUE)
+                logging.info(f"Fila '{CHAT_REQUESTS_QUEUE}': {queue}; worker: {self.stats()}")
+            except Exception as e:
+                logging.warning(f"Não foi possível consultar a fila '{CHAT_REQUESTS_QUEUE}': {e}")
+
+    async def drain(self):
+        self._stopping.set()
+        if self._reporter:
+            self._reporter.cancel()
 
-            response = await chat_processor.process(request)
+        idle = [task for index, task in self._consumers.items() if index not in self._busy]
+        busy = [task for index, task in self._consumers.items() if index in self._busy]
+        for task in idle:
+            task.cancel()
 
-            await rabbitmq_service.publish("chat_responses", json.dumps(response))
+        if busy:
+            logging.info(f"Aguardando {len(busy)} requisições em andamento (até {self.drain_timeout:.0f}s).")
+            start = time.monotonic()
+            _, pending = await asyncio.wait(busy, timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            logging.info(f"Drenagem concluída em {time.monotonic() - start:.1f}s; {len(pending)} requisições devolvidas à fila.")
 
-        except Exception as e:
-            logging.error(f"Erro ao processar mensagem do RabbitMQ: {e}")
\ No newline at end of file
+        await asyncio.gather(*self._consumers.values(), self._reporter or asyncio.sleep(0), return_exceptions=True)
+        self._consumers.clear()